@@ -1,21 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import uuid
+
 from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from typing import Any 
 from app.api.deps import get_db
+from app.core.config import settings
+from app.core.tracing import current_trace, span
 from app.db.models.file import File
+from app.db.session import AsyncSessionLocal
 from app.schemas.chat_ask import (
 
     ChatAskRequest, 
     ChatAskResponse, 
     ChatResumeMatch,
 )
-from app.services.chat.query_parser import parse_skill_and_years_smart
-from app.services.chat.pinecone_search import pinecone_search, pinecone_vector_search
+from app.services.chat.query_parser import parse_skill_and_years, parse_skill_and_years_smart
+from app.services.chat.pinecone_search import apinecone_vector_search, pinecone_search
 from app.services.chat.intent_classifier import classify_resume_intent
-from app.services.processing.embeddings import embed_texts
+from app.services.chat.single_flight import chat_flight, chat_redis_flight, make_key, normalize_text
+from app.services.processing.query_embeddings import embed_query
 
 router = APIRouter()
 
@@ -33,39 +41,126 @@ def _looks_like_jd(text: str) -> bool:
 
 @router.post("/ask", response_model=ChatAskResponse)
 async def ask(payload: ChatAskRequest, db: AsyncSession = Depends(get_db)) -> ChatAskResponse:
-    intent_obj = await classify_resume_intent(
-        payload.question,
-        last_presented_question=payload.last_presented_question,
+    response = await _ask(payload, db)
+    t = current_trace()
+    if payload.debug and t is not None:
+        return response.model_copy(update={"timings": {**t.breakdown(), **t.counters()}})
+    return response
+
+
+async def _ask(payload: ChatAskRequest, db: AsyncSession) -> ChatAskResponse:
+    if not settings.chat_single_flight_enabled:
+        return await _answer(payload, db)
+
+    key = make_key(
+        normalize_text(payload.question),
+        normalize_text(payload.last_presented_question),
+        payload.namespace,
+        payload.top_k,
+        payload.use_pinecone_fallback,
     )
-    skill, min_years = intent_obj.skill, intent_obj.min_years
-
-    if intent_obj.intent in ("GENERAL", "OTHER"):
-        return ChatAskResponse(parsed_skill=None, parsed_min_years=None, matches=[])
-    
-    if intent_obj.intent == "RESUME_FILTER" and _looks_like_jd(payload.question):
-        jd_vec = embed_texts([(payload.question or "").strip()])[0]
-        pc = pinecone_vector_search(jd_vec, namespace=payload.namespace, top_k=payload.top_k)
 
-        matches = [
-            ChatResumeMatch(
-                file_id=str(m.get("file_id") or ""),
-                resume_name=str(m.get("resume_name") or ""),
+    # The shared computation owns its session: it may outlive the request that started it
+    async def compute() -> ChatAskResponse:
+        async with AsyncSessionLocal() as session:
+            return await _answer(payload, session)
+
+    # Stage spans are recorded only by the request that ran the computation;
+    # a follower's trace shows just the time it spent waiting here
+    with span("single_flight"):
+        if settings.chat_single_flight_redis:
+            return await chat_flight.do(
+                key,
+                lambda: chat_redis_flight.do(
+                    key,
+                    compute,
+                    dumps=lambda r: r.model_dump_json(),
+                    loads=ChatAskResponse.model_validate_json,
+                ),
             )
-            for m in pc
-            if m.get("resume_name")
-        ]
 
-        return ChatAskResponse(parsed_skill=None, parsed_min_years=None, matches=matches)
+        return await chat_flight.do(key, compute)
 
-    # 1) DB filtering using resume_profile
-    result = await db.execute(
-        select(File).where(
-            File.status == "succeeded",
-            File.resume_profile.isnot(None),
+
+def _vector_top_k(top_k: int) -> int:
+    # Over-fetch so collapsing near-duplicate files still leaves top_k candidates
+    return top_k * 2 if settings.dedup_enabled else top_k
+
+
+async def _jd_search(question: str, namespace: str, top_k: int) -> list[dict[str, Any]]:
+    with span("embed"):
+        jd_vec = await asyncio.to_thread(embed_query, question)
+    with span("pinecone"):
+        return await apinecone_vector_search(jd_vec, namespace=namespace, top_k=_vector_top_k(top_k))
+
+
+async def _collapse_duplicates(db: AsyncSession, matches: list[dict[str, Any]], top_k: int) -> list[ChatResumeMatch]:
+    # Vector hits -> one match per candidate: a near-duplicate file is replaced by the file it
+    # duplicates, and later hits for an already listed candidate are dropped (best score wins)
+    ids: list[uuid.UUID] = []
+    for m in matches:
+        try:
+            ids.append(uuid.UUID(str(m.get("file_id"))))
+        except ValueError:
+            pass
+
+    canonical_of: dict[str, tuple[str, str]] = {}
+    if settings.dedup_enabled and ids:
+        with span("collapse"):
+            canonical = aliased(File)
+            result = await db.execute(
+                select(File.id, canonical.id, canonical.name)
+                .outerjoin(canonical, canonical.id == File.duplicate_of)
+                .where(File.id.in_(ids), File.duplicate_of.isnot(None))
+            )
+            canonical_of = {str(fid): (str(cid), cname) for fid, cid, cname in result.all()}
+
+    out: list[ChatResumeMatch] = []
+    seen: set[str] = set()
+    for m in matches:
+        if not m.get("resume_name"):
+            continue
+        file_id = str(m.get("file_id") or "")
+        file_id, name = canonical_of.get(file_id, (file_id, str(m.get("resume_name") or "")))
+        if file_id in seen:
+            continue
+        seen.add(file_id)
+        out.append(ChatResumeMatch(file_id=file_id, resume_name=name))
+    return out[:top_k]
+
+
+async def _load_profiled_files(db: AsyncSession) -> list[File]:
+    with span("db_scan") as s:
+        result = await db.execute(
+            select(File).where(
+                File.status == "succeeded",
+                File.resume_profile.isnot(None),
+                # Near-duplicates share their canonical file's profile: list each candidate once
+                File.duplicate_of.is_(None),
+            )
         )
-    )
-    files = result.scalars().all()
+        files = list(result.scalars().all())
+        if s is not None:
+            s.attributes["rows"] = len(files)
+    return files
+
 
+async def _prefetch_profiled_files() -> list[File]:
+    # Speculative branch: may be cancelled mid-query, so it runs on its own short-lived
+    # session and never leaves the request's connection in an unknown state
+    async with AsyncSessionLocal() as db:
+        return await _load_profiled_files(db)
+
+
+async def _cancel(*tasks: asyncio.Task | None) -> None:
+    pending = [t for t in tasks if t is not None and not t.done()]
+    for t in pending:
+        t.cancel()
+    # Reap them so cancelled branches don't log "exception was never retrieved"
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _filter_profiles(files: list[File], skill: str | None, min_years: float | None) -> list[ChatResumeMatch]:
     db_matches: list[ChatResumeMatch] = []
     for f in files:
         profile = f.resume_profile or {}
@@ -99,6 +194,57 @@ async def ask(payload: ChatAskRequest, db: AsyncSession = Depends(get_db)) -> Ch
                 resume_name=f.name,
             )
         )
+    return db_matches
+
+
+async def _answer(payload: ChatAskRequest, db: AsyncSession) -> ChatAskResponse:
+    looks_like_jd = _looks_like_jd(payload.question)
+
+    # Speculative mode: start the branch we will most likely need while the LLM classifies.
+    # JD-looking input -> embedding + Pinecone; a message naming a known skill or a years
+    # value -> profile prefetch from Postgres. Anything else (chit-chat) prefetches nothing.
+    jd_task: asyncio.Task | None = None
+    db_task: asyncio.Task | None = None
+    if settings.chat_speculative_execution:
+        if looks_like_jd:
+            jd_task = asyncio.create_task(_jd_search(payload.question, payload.namespace, payload.top_k))
+        elif any(v is not None for v in parse_skill_and_years(payload.question)):
+            db_task = asyncio.create_task(_prefetch_profiled_files())
+
+    try:
+        with span("classify"):
+            intent_obj = await classify_resume_intent(
+                payload.question,
+                last_presented_question=payload.last_presented_question,
+            )
+    except BaseException:
+        await _cancel(jd_task, db_task)
+        raise
+
+    skill, min_years = intent_obj.skill, intent_obj.min_years
+
+    if intent_obj.intent in ("GENERAL", "OTHER"):
+        await _cancel(jd_task, db_task)
+        return ChatAskResponse(parsed_skill=None, parsed_min_years=None, matches=[])
+    
+    if intent_obj.intent == "RESUME_FILTER" and looks_like_jd:
+        await _cancel(db_task)
+        if jd_task is not None:
+            pc = await jd_task
+        else:
+            pc = await _jd_search(payload.question, payload.namespace, payload.top_k)
+
+        matches = await _collapse_duplicates(db, pc, payload.top_k)
+
+        return ChatAskResponse(parsed_skill=None, parsed_min_years=None, matches=matches)
+
+    await _cancel(jd_task)
+
+    # 1) DB filtering using resume_profile
+    files = await db_task if db_task is not None else await _load_profiled_files(db)
+
+    with span("filter", rows=len(files)):
+        db_matches = _filter_profiles(files, skill, min_years)
 
     # If DB gave results, return them
     if db_matches:
@@ -116,15 +262,11 @@ async def ask(payload: ChatAskRequest, db: AsyncSession = Depends(get_db)) -> Ch
                 f"last_presented_question: {payload.last_presented_question.strip()}\n"
                 f"user_message: {(payload.question or '').strip()}"
                 )
-        pc = pinecone_search(query_for_search, namespace=payload.namespace, top_k=payload.top_k)
-        pc_matches = [
-            ChatResumeMatch(
-                file_id=str(m.get("file_id") or ""),
-                resume_name=str(m.get("resume_name") or ""),
+        with span("pinecone_fallback"):
+            pc = await asyncio.to_thread(
+                pinecone_search, query_for_search, namespace=payload.namespace, top_k=_vector_top_k(payload.top_k)
             )
-            for m in pc
-            if m.get("resume_name")
-        ]
+        pc_matches = await _collapse_duplicates(db, pc, payload.top_k)
         return ChatAskResponse(
             parsed_skill=skill,
             parsed_min_years=min_years,
@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_db
 from app.db.models.job import Job
 from app.schemas.ingest import IngestGDriveFolderRequest, IngestResponse
-from app.tasks.ingest import ingest_job
+from app.celery_app import celery_app
 
 router = APIRouter()
 
@@ -19,6 +19,7 @@ async def ingest_gdrive_folder(
     await db.commit()
     await db.refresh(job)
 
-    ingest_job.apply_async(args=[str(job.id), payload.namespace], queue="ingest")
+    # By name: importing app.tasks.ingest would load the whole worker (Drive, extraction, models)
+    celery_app.send_task("app.tasks.ingest.ingest_job", args=[str(job.id), payload.namespace], queue="ingest")
 
     return IngestResponse(job_id=str(job.id), status=job.status)
\ No newline at end of file
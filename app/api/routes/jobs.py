@@ -1,20 +1,117 @@
+import json
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
+from app.core.config import settings
+from app.db.models.file import File
 from app.db.models.job import Job
-from app.schemas.job import JobOut
+from app.db.session import AsyncSessionLocal
+from app.schemas.job import JobFileOut, JobFilesPage, JobOut
+from app.services.jobs.events import FINISHED_STATUSES, JobEventSubscription
 
 router = APIRouter()
 
 
-@router.get("/{job_id}", response_model=JobOut)
-async def get_job(job_id: uuid.UUID, db: AsyncSession = Depends(get_db)) -> JobOut:
+async def _load_job(db: AsyncSession, job_id: uuid.UUID) -> Job:
     result = await db.execute(select(Job).where(Job.id == job_id))
     job = result.scalar_one_or_none()
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    return JobOut.model_validate(job)
\ No newline at end of file
+    return job
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job(job_id: uuid.UUID, db: AsyncSession = Depends(get_db)) -> JobOut:
+    return JobOut.model_validate(await _load_job(db, job_id))
+
+
+@router.get("/{job_id}/files", response_model=JobFilesPage)
+async def list_job_files(
+    job_id: uuid.UUID,
+    after: str | None = Query(default=None, description="next_cursor of the previous page"),
+    limit: int = Query(default=50, ge=1, le=500),
+    status: str | None = None,
+    db: AsyncSession = Depends(get_db),
+) -> JobFilesPage:
+    await _load_job(db, job_id)
+
+    # Keyset pagination on (job_id, gdrive_file_id), served by the unique index;
+    # unlike OFFSET, page N costs the same as page 1
+    stmt = (
+        select(File)
+        .where(File.job_id == job_id)
+        .order_by(File.gdrive_file_id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        stmt = stmt.where(File.gdrive_file_id > after)
+    if status is not None:
+        stmt = stmt.where(File.status == status)
+
+    result = await db.execute(stmt)
+    rows = list(result.scalars().all())
+    next_cursor = rows[limit - 1].gdrive_file_id if len(rows) > limit else None
+    return JobFilesPage(
+        items=[JobFileOut.model_validate(r) for r in rows[:limit]],
+        next_cursor=next_cursor,
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _job_snapshot(job_id: uuid.UUID) -> JobOut | None:
+    # Short-lived session per read: a request-scoped one would hold a pooled connection
+    # (idle in transaction) until the stream ends
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Job).where(Job.id == job_id))
+        job = result.scalar_one_or_none()
+        return JobOut.model_validate(job) if job is not None else None
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: uuid.UUID, request: Request) -> StreamingResponse:
+    # Server-sent events: a "job" snapshot first, then "file" / "progress" / "job" updates
+    # published by the workers, until the job finishes or the client disconnects.
+    # No get_db dependency: yield dependencies only exit after the response has streamed.
+    async with AsyncSessionLocal() as db:
+        await _load_job(db, job_id)
+
+    async def stream():
+        # Subscribe before reading the snapshot so no update falls in between
+        async with JobEventSubscription(job_id) as sub:
+            snapshot = await _job_snapshot(job_id)
+            if snapshot is None:
+                return
+            yield _sse("job", snapshot.model_dump(mode="json"))
+            if snapshot.status in FINISHED_STATUSES:
+                return
+
+            while not await request.is_disconnected():
+                event = await sub.next(settings.job_events_heartbeat_s)
+                if event is None:
+                    # Quiet period: also re-check the DB in case a final event was missed
+                    snapshot = await _job_snapshot(job_id)
+                    if snapshot is None:
+                        return
+                    if snapshot.status in FINISHED_STATUSES:
+                        yield _sse("job", snapshot.model_dump(mode="json"))
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield _sse(event.get("type") or "message", event)
+                if event.get("type") == "job" and event.get("status") in FINISHED_STATUSES:
+                    return
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,14 @@
+import asyncio
+
+from fastapi import APIRouter, Response
+
+from app.core import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    # Off the event loop: the queue depth collector does blocking Redis calls
+    body, content_type = await asyncio.to_thread(metrics.render_latest)
+    return Response(content=body, media_type=content_type)
@@ -18,4 +18,21 @@ celery_app.conf.update(
     task_time_limit=3600,
     task_soft_time_limit=3500,
     task_default_queue="ingest",
+    task_routes={
+        "app.tasks.ingest.extract_file": {"queue": settings.ingest_queue_extract},
+        "app.tasks.ingest.profile_file": {"queue": settings.ingest_queue_llm},
+        "app.tasks.ingest.embed_upsert_file": {"queue": settings.ingest_queue_embed},
+        "app.tasks.ingest.enrich_profile": {"queue": settings.ingest_queue_enrich},
+    },
+    # Long, uneven tasks: don't let one worker hoard a queue; override per worker with --prefetch-multiplier
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    # Redis redelivers an unacked message after visibility_timeout (default 3600 s), counted
+    # from delivery. With late acks it must exceed task_time_limit plus the longest wait in
+    # prefetch, or a long ingest_job runs twice concurrently.
+    broker_transport_options={"visibility_timeout": settings.celery_visibility_timeout_s},
 )
+
+
+# Per-process loop, DB pool, Drive service and embedding model (connects Celery signals)
+import app.workers.lifecycle  # noqa: E402,F401
@@ -8,16 +8,115 @@ class Settings(BaseSettings):
     database_url_sync: str | None = None
 
     redis_url: str = "redis://localhost:6379/0"
+    # Redis broker redelivery timeout for unacked (acks_late) tasks; keep well above
+    # task_time_limit (3600 s) plus the worst queue/prefetch wait
+    celery_visibility_timeout_s: int = 43200
 
     pinecone_api_key: str | None = None
     pinecone_index_host: str | None = None
     pinecone_namespace: str = "default"
+    pinecone_pool_threads: int = 4
+    pinecone_connection_pool_maxsize: int = 16
+    # Use the asyncio index for chat queries (requires pinecone[asyncio])
+    pinecone_use_asyncio: bool = False
+    pinecone_upsert_batch_size: int = 100
+    pinecone_upsert_concurrency: int = 4
 
     gdrive_service_account_json_path: str | None = None
+    # Async Drive client, one pooled HTTP session per worker loop. Drive quotas are per user
+    # (the service account), so split the quota between worker threads: a request of a
+    # batch counts like a separate call
+    gdrive_requests_per_minute: float = 1000.0
+    gdrive_max_concurrency: int = 8
+    gdrive_max_retries: int = 5
+    gdrive_timeout_s: float = 60.0
+    # Downloads started ahead of the file being processed (0: download on demand)
+    gdrive_download_ahead: int = 8
     embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # torch | onnx | onnx-int8
+    embedding_backend: str = "torch"
+    embedding_onnx_file_name: str = "onnx/model_qint8_avx512.onnx"
+    embedding_num_threads: int | None = None
+    embedding_warmup: bool = True
+    # Embedding model per process role: eager | lazy | disabled (EMBEDDING_WARMUP=false
+    # turns eager into lazy). Set per worker command, e.g. disabled for extract-only workers
+    embedding_load_api: str = "eager"
+    embedding_load_worker: str = "eager"
+    # Coalesce concurrent embed calls into one forward pass
+    embedding_batching_enabled: bool = True
+    embedding_batch_max_size: int = 64
+    embedding_batch_wait_ms: float = 5.0
+    query_embedding_cache_size: int = 1024
     
+    # Share one computation between identical concurrent /chat/ask requests
+    chat_single_flight_enabled: bool = True
+    chat_single_flight_redis: bool = False
+    chat_single_flight_lock_ttl_s: float = 30.0
+    chat_single_flight_wait_s: float = 20.0
+    # Start the likely search branch while intent classification is running
+    chat_speculative_execution: bool = True
+
+    # Ingest worker: buffered ingested_files writes, flushed every N files or T seconds
+    ingest_db_flush_every: int = 25
+    ingest_db_flush_interval_s: float = 5.0
+    # A task checkpoints and hands the rest of the folder to a new task after this long,
+    # so task_time_limit no longer caps folder size
+    ingest_task_time_budget_s: float = 3000.0
+    # Fan-out: the parent task lists the folder and dispatches per-file batches (chord)
+    ingest_fanout_enabled: bool = False
+    ingest_fanout_batch_size: int = 1
+    ingest_file_max_retries: int = 3
+    # Per-stage pipeline (fan-out mode): each file runs as extract -> LLM profile -> embed/upsert
+    # tasks on separate queues, so CPU and LLM workers can be sized independently
+    ingest_stage_queues_enabled: bool = False
+    ingest_queue_extract: str = "ingest_extract"
+    ingest_queue_llm: str = "ingest_llm"
+    ingest_queue_embed: str = "ingest_embed"
+    # Shadow profiling: files go live with the heuristic profile right away; the Groq profile
+    # is built later by a low-priority task on its own queue, which swaps it in and re-embeds
+    ingest_shadow_profiling: bool = False
+    ingest_queue_enrich: str = "ingest_enrich"
+    # Celery priority for enrichment messages (Redis broker: 0 highest .. 9 lowest)
+    ingest_enrich_priority: int = 9
+    ingest_enrich_max_retries: int = 5
+    # Per worker thread (each keeps its own event loop + engine)
+    worker_db_pool_size: int = 5
+    # Publish per-file status changes / job progress on Redis pub/sub (GET /jobs/{id}/events)
+    job_events_enabled: bool = True
+    job_events_heartbeat_s: float = 15.0
+    # Prometheus (needs prometheus-client): API serves /metrics; workers expose this port when set
+    metrics_enabled: bool = True
+    metrics_worker_port: int | None = None
+    # Request tracing: Server-Timing header on every response; TRACING_EXPORTER=console|file
+    # also writes each traced request as a JSON line
+    tracing_enabled: bool = True
+    tracing_exporter: str = "none"
+    tracing_file: str = "traces.jsonl"
+    # Near-duplicate resumes (MinHash/LSH over the extracted text) are linked to the first
+    # ingested copy and reuse its profile and vector; chat results collapse them
+    dedup_enabled: bool = True
+    dedup_threshold: float = 0.85
+    dedup_num_perm: int = 128
+    dedup_lsh_bands: int = 16
+    dedup_shingle_size: int = 5
+
     groq_api_key: str | None = None
     groq_model: str = "llama-3.3-70b-versatile"
+    # Override the API endpoint (e.g. the stub server used by scripts/bench_*.py)
+    groq_base_url: str | None = None
+    # LLM backends by name (JSON in env), e.g.
+    #   LLM_BACKENDS={"local": {"kind": "llama_cpp", "model_path": "/models/qwen2.5-3b-q4.gguf", "max_concurrency": 1},
+    #                 "vllm": {"kind": "openai", "base_url": "http://vllm:8000/v1", "model": "...", "rpm": 600}}
+    # kind: groq | openai | llama_cpp. A "groq" backend built from GROQ_* is always defined.
+    # rpm / max_concurrency apply per event loop (API process, worker process or thread).
+    llm_backends: dict[str, dict] = {}
+    # Task -> "backend" or "backend:model"; tasks: profile, intent, query_parse
+    llm_routes: dict[str, str] = {}
+    llm_default_backend: str = "groq"
+    # Resume text sent for profile extraction: boilerplate (page headers/footers, contact
+    # details, references, hobbies) is stripped and sections are ranked to fit the budget
+    llm_prompt_compaction: bool = True
+    llm_prompt_max_chars: int = 12000
     
     model_config = SettingsConfigDict(
         env_file=".env",
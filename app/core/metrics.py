@@ -0,0 +1,199 @@
+import os
+import time
+import traceback
+from contextlib import contextmanager
+
+import prometheus_client
+
+from app.core.config import settings
+
+# Prometheus metrics for the API and the Celery workers. With METRICS_ENABLED=false
+# everything here is a no-op, but per-file stage timings are still collected and stored
+# on the ingested_files row.
+#
+# Prefork workers / multi-process uvicorn: set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory so every process writes its samples there and one endpoint aggregates them.
+
+STAGES = ("listing", "download", "extract", "llm", "embed", "upsert", "db")
+
+_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir"))
+
+
+def enabled() -> bool:
+    return settings.metrics_enabled
+
+
+INGEST_STAGE_SECONDS = prometheus_client.Histogram(
+    "ingest_stage_seconds",
+    "Time spent per ingest stage (extract is labelled with the method that produced the text)",
+    ["stage", "method"],
+    buckets=_BUCKETS,
+)
+INGEST_FILES = prometheus_client.Counter(
+    "ingest_files",
+    "Files that reached a final status",
+    ["status"],
+)
+INGEST_IN_FLIGHT = prometheus_client.Gauge(
+    "ingest_in_flight",
+    "Files currently inside an ingest stage",
+    ["stage"],
+    multiprocess_mode="livesum",
+)
+LLM_PROMPT_TOKENS = prometheus_client.Counter(
+    "llm_prompt_tokens",
+    "Estimated resume-text tokens per LLM task: sent, and saved by prompt compaction",
+    ["task", "kind"],
+)
+HTTP_REQUEST_SECONDS = prometheus_client.Histogram(
+    "http_request_seconds",
+    "API request latency",
+    ["method", "route", "status"],
+    buckets=_BUCKETS,
+)
+
+
+def observe_stage(stage: str, seconds: float, method: str = "") -> None:
+    if enabled():
+        INGEST_STAGE_SECONDS.labels(stage=stage, method=method).observe(seconds)
+
+
+def count_files(status: str, n: int = 1) -> None:
+    if enabled() and n > 0:
+        INGEST_FILES.labels(status=status).inc(n)
+
+
+def count_prompt_tokens(task: str, sent: int, saved: int) -> None:
+    if enabled():
+        LLM_PROMPT_TOKENS.labels(task=task, kind="sent").inc(sent)
+        LLM_PROMPT_TOKENS.labels(task=task, kind="saved").inc(saved)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    if enabled():
+        HTTP_REQUEST_SECONDS.labels(method=method, route=route, status=str(status)).observe(seconds)
+
+
+@contextmanager
+def track_stage(stage: str, method: str = ""):
+    # Histogram + in-flight gauge around one stage; yields nothing, use StageTimings to keep values
+    on = enabled()
+    if on:
+        INGEST_IN_FLIGHT.labels(stage=stage).inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if on:
+            INGEST_IN_FLIGHT.labels(stage=stage).dec()
+            INGEST_STAGE_SECONDS.labels(stage=stage, method=method).observe(elapsed)
+
+
+class StageTimings:
+    # Per-file stage durations (seconds), persisted in ingested_files.timings
+    def __init__(self) -> None:
+        self.values: dict[str, float | str] = {}
+
+    @contextmanager
+    def stage(self, stage: str, method: str = ""):
+        start = time.perf_counter()
+        try:
+            with track_stage(stage, method):
+                yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.add(stage, elapsed)
+            if method:
+                self.add(f"{stage}_{method}", elapsed)
+
+    def add(self, key: str, seconds: float) -> None:
+        prev = self.values.get(key)
+        self.values[key] = round((prev if isinstance(prev, float) else 0.0) + seconds, 4)
+
+    def set_method(self, method: str) -> None:
+        self.values["extract_method"] = method
+
+    def set_count(self, key: str, n: int) -> None:
+        # Counts rather than seconds (prompt_tokens, prompt_tokens_saved)
+        self.values[key] = n
+
+    def as_dict(self) -> dict[str, float | str] | None:
+        return dict(self.values) if self.values else None
+
+
+class _QueueDepthCollector:
+    # Broker (Redis) list length per Celery queue, read at scrape time
+    def __init__(self, queues: list[str]) -> None:
+        self.queues = queues
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily
+        from redis import Redis
+
+        family = GaugeMetricFamily("celery_queue_depth", "Messages waiting in a Celery queue", labels=["queue"])
+        try:
+            client = Redis.from_url(settings.redis_url, socket_timeout=2)
+            try:
+                for queue in self.queues:
+                    family.add_metric([queue], client.llen(queue))
+            finally:
+                client.close()
+        except Exception:
+            print(traceback.format_exc())
+        yield family
+
+
+def ingest_queues() -> list[str]:
+    return ["ingest", settings.ingest_queue_extract, settings.ingest_queue_llm, settings.ingest_queue_embed]
+
+
+def _registry(with_queue_depth: bool):
+    if _multiprocess():
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+
+    if with_queue_depth:
+        registry.register(_QueueDepthCollector(ingest_queues()))
+    return registry
+
+
+_api_registry = None
+
+
+def render_latest() -> tuple[bytes, str]:
+    # Body and content type for the API's /metrics endpoint
+    global _api_registry
+    if not enabled():
+        return b"", "text/plain; charset=utf-8"
+    if _api_registry is None:
+        _api_registry = _registry(with_queue_depth=True)
+    return prometheus_client.generate_latest(_api_registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def start_worker_server() -> None:
+    # Exporter for a Celery worker node (main process; children aggregate via PROMETHEUS_MULTIPROC_DIR)
+    if not (enabled() and settings.metrics_worker_port):
+        return
+    try:
+        prometheus_client.start_http_server(
+            settings.metrics_worker_port,
+            registry=_registry(with_queue_depth=False),
+        )
+    except OSError:
+        print(traceback.format_exc())
+
+
+def mark_process_dead(pid: int) -> None:
+    if enabled() and _multiprocess():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
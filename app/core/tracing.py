@@ -0,0 +1,129 @@
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from app.core.config import settings
+
+# Lightweight request tracing: a Trace per HTTP request held in a ContextVar, with spans
+# recorded by `with span("name"):` anywhere below it (asyncio tasks and to_thread calls
+# copy the context, so speculative branches land in the same trace). Finished traces
+# become a Server-Timing header and, optionally, JSON lines on stdout or in a file
+# (TRACING_EXPORTER=console|file), one object per trace in an OTel-like shape.
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: float = 0.0
+    attributes: dict = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    name: str
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    start: float = field(default_factory=time.perf_counter)
+    duration: float = 0.0
+    spans: list[Span] = field(default_factory=list)
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.start
+
+    def breakdown(self) -> dict[str, float]:
+        # Milliseconds per span name (repeated spans are summed), plus the total so far
+        out: dict[str, float] = {}
+        for s in self.spans:
+            out[s.name] = out.get(s.name, 0.0) + s.duration * 1000
+        out = {k: round(v, 2) for k, v in out.items()}
+        out["total"] = round((self.duration or time.perf_counter() - self.start) * 1000, 2)
+        return out
+
+    def counters(self) -> dict[str, float]:
+        # Numeric span attributes as "<span>.<attr>" (e.g. db_scan.rows), summed over repeats
+        out: dict[str, float] = {}
+        for s in self.spans:
+            for k, v in s.attributes.items():
+                if isinstance(v, (int, float)) and not isinstance(v, bool):
+                    key = f"{s.name}.{k}"
+                    out[key] = out.get(key, 0) + v
+        return out
+
+    def server_timing(self) -> str:
+        parts = []
+        for name, ms in self.breakdown().items():
+            token = re.sub(r"[^A-Za-z0-9_-]", "_", name)
+            parts.append(f"{token};dur={ms}")
+        return ", ".join(parts)
+
+    def to_json(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start_time": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 2),
+            "spans": [
+                {
+                    "name": s.name,
+                    "start_offset_ms": round((s.start - self.start) * 1000, 2),
+                    "duration_ms": round(s.duration * 1000, 2),
+                    "attributes": s.attributes,
+                }
+                for s in self.spans
+            ],
+        }
+
+
+_current: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_export_lock = threading.Lock()
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+@contextmanager
+def trace(name: str):
+    t = Trace(name=name)
+    token = _current.set(t)
+    try:
+        yield t
+    finally:
+        t.finish()
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    # No-op outside a trace (workers, scripts)
+    t = _current.get()
+    if t is None:
+        yield None
+        return
+    s = Span(name=name, start=time.perf_counter(), attributes=attributes)
+    try:
+        yield s
+    finally:
+        s.duration = time.perf_counter() - s.start
+        t.spans.append(s)
+
+
+def export(t: Trace) -> None:
+    exporter = settings.tracing_exporter
+    if exporter not in ("console", "file") or not t.spans:
+        return
+    line = json.dumps(t.to_json(), default=str)
+    with _export_lock:
+        if exporter == "console":
+            print(line, file=sys.stdout, flush=True)
+        else:
+            with open(settings.tracing_file, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
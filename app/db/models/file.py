@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, LargeBinary, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -10,6 +10,10 @@ from app.db.base import Base
 
 class File(Base):
     __tablename__ = "ingested_files"
+    __table_args__ = (
+        UniqueConstraint("job_id", "gdrive_file_id", name="uq_ingested_files_job_id_gdrive_file_id"),
+        Index("ix_ingested_files_lsh_bands", "lsh_bands", postgresql_using="gin"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -25,10 +29,30 @@ class File(Base):
     mime_type: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     status: Mapped[str] = mapped_column(String(32), nullable=False, default="queued")
+    # Checkpoint reached by the ingest worker: extracted | profiled | succeeded
+    stage: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
     num_chunks: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     resume_profile: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # Builder behind the live resume_profile: heuristic | llm (shadow mode upgrades heuristic -> llm)
+    profile_tier: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    # Deferred: only the ingest checkpoint path reads it. Cleared once the row succeeds
+    # (in shadow mode, once enrich_profile has stored the LLM profile)
+    extracted_text: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)
+    # Seconds per ingest stage (download, extract[_<method>], llm, embed, upsert) + extract_method
+    timings: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+    # Near-duplicate detection: MinHash signature of the extracted text and its LSH band keys
+    minhash: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    lsh_bands: Mapped[list[int] | None] = mapped_column(ARRAY(BigInteger), nullable=True, deferred=True)
+    # Set on a near-duplicate: the file whose profile / vector it reuses
+    duplicate_of: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("ingested_files.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
     
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
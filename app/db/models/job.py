@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -16,6 +16,15 @@ class Job(Base):
     folder_url: Mapped[str] = mapped_column(Text, nullable=False)
     status: Mapped[str] = mapped_column(String(32), nullable=False, default="queued")
 
+    # Drive listing taken on the first run; retries / continuations reuse it
+    listing_snapshot: Mapped[list | None] = mapped_column(JSONB, nullable=True)
+
+    # Progress counters, bumped by the ingest worker on every flush of file results
+    total_files: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    succeeded_files: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    failed_files: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    skipped_files: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -1,12 +1,50 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 
 from app.api.routes.health import router as health_router
 from app.api.routes.ingest import router as ingest_router
 from app.api.routes.jobs import router as jobs_router
 from app.api.routes.chat import router as chat_router
-app = FastAPI(title="GDrive → Pinecone Ingest API")
+from app.api.routes.metrics import router as metrics_router
+from app.core import metrics, tracing
+from app.core.config import settings
+from app.services.chat.single_flight import chat_redis_flight
+from app.services.processing.embeddings import init_model_for_role
+from app.services.vectors.pinecone_client import aclose_index
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(init_model_for_role, "api")
+    yield
+    await chat_redis_flight.close()
+    await aclose_index()
+
+
+app = FastAPI(title="GDrive → Pinecone Ingest API", lifespan=lifespan)
 
 app.include_router(health_router, prefix="/health", tags=["health"])
 app.include_router(ingest_router, prefix="/ingest", tags=["ingest"])
 app.include_router(jobs_router, prefix="/jobs", tags=["jobs"])
-app.include_router(chat_router, prefix="/chat", tags=["chat"])
\ No newline at end of file
+app.include_router(chat_router, prefix="/chat", tags=["chat"])
+app.include_router(metrics_router, tags=["metrics"])
+
+
+@app.middleware("http")
+async def observe_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    if not settings.tracing_enabled:
+        response = await call_next(request)
+    else:
+        with tracing.trace(f"{request.method} {request.url.path}") as t:
+            response = await call_next(request)
+        if t.spans:
+            response.headers["Server-Timing"] = t.server_timing()
+            tracing.export(t)
+    # Route template, not the raw path, so job ids don't explode the label set
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.observe_request(request.method, route, response.status_code, time.perf_counter() - start)
+    return response
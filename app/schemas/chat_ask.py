@@ -9,6 +9,8 @@ class ChatAskRequest(BaseModel):
     namespace: str = "default-384"
     top_k: int = 5
     use_pinecone_fallback: bool = False
+    # Return the per-stage latency breakdown (ms) in the response
+    debug: bool = False
 
 
 class ChatResumeMatch(BaseModel):
@@ -20,6 +22,8 @@ class ChatAskResponse(BaseModel):
     parsed_skill: str | None = None
     parsed_min_years: float | None = None
     matches: list[ChatResumeMatch]
+    # debug=true: ms per stage plus counters such as db_scan.rows
+    timings: dict[str, float] | None = None
 
 class JdSearchRequest(BaseModel):
     jd_text: str = Field(..., min_length = 1) 
@@ -1,5 +1,5 @@
-from datetime import datetime
-from pydantic import BaseModel, ConfigDict
+from datetime import datetime, timezone
+from pydantic import BaseModel, ConfigDict, computed_field
 import uuid
 
 class JobOut(BaseModel):
@@ -13,4 +13,54 @@ class JobOut(BaseModel):
     started_at: datetime | None = None
     finished_at: datetime | None = None
 
-    error: str | None = None
\ No newline at end of file
+    error: str | None = None
+
+    total_files: int | None = None
+    succeeded_files: int = 0
+    failed_files: int = 0
+    skipped_files: int = 0
+
+    @computed_field
+    @property
+    def processed_files(self) -> int:
+        return self.succeeded_files + self.failed_files + self.skipped_files
+
+    @computed_field
+    @property
+    def files_per_minute(self) -> float | None:
+        if self.started_at is None:
+            return None
+        end = self.finished_at or datetime.now(timezone.utc)
+        started = self.started_at
+        if started.tzinfo is None:
+            started = started.replace(tzinfo=timezone.utc)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        elapsed = (end - started).total_seconds()
+        if elapsed <= 0:
+            return None
+        return round(self.processed_files * 60.0 / elapsed, 2)
+
+
+class JobFileOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    gdrive_file_id: str
+    name: str
+    mime_type: str | None = None
+    status: str
+    stage: str | None = None
+    error: str | None = None
+    timings: dict | None = None
+    # heuristic | llm: which builder produced the live profile
+    profile_tier: str | None = None
+    # Near-duplicate of this file (it reuses that file's profile and vector)
+    duplicate_of: uuid.UUID | None = None
+    created_at: datetime
+
+
+class JobFilesPage(BaseModel):
+    items: list[JobFileOut]
+    # Pass as ?after= to get the next page; None on the last page
+    next_cursor: str | None = None
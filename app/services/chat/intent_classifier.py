@@ -3,7 +3,7 @@ from __future__ import annotations
 from pydantic import BaseModel
 
 from app.services.chat.instructions import RESUME_INTENT_CLASSIFICATION
-from app.services.llm.groq_llm import groq_chat_json
+from app.services.llm.router import chat_json
 
 
 class IntentResult(BaseModel):
@@ -23,7 +23,7 @@ async def classify_resume_intent(user_message: str, last_presented_question: str
         {"role": "user", "content": (user_message or "").strip()},
     ]
 
-    data = await groq_chat_json(messages=messages, temperature=0.0, max_tokens=200)
+    data = await chat_json("intent", messages=messages, temperature=0.0, max_tokens=200)
 
     if not isinstance(data, dict):
         data = {}
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any
 
-from app.services.processing.embeddings import embed_texts
-from app.services.vectors.pinecone_client import get_index
+from app.core.config import settings
+from app.services.processing.query_embeddings import embed_query
+from app.services.vectors.pinecone_client import get_async_index, get_index
 
 
 def pinecone_search(question: str, namespace: str, top_k: int) -> list[dict[str, Any]]:
     index = get_index()
-    qvec = embed_texts([question])[0]
+    qvec = embed_query(question)
 
     res = index.query(
         vector=qvec,
@@ -31,15 +33,7 @@ def pinecone_search(question: str, namespace: str, top_k: int) -> list[dict[str,
 
     return matches
 
-def pinecone_vector_search(vector: list[float], namespace: str, top_k: int) -> list[dict[str, Any]]:
-    index = get_index()
-    res = index.query(
-        vector=vector,
-        top_k=top_k,
-        include_metadata=True,
-        namespace=namespace,
-    )
-
+def _vector_matches(res: Any) -> list[dict[str, Any]]:
     matches = []
     for m in (res.get("matches") or []):
         md = m.get("metadata") or {}
@@ -54,3 +48,26 @@ def pinecone_vector_search(vector: list[float], namespace: str, top_k: int) -> l
     return matches
 
 
+def pinecone_vector_search(vector: list[float], namespace: str, top_k: int) -> list[dict[str, Any]]:
+    index = get_index()
+    res = index.query(
+        vector=vector,
+        top_k=top_k,
+        include_metadata=True,
+        namespace=namespace,
+    )
+    return _vector_matches(res)
+
+
+async def apinecone_vector_search(vector: list[float], namespace: str, top_k: int) -> list[dict[str, Any]]:
+    if not settings.pinecone_use_asyncio:
+        return await asyncio.to_thread(pinecone_vector_search, vector, namespace, top_k)
+
+    index = get_async_index()
+    res = await index.query(
+        vector=vector,
+        top_k=top_k,
+        include_metadata=True,
+        namespace=namespace,
+    )
+    return _vector_matches(res)
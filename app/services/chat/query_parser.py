@@ -1,8 +1,7 @@
 from __future__ import annotations
 
 import re
-from app.core.config import settings
-from app.services.llm.groq_llm import groq_chat_json
+from app.services.llm.router import chat_json, llm_available
 
 # Keep this aligned with profile_builder _KNOWN_SKILLS for now
 KNOWN_SKILLS = [
@@ -53,7 +52,7 @@ async def parse_skill_and_years_llm(question: str) -> tuple[str | None, float |
         {"role": "user", "content": question or ""},
     ]
 
-    data = await groq_chat_json(messages=messages, temperature=0.0, max_tokens=120)
+    data = await chat_json("query_parse", messages=messages, temperature=0.0, max_tokens=120)
 
     skill = data.get("skill")
     if isinstance(skill, str):
@@ -73,8 +72,8 @@ async def parse_skill_and_years_llm(question: str) -> tuple[str | None, float |
 
 
 async def parse_skill_and_years_smart(question: str) -> tuple[str | None, float | None]:
-    # If Groq not configured, use existing heuristic parser
-    if not settings.groq_api_key:
+    # If no LLM backend is configured for this task, use existing heuristic parser
+    if not llm_available("query_parse"):
         return parse_skill_and_years(question)
 
     try:
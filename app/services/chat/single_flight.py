@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import time
+import traceback
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def normalize_text(text: str | None) -> str:
+    # For free-text key parts only: questions differing in case / spacing share a result
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+def make_key(*parts: Any) -> str:
+    # Parts are used verbatim (namespaces are case-sensitive); pass questions through
+    # normalize_text first
+    return hashlib.sha1("\x1f".join("" if p is None else str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    # Concurrent callers with the same key share one in-flight computation (per process)
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(fn())
+            self._inflight[key] = fut
+
+            def _forget(done: asyncio.Future, key: str = key) -> None:
+                if self._inflight.get(key) is done:
+                    self._inflight.pop(key, None)
+
+            fut.add_done_callback(_forget)
+
+        # shield: one caller disconnecting must not cancel the others' result
+        return await asyncio.shield(fut)
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+class RedisSingleFlight:
+    # Cross-worker variant: one worker holds a Redis lock and publishes the result,
+    # the others poll for it and fall back to computing locally if it never shows up.
+    def __init__(
+        self,
+        redis_url: str,
+        lock_ttl_s: float = 30.0,
+        wait_s: float = 20.0,
+        result_ttl_s: float = 5.0,
+        poll_s: float = 0.05,
+        prefix: str = "singleflight",
+    ) -> None:
+        self.redis_url = redis_url
+        self.lock_ttl_ms = int(lock_ttl_s * 1000)
+        self.wait_s = wait_s
+        self.result_ttl_ms = int(result_ttl_s * 1000)
+        self.poll_s = poll_s
+        self.prefix = prefix
+        self._client = None
+
+    def _redis(self):
+        if self._client is None:
+            from redis.asyncio import Redis
+
+            self._client = Redis.from_url(self.redis_url)
+        return self._client
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        dumps: Callable[[T], str],
+        loads: Callable[[str | bytes], T],
+    ) -> T:
+        lock_key = f"{self.prefix}:lock:{key}"
+        result_key = f"{self.prefix}:result:{key}"
+        token = uuid.uuid4().hex
+
+        try:
+            r = self._redis()
+            acquired = await r.set(lock_key, token, nx=True, px=self.lock_ttl_ms)
+        except Exception:
+            print(traceback.format_exc())
+            return await fn()
+
+        if acquired:
+            try:
+                value = await fn()
+                try:
+                    await r.set(result_key, dumps(value), px=self.result_ttl_ms)
+                except Exception:
+                    print(traceback.format_exc())
+                return value
+            finally:
+                try:
+                    await r.eval(_RELEASE_LOCK, 1, lock_key, token)
+                except Exception:
+                    pass
+
+        deadline = time.monotonic() + self.wait_s
+        try:
+            while time.monotonic() < deadline:
+                raw = await r.get(result_key)
+                if raw is not None:
+                    return loads(raw)
+                if not await r.exists(lock_key):
+                    # Leader finished without publishing (error) or lock expired
+                    raw = await r.get(result_key)
+                    if raw is not None:
+                        return loads(raw)
+                    break
+                await asyncio.sleep(self.poll_s)
+        except Exception:
+            print(traceback.format_exc())
+
+        return await fn()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+chat_flight = SingleFlight()
+chat_redis_flight = RedisSingleFlight(
+    settings.redis_url,
+    lock_ttl_s=settings.chat_single_flight_lock_ttl_s,
+    wait_s=settings.chat_single_flight_wait_s,
+    prefix="chat:singleflight",
+)
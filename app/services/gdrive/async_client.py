@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import re
+import uuid
+import weakref
+from typing import TYPE_CHECKING, Any
+from urllib.parse import quote, urlencode
+
+from app.core.config import settings
+from app.services.gdrive.client import _get_credentials, get_access_token
+from app.services.llm.rate_limit import AsyncRateLimiter
+
+if TYPE_CHECKING:
+    import httpx
+
+# Drive v3 over plain REST on one pooled httpx session per event loop, so listing, shortcut
+# resolution and downloads no longer block the worker loop. Metadata lookups go out as
+# batch requests (up to 100 per HTTP call) and every call passes the quota limiter.
+
+DRIVE_API = "https://www.googleapis.com/drive/v3"
+BATCH_URL = "https://www.googleapis.com/batch/drive/v3"
+# Drive rejects batches of more than 100 requests
+BATCH_MAX = 100
+LIST_FIELDS = "nextPageToken, files(id,name,mimeType,size,modifiedTime,shortcutDetails(targetId,targetMimeType))"
+FILE_FIELDS = "id,name,mimeType,size,modifiedTime"
+
+# 403 reasons that mean "slow down" rather than "forbidden"
+_RATE_LIMIT_REASONS = frozenset({"rateLimitExceeded", "userRateLimitExceeded"})
+_BOUNDARY_RE = re.compile(r'boundary="?([^";]+)"?', re.I)
+_CONTENT_ID_RE = re.compile(r"^content-id:\s*<response-item(\d+)>", re.I | re.M)
+
+# asyncio primitives belong to one loop; workers run a loop per thread
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncDriveClient]" = weakref.WeakKeyDictionary()
+
+
+class DriveApiError(RuntimeError):
+    def __init__(self, status: int, reason: str = "", message: str = "", retry_after: float | None = None) -> None:
+        super().__init__(f"Drive API HTTP {status}{f' ({reason})' if reason else ''}: {message}".rstrip(": "))
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.status == 429 or (self.status == 403 and self.reason in _RATE_LIMIT_REASONS)
+
+    @property
+    def retryable(self) -> bool:
+        return self.rate_limited or self.status >= 500
+
+
+def _api_error(status: int, headers: Any, body: bytes | str) -> DriveApiError:
+    reason = message = ""
+    try:
+        error = json.loads(body or "{}").get("error") or {}
+        message = error.get("message") or ""
+        reason = ((error.get("errors") or [{}])[0]).get("reason") or ""
+    except (ValueError, AttributeError):
+        message = (body.decode("utf-8", errors="ignore") if isinstance(body, bytes) else body)[:200]
+    retry_after = None
+    try:
+        retry_after = float(headers.get("retry-after") or 0) or None
+    except ValueError:
+        pass
+    return DriveApiError(status, reason, message, retry_after)
+
+
+def _backoff(attempt: int, error: DriveApiError) -> float:
+    # Retry-After when given, else exponential with jitter (Drive's documented policy)
+    return error.retry_after or min(32.0, 2.0**attempt) + random.random()
+
+
+def _batch_body(file_ids: list[str], fields: str, boundary: str) -> bytes:
+    query = urlencode({"fields": fields})
+    parts = [
+        f"--{boundary}\r\n"
+        "Content-Type: application/http\r\n"
+        f"Content-ID: <item{n}>\r\n"
+        "\r\n"
+        f"GET /drive/v3/files/{quote(file_id, safe='')}?{query}\r\n"
+        "\r\n"
+        for n, file_id in enumerate(file_ids)
+    ]
+    return ("".join(parts) + f"--{boundary}--\r\n").encode("utf-8")
+
+
+def parse_batch_response(content_type: str, body: str) -> dict[int, tuple[int, dict[str, str], str]]:
+    # Part index (from Content-ID "<response-itemN>") -> (status, headers, body)
+    match = _BOUNDARY_RE.search(content_type or "")
+    if not match:
+        raise DriveApiError(502, message="batch response without a multipart boundary")
+
+    results: dict[int, tuple[int, dict[str, str], str]] = {}
+    for part in body.replace("\r\n", "\n").split(f"--{match.group(1)}"):
+        part = part.strip("\n")
+        if not part or part == "--":
+            continue
+        # Part headers, then the embedded HTTP response: status line, headers, body
+        part_head, _, http = part.partition("\n\n")
+        content_id = _CONTENT_ID_RE.search(part_head)
+        if content_id is None:
+            continue
+        status_line, _, rest = http.partition("\n")
+        head, _, payload = rest.partition("\n\n")
+        headers = {}
+        for line in head.split("\n"):
+            key, sep, value = line.partition(":")
+            if sep:
+                headers[key.strip().lower()] = value.strip()
+        results[int(content_id.group(1))] = (int(status_line.split()[1]), headers, payload.strip())
+    return results
+
+
+class AsyncDriveClient:
+    # One per event loop (get_async_drive_client); shares the process-wide credentials
+    def __init__(self, http: httpx.AsyncClient, limiter: AsyncRateLimiter) -> None:
+        self.http = http
+        self.limiter = limiter
+
+    async def _headers(self) -> dict[str, str]:
+        creds = _get_credentials()
+        token = creds.token if creds.valid else await asyncio.to_thread(get_access_token)
+        return {"Authorization": f"Bearer {token}"}
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any] | None = None,
+        content: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        cost: int = 1,
+    ) -> httpx.Response:
+        for attempt in range(settings.gdrive_max_retries + 1):
+            async with self.limiter.slot(cost):
+                resp = await self.http.request(
+                    method,
+                    url,
+                    params=params,
+                    content=content,
+                    headers={**await self._headers(), **(headers or {})},
+                )
+            if resp.status_code < 400:
+                return resp
+
+            error = _api_error(resp.status_code, resp.headers, resp.content)
+            if not error.retryable or attempt == settings.gdrive_max_retries:
+                raise error
+            delay = _backoff(attempt, error)
+            if error.rate_limited:
+                # The quota is per user: hold back every caller on this loop, not just this one
+                self.limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def list_folder(self, folder_id: str) -> list[dict]:
+        all_files: list[dict] = []
+        page_token: str | None = None
+        while True:
+            params = {
+                "q": f"'{folder_id}' in parents and trashed = false",
+                "fields": LIST_FIELDS,
+                "pageSize": 1000,
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            data = (await self._request("GET", f"{DRIVE_API}/files", params=params)).json()
+            all_files.extend(data.get("files", []))
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                return all_files
+
+    async def get_files(self, file_ids: list[str], fields: str = FILE_FIELDS) -> dict[str, dict | DriveApiError]:
+        # Metadata for many files, BATCH_MAX per HTTP call; a missing / forbidden file maps
+        # to its error instead of failing the others. Rate-limited items are retried.
+        results: dict[str, dict | DriveApiError] = {}
+        pending = list(dict.fromkeys(file_ids))
+        for attempt in range(settings.gdrive_max_retries + 1):
+            retry: list[str] = []
+            delay = 0.0
+            for start in range(0, len(pending), BATCH_MAX):
+                chunk = pending[start : start + BATCH_MAX]
+                boundary = f"batch_{uuid.uuid4().hex}"
+                resp = await self._request(
+                    "POST",
+                    BATCH_URL,
+                    content=_batch_body(chunk, fields, boundary),
+                    headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+                    cost=len(chunk),
+                )
+                parts = parse_batch_response(resp.headers.get("content-type", ""), resp.text)
+                for n, file_id in enumerate(chunk):
+                    status, headers, body = parts.get(n, (502, {}, ""))
+                    if status < 400:
+                        results[file_id] = json.loads(body)
+                        continue
+                    error = _api_error(status, headers, body)
+                    results[file_id] = error
+                    if error.retryable and attempt < settings.gdrive_max_retries:
+                        retry.append(file_id)
+                        delay = max(delay, _backoff(attempt, error))
+            if not retry:
+                break
+            self.limiter.pause(delay)
+            pending = retry
+        return results
+
+    async def download(self, file_id: str) -> bytes:
+        resp = await self._request("GET", f"{DRIVE_API}/files/{quote(file_id, safe='')}", params={"alt": "media"})
+        return resp.content
+
+    async def export(self, file_id: str, mime_type: str = "text/plain") -> bytes:
+        resp = await self._request(
+            "GET", f"{DRIVE_API}/files/{quote(file_id, safe='')}/export", params={"mimeType": mime_type}
+        )
+        return resp.content
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+
+def get_async_drive_client() -> AsyncDriveClient:
+    if not settings.gdrive_service_account_json_path:
+        raise ValueError("GDRIVE_SERVICE_ACCOUNT_JSON_PATH is not set")
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        import httpx
+
+        concurrency = settings.gdrive_max_concurrency
+        http = httpx.AsyncClient(
+            timeout=settings.gdrive_timeout_s,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            follow_redirects=True,
+        )
+        limiter = AsyncRateLimiter(
+            rate=settings.gdrive_requests_per_minute,
+            per=60.0,
+            burst=concurrency,
+            max_concurrency=concurrency,
+        )
+        client = _clients[loop] = AsyncDriveClient(http, limiter)
+    return client
+
+
+async def close_async_drive_client() -> None:
+    # Closes the current loop's client (worker shutdown)
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
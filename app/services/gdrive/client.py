@@ -1,17 +1,73 @@
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from google.oauth2.service_account import Credentials
+
 SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
 
+# Credentials and the Drive discovery document are shared per process; the service
+# (httplib2 is not thread-safe) per thread. The async client (async_client.py) only needs
+# the access token.
+_creds: Credentials | None = None
+_creds_lock = threading.Lock()
+_token_lock = threading.Lock()
+_discovery_doc: str | None = None
+_local = threading.local()
+
+
+def _get_credentials() -> Credentials:
+    global _creds
+    if _creds is None:
+        with _creds_lock:
+            if _creds is None:
+                if not settings.gdrive_service_account_json_path:
+                    raise ValueError("GDRIVE_SERVICE_ACCOUNT_JSON_PATH is not set")
+
+                from google.oauth2.service_account import Credentials
+
+                _creds = Credentials.from_service_account_file(
+                    settings.gdrive_service_account_json_path,
+                    scopes=SCOPES,
+                )
+    return _creds
+
+
+def get_access_token() -> str:
+    # Blocking (token endpoint round trip when expired); one refresh for all threads
+    creds = _get_credentials()
+    if not creds.valid:
+        with _token_lock:
+            if not creds.valid:
+                from google.auth.transport.requests import Request
+
+                creds.refresh(Request())
+    return creds.token
+
+
+def _get_discovery_doc() -> str:
+    global _discovery_doc
+    if _discovery_doc is None:
+        with _creds_lock:
+            if _discovery_doc is None:
+                from googleapiclient.discovery_cache import get_static_doc
+
+                _discovery_doc = get_static_doc("drive", "v3")
+    return _discovery_doc
+
 
 def get_drive_service():
     if not settings.gdrive_service_account_json_path:
         raise ValueError("GDRIVE_SERVICE_ACCOUNT_JSON_PATH is not set")
 
-    creds = Credentials.from_service_account_file(
-        settings.gdrive_service_account_json_path,
-        scopes=SCOPES,
-    )
-    return build("drive", "v3", credentials=creds, cache_discovery=False)
\ No newline at end of file
+    service = getattr(_local, "service", None)
+    if service is None:
+        from googleapiclient.discovery import build_from_document
+
+        service = build_from_document(_get_discovery_doc(), credentials=_get_credentials())
+        _local.service = service
+    return service
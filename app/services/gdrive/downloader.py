@@ -1,10 +1,10 @@
 from io import BytesIO
 from typing import Any
 
-from googleapiclient.http import MediaIoBaseDownload
-
 
 def download_file_bytes(service: Any, file_id: str) -> bytes:
+    from googleapiclient.http import MediaIoBaseDownload
+
     request = service.files().get_media(fileId=file_id)
     fh = BytesIO()
     downloader = MediaIoBaseDownload(fh, request)
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+import traceback
+import uuid
+
+from app.core.config import settings
+
+# Job progress events on Redis pub/sub, one channel per job. Workers publish after each
+# flush of file results; GET /jobs/{id}/events relays them to the client as SSE.
+
+# vectors_pending: a bulk import run with --skip-vectors (re-run it to upsert the vectors)
+FINISHED_STATUSES = ("succeeded", "failed", "vectors_pending")
+
+_client = None
+_lock = threading.Lock()
+
+
+def job_channel(job_id: uuid.UUID | str) -> str:
+    return f"jobs:{job_id}:events"
+
+
+def _redis():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from redis import Redis
+
+                _client = Redis.from_url(settings.redis_url)
+    return _client
+
+
+def publish_job_events(job_id: uuid.UUID | str, events: list[dict]) -> None:
+    # Best-effort: progress streaming must never fail an ingest flush
+    if not (settings.job_events_enabled and events):
+        return
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        channel = job_channel(job_id)
+        for event in events:
+            pipe.publish(channel, json.dumps(event, default=str))
+        pipe.execute()
+    except Exception:
+        print(traceback.format_exc())
+
+
+def progress_event(
+    job_id: uuid.UUID | str,
+    total_files: int | None,
+    succeeded_files: int,
+    failed_files: int,
+    skipped_files: int,
+) -> dict:
+    return {
+        "type": "progress",
+        "job_id": str(job_id),
+        "total_files": total_files,
+        "processed_files": succeeded_files + failed_files + skipped_files,
+        "succeeded_files": succeeded_files,
+        "failed_files": failed_files,
+        "skipped_files": skipped_files,
+    }
+
+
+def job_event(job_id: uuid.UUID | str, status: str, error: str | None = None) -> dict:
+    return {"type": "job", "job_id": str(job_id), "status": status, "error": error}
+
+
+class JobEventSubscription:
+    # async with JobEventSubscription(job_id) as sub: event = await sub.next(timeout_s)
+    def __init__(self, job_id: uuid.UUID | str) -> None:
+        self.channel = job_channel(job_id)
+        self._client = None
+        self._pubsub = None
+
+    async def __aenter__(self) -> "JobEventSubscription":
+        from redis.asyncio import Redis
+
+        self._client = Redis.from_url(settings.redis_url)
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        try:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.aclose()
+        finally:
+            await self._client.aclose()
+
+    async def next(self, timeout_s: float) -> dict | None:
+        # Next decoded event, or None if none arrived within timeout_s
+        deadline = time.monotonic() + timeout_s
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            msg = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            if msg is None or msg.get("type") != "message":
+                continue
+            try:
+                return json.loads(msg["data"])
+            except ValueError:
+                continue
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class RateLimited(Exception):
+    # A backend's HTTP 429 (or equivalent), normalized so callers don't import provider SDKs
+    def __init__(self, message: str = "LLM backend rate limited", retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMBackend(ABC):
+    # One configured endpoint/runtime. Implementations are shared by every task routed to them
+    # and must be safe to call from several threads (workers run one event loop per thread).
+    kind = ""
+
+    def __init__(self, name: str, config: dict[str, Any]) -> None:
+        self.name = name
+        self.config = config
+        self.default_model: str | None = config.get("model")
+        # Ask the runtime for a JSON object when the caller wants one (not every server supports it)
+        self.json_mode: bool = bool(config.get("json_mode", False))
+
+    def configured(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def complete(
+        self,
+        *,
+        messages: list[dict[str, str]],
+        model: str | None,
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool = False,
+    ) -> str:
+        raise NotImplementedError
+
+
+def extract_first_json_object(text: str) -> dict[str, Any]:
+    if not text:
+        raise ValueError("Empty LLM response")
+
+    # Try direct JSON first
+    try:
+        obj = json.loads(text)
+        if isinstance(obj, dict):
+            return obj
+    except Exception:
+        pass
+
+    # Fallback: find first {...} block
+    m = re.search(r"\{.*\}", text, flags=re.DOTALL)
+    if not m:
+        raise ValueError("No JSON object found in LLM response")
+
+    obj = json.loads(m.group(0))
+    if not isinstance(obj, dict):
+        raise ValueError("LLM JSON was not an object")
+
+    return obj
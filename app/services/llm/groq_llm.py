@@ -1,81 +1,82 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import re
+import threading
 from typing import Any
 
-from groq import Groq
+from groq import Groq, RateLimitError
 
 from app.core.config import settings
-
-
-def _extract_first_json_object(text: str) -> dict[str, Any]:
-    if not text:
-        raise ValueError("Empty LLM response")
-
-    # Try direct JSON first
-    try:
-        obj = json.loads(text)
-        if isinstance(obj, dict):
-            return obj
-    except Exception:
-        pass
-
-    # Fallback: find first {...} block
-    m = re.search(r"\{.*\}", text, flags=re.DOTALL)
-    if not m:
-        raise ValueError("No JSON object found in LLM response")
-
-    obj = json.loads(m.group(0))
-    if not isinstance(obj, dict):
-        raise ValueError("LLM JSON was not an object")
-
-    return obj
-
-
-def _sync_chat_completion(*, messages: list[dict[str, str]], model: str, temperature: float, max_tokens: int) -> str:
-    if not settings.groq_api_key:
-        raise ValueError("GROQ_API_KEY is not configured")
-
-    client = Groq(api_key=settings.groq_api_key)
-    resp = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
-    return (resp.choices[0].message.content or "").strip()
-
-
-async def groq_chat_completion(
-    *,
-    messages: list[dict[str, str]],
-    model: str | None = None,
-    temperature: float = 0.0,
-    max_tokens: int = 512,
-) -> str:
-    chosen_model = model or settings.groq_model
-    return await asyncio.to_thread(
-        _sync_chat_completion,
-        messages=messages,
-        model=chosen_model,
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
-
-
-async def groq_chat_json(
-    *,
-    messages: list[dict[str, str]],
-    model: str | None = None,
-    temperature: float = 0.0,
-    max_tokens: int = 512,
-) -> dict[str, Any]:
-    text = await groq_chat_completion(
-        messages=messages,
-        model=model,
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
-    return _extract_first_json_object(text)
\ No newline at end of file
+from app.services.llm.base import LLMBackend, RateLimited
+
+
+class GroqBackend(LLMBackend):
+    # Groq's hosted API. Config falls back to GROQ_API_KEY / GROQ_MODEL / GROQ_BASE_URL.
+    kind = "groq"
+
+    def __init__(self, name: str, config: dict[str, Any]) -> None:
+        super().__init__(name, config)
+        self.default_model = self.default_model or settings.groq_model
+        self._client: Groq | None = None
+        self._lock = threading.Lock()
+
+    def _api_key(self) -> str | None:
+        return self.config.get("api_key") or settings.groq_api_key
+
+    def configured(self) -> bool:
+        return bool(self._api_key())
+
+    def _get_client(self) -> Groq:
+        # One client per process: its HTTP connection pool is reused across calls
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    # SDK retries (429 / 5xx / connection errors) unless the backend config sets
+                    # max_retries, e.g. 0 for a caller that must see every 429 (batch profiler)
+                    extra = {"max_retries": int(self.config["max_retries"])} if "max_retries" in self.config else {}
+                    self._client = Groq(
+                        api_key=self._api_key(),
+                        base_url=self.config.get("base_url") or settings.groq_base_url,
+                        **extra,
+                    )
+        return self._client
+
+    def _sync_complete(self, *, messages, model, temperature, max_tokens, json_mode) -> str:
+        if not self.configured():
+            raise ValueError("GROQ_API_KEY is not configured")
+
+        extra = {"response_format": {"type": "json_object"}} if json_mode and self.json_mode else {}
+        try:
+            resp = self._get_client().chat.completions.create(
+                model=model or self.default_model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra,
+            )
+        except RateLimitError as e:
+            retry_after = None
+            try:
+                retry_after = float(e.response.headers.get("retry-after") or 0) or None
+            except Exception:
+                pass
+            raise RateLimited(str(e), retry_after=retry_after) from e
+        return (resp.choices[0].message.content or "").strip()
+
+    async def complete(
+        self,
+        *,
+        messages: list[dict[str, str]],
+        model: str | None,
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool = False,
+    ) -> str:
+        return await asyncio.to_thread(
+            self._sync_complete,
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_mode=json_mode,
+        )
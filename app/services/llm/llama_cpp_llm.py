@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import traceback
+from typing import Any
+
+from app.services.llm.base import LLMBackend
+
+
+class LlamaCppBackend(LLMBackend):
+    # In-process GGUF model on CPU via llama-cpp-python (optional dependency, imported on
+    # first use). Loaded once per process, so prefer the threads pool for workers routed
+    # here, or run llama-server and use the "openai" kind instead.
+    kind = "llama_cpp"
+
+    def __init__(self, name: str, config: dict[str, Any]) -> None:
+        super().__init__(name, config)
+        # Small models follow the schema far more reliably when constrained to JSON
+        self.json_mode = bool(config.get("json_mode", True))
+        self._llm = None
+        self._load_lock = threading.Lock()
+        # A llama.cpp context is not thread-safe: one generation at a time per process
+        self._run_lock = threading.Lock()
+
+    def configured(self) -> bool:
+        return bool(self.config.get("model_path"))
+
+    def _get_llm(self):
+        if self._llm is None:
+            with self._load_lock:
+                if self._llm is None:
+                    try:
+                        from llama_cpp import Llama
+
+                        self._llm = Llama(
+                            model_path=self.config["model_path"],
+                            n_ctx=int(self.config.get("n_ctx", 4096)),
+                            n_threads=self.config.get("n_threads"),
+                            verbose=False,
+                        )
+                    except Exception:
+                        print(traceback.format_exc())
+                        raise
+        return self._llm
+
+    def _sync_complete(self, *, messages, temperature, max_tokens, json_mode) -> str:
+        if not self.configured():
+            raise ValueError(f"LLM backend {self.name!r} needs model_path")
+
+        extra = {"response_format": {"type": "json_object"}} if json_mode and self.json_mode else {}
+        llm = self._get_llm()
+        with self._run_lock:
+            resp = llm.create_chat_completion(
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra,
+            )
+        return (resp["choices"][0]["message"].get("content") or "").strip()
+
+    async def complete(
+        self,
+        *,
+        messages: list[dict[str, str]],
+        model: str | None,
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool = False,
+    ) -> str:
+        # The loaded GGUF file is the model; a per-task model name does not apply here
+        return await asyncio.to_thread(
+            self._sync_complete,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_mode=json_mode,
+        )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any
+
+import httpx
+
+from app.services.llm.base import LLMBackend, RateLimited
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    # Any server speaking POST {base_url}/chat/completions: OpenAI, vLLM, llama.cpp's
+    # llama-server, Ollama (/v1), LM Studio, ...
+    kind = "openai"
+
+    def __init__(self, name: str, config: dict[str, Any]) -> None:
+        super().__init__(name, config)
+        self.base_url = (config.get("base_url") or "").rstrip("/")
+        self._client: httpx.Client | None = None
+        self._lock = threading.Lock()
+
+    def configured(self) -> bool:
+        return bool(self.base_url and self.default_model)
+
+    def _get_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    headers = {}
+                    if self.config.get("api_key"):
+                        headers["Authorization"] = f"Bearer {self.config['api_key']}"
+                    self._client = httpx.Client(
+                        base_url=self.base_url,
+                        headers=headers,
+                        timeout=float(self.config.get("timeout_s", 120.0)),
+                    )
+        return self._client
+
+    def _sync_complete(self, *, messages, model, temperature, max_tokens, json_mode) -> str:
+        if not self.configured():
+            raise ValueError(f"LLM backend {self.name!r} needs base_url and model")
+
+        body: dict[str, Any] = {
+            "model": model or self.default_model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if json_mode and self.json_mode:
+            body["response_format"] = {"type": "json_object"}
+
+        resp = self._get_client().post("/chat/completions", json=body)
+        if resp.status_code == 429:
+            retry_after = None
+            try:
+                retry_after = float(resp.headers.get("retry-after") or 0) or None
+            except ValueError:
+                pass
+            raise RateLimited(f"{self.name}: HTTP 429", retry_after=retry_after)
+        resp.raise_for_status()
+        data = resp.json()
+        return ((data.get("choices") or [{}])[0].get("message", {}).get("content") or "").strip()
+
+    async def complete(
+        self,
+        *,
+        messages: list[dict[str, str]],
+        model: str | None,
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool = False,
+    ) -> str:
+        return await asyncio.to_thread(
+            self._sync_complete,
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_mode=json_mode,
+        )
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class AsyncRateLimiter:
+    # Token bucket (at most `rate` calls per `per` seconds, with bursts up to `burst`)
+    # plus an optional cap on calls in flight. A 429 can pause every caller via pause().
+    #
+    #   limiter = AsyncRateLimiter(rate=30, per=60, max_concurrency=4)
+    #   async with limiter:
+    #       await chat_json("profile", ...)
+    def __init__(
+        self,
+        rate: float,
+        per: float = 60.0,
+        burst: float | None = None,
+        max_concurrency: int | None = None,
+    ) -> None:
+        if rate <= 0 or per <= 0:
+            raise ValueError("rate and per must be positive")
+        self._rate_per_s = rate / per
+        self._capacity = max(1.0, burst or 1.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self._sem = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate_per_s)
+        self._updated = now
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order. A call
+        # worth several requests (a batch) may overdraw the bucket; the next caller then
+        # waits until it has refilled
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self._paused_until > now:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= cost
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self._rate_per_s)
+
+    def pause(self, seconds: float) -> None:
+        # Back off everyone (e.g. on HTTP 429 with retry-after) and drop accumulated burst
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + max(0.0, seconds))
+        self._tokens = 0.0
+        self._updated = now
+
+    @asynccontextmanager
+    async def slot(self, cost: float = 1.0):
+        # Like `async with limiter`, for calls that count as more than one request
+        if self._sem is not None:
+            await self._sem.acquire()
+        try:
+            await self.acquire(cost)
+            yield self
+        finally:
+            if self._sem is not None:
+                self._sem.release()
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        if self._sem is not None:
+            await self._sem.acquire()
+        try:
+            await self.acquire()
+        except BaseException:
+            if self._sem is not None:
+                self._sem.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._sem is not None:
+            self._sem.release()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from typing import Any
+
+from app.core.config import settings
+from app.services.llm.base import LLMBackend, RateLimited, extract_first_json_object
+from app.services.llm.rate_limit import AsyncRateLimiter
+
+# Provider-neutral entry point for LLM calls. Callers name a task ("profile", "intent",
+# "query_parse"); LLM_ROUTES maps it to a backend (and optionally a model), so e.g. intent
+# classification can run on a small local model while profiles use a large hosted one.
+# Each backend gets its own concurrency / requests-per-minute limit.
+
+_backends: dict[str, LLMBackend] = {}
+_backends_lock = threading.Lock()
+# asyncio primitives belong to one loop; workers run a loop per thread. So rpm and
+# max_concurrency are per loop (API process / worker thread), not per backend overall
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def _make_backend(name: str, config: dict[str, Any]) -> LLMBackend:
+    kind = config.get("kind", "openai")
+    if kind == "groq":
+        from app.services.llm.groq_llm import GroqBackend
+
+        return GroqBackend(name, config)
+    if kind == "openai":
+        from app.services.llm.openai_compat_llm import OpenAICompatibleBackend
+
+        return OpenAICompatibleBackend(name, config)
+    if kind == "llama_cpp":
+        from app.services.llm.llama_cpp_llm import LlamaCppBackend
+
+        return LlamaCppBackend(name, config)
+    raise ValueError(f"Unknown LLM backend kind {kind!r} for {name!r}")
+
+
+def _backend_configs() -> dict[str, dict[str, Any]]:
+    configs: dict[str, dict[str, Any]] = {"groq": {"kind": "groq"}}
+    for name, config in settings.llm_backends.items():
+        configs[name] = {**configs.get(name, {}), **config}
+    return configs
+
+
+def get_backend(name: str) -> LLMBackend:
+    # Built on first use, so an unused backend never imports its SDK / loads its model
+    backend = _backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                configs = _backend_configs()
+                if name not in configs:
+                    raise ValueError(f"Unknown LLM backend {name!r}")
+                backend = _backends[name] = _make_backend(name, configs[name])
+    return backend
+
+
+def reset_backends() -> None:
+    # Rebuild from settings on next use (tests / bench scripts that change settings)
+    with _backends_lock:
+        _backends.clear()
+    _limiters.clear()
+
+
+def resolve(task: str) -> tuple[LLMBackend, str | None]:
+    route = settings.llm_routes.get(task) or settings.llm_default_backend
+    name, _, model = route.partition(":")
+    backend = get_backend(name)
+    return backend, model or backend.default_model
+
+
+def backend_name(task: str) -> str:
+    return resolve(task)[0].name
+
+
+def llm_available(task: str) -> bool:
+    try:
+        return resolve(task)[0].configured()
+    except ValueError:
+        return False
+
+
+def _limiter(backend: LLMBackend):
+    loop = asyncio.get_running_loop()
+    per_loop = _limiters.setdefault(loop, {})
+    if backend.name not in per_loop:
+        rpm = backend.config.get("rpm")
+        max_concurrency = backend.config.get("max_concurrency")
+        if rpm:
+            per_loop[backend.name] = AsyncRateLimiter(rate=float(rpm), per=60.0, max_concurrency=max_concurrency)
+        elif max_concurrency:
+            per_loop[backend.name] = asyncio.Semaphore(int(max_concurrency))
+        else:
+            per_loop[backend.name] = None
+    return per_loop[backend.name]
+
+
+async def chat_completion(
+    task: str,
+    *,
+    messages: list[dict[str, str]],
+    temperature: float = 0.0,
+    max_tokens: int = 800,
+    json_mode: bool = False,
+) -> str:
+    backend, model = resolve(task)
+    limiter = _limiter(backend)
+    kwargs = dict(messages=messages, model=model, temperature=temperature, max_tokens=max_tokens, json_mode=json_mode)
+    if limiter is None:
+        return await backend.complete(**kwargs)
+    async with limiter:
+        try:
+            return await backend.complete(**kwargs)
+        except RateLimited as e:
+            # Hold back every caller of this backend, then let the caller decide on retries
+            if isinstance(limiter, AsyncRateLimiter):
+                limiter.pause(e.retry_after or 2.0)
+            raise
+
+
+async def chat_json(
+    task: str,
+    *,
+    messages: list[dict[str, str]],
+    temperature: float = 0.0,
+    max_tokens: int = 800,
+) -> dict[str, Any]:
+    content = await chat_completion(
+        task, messages=messages, temperature=temperature, max_tokens=max_tokens, json_mode=True
+    )
+    return extract_first_json_object(content)
@@ -0,0 +1,82 @@
+import hashlib
+import re
+
+import numpy as np
+
+from app.core.config import settings
+
+# Near-duplicate detection for extracted resume text: MinHash over word shingles of the
+# normalized text, bucketed with LSH (bands of rows) so candidates are found with one
+# indexed overlap query on ingested_files.lsh_bands. Changing num_perm / bands / shingle
+# size makes stored signatures incomparable with new ones.
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_permutations: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+
+def _perm(num_perm: int) -> tuple[np.ndarray, np.ndarray]:
+    # Fixed seed: signatures must be comparable across processes and releases.
+    # a, b < 2**32 and 32-bit shingle hashes keep a * x + b inside uint64.
+    if num_perm not in _permutations:
+        rng = np.random.default_rng(1)
+        a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        _permutations[num_perm] = (a, b)
+    return _permutations[num_perm]
+
+
+def normalize_words(text: str) -> list[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def shingles(words: list[str], size: int) -> set[str]:
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(text: str, num_perm: int | None = None, shingle_size: int | None = None) -> np.ndarray | None:
+    # uint32[num_perm], or None when there is no text to fingerprint
+    num_perm = num_perm or settings.dedup_num_perm
+    items = shingles(normalize_words(text), shingle_size or settings.dedup_shingle_size)
+    if not items:
+        return None
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in items),
+        dtype=np.uint64,
+        count=len(items),
+    )
+    a, b = _perm(num_perm)
+    permuted = (hashes[:, None] * a[None, :] + b[None, :]) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+def lsh_band_keys(signature: np.ndarray, bands: int | None = None) -> list[int]:
+    # One signed 64-bit key per band (fits Postgres BIGINT); two files share a key when a
+    # whole band of their signatures is equal
+    bands = bands or settings.dedup_lsh_bands
+    rows = len(signature) // bands
+    keys = []
+    for i in range(bands):
+        band = signature[i * rows : (i + 1) * rows].tobytes()
+        digest = hashlib.blake2b(i.to_bytes(2, "little") + band, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def signature_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype("<u4").tobytes()
+
+
+def signature_from_bytes(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype="<u4")
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    # Estimated Jaccard similarity of the two shingle sets
+    if len(a) != len(b) or not len(a):
+        return 0.0
+    return float(np.mean(a == b))
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from queue import Empty, Queue
+from typing import TYPE_CHECKING
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+SUPPORTED_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_model(
+    backend: str | None = None,
+    model_name: str | None = None,
+    num_threads: int | None = None,
+) -> SentenceTransformer:
+    backend = (backend or settings.embedding_backend or "torch").lower()
+    model_name = model_name or settings.embedding_model_name
+    num_threads = num_threads if num_threads is not None else settings.embedding_num_threads
+
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unsupported embedding backend: {backend}")
+
+    # Imported here: sentence-transformers pulls in torch, which costs seconds and hundreds
+    # of MB in processes that never embed
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        if num_threads:
+            import torch
+
+            torch.set_num_threads(num_threads)
+        return SentenceTransformer(model_name, device="cpu")
+
+    # ONNX Runtime backends (requires sentence-transformers[onnx])
+    model_kwargs: dict = {"provider": "CPUExecutionProvider"}
+    if num_threads:
+        import onnxruntime as ort
+
+        so = ort.SessionOptions()
+        so.intra_op_num_threads = num_threads
+        so.inter_op_num_threads = 1
+        model_kwargs["session_options"] = so
+
+    if backend == "onnx-int8":
+        model_kwargs["file_name"] = settings.embedding_onnx_file_name
+
+    return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+
+@dataclass
+class _Pending:
+    texts: list[str]
+    future: Future = field(default_factory=Future)
+
+
+# Collects concurrent encode calls (from request threads) and runs them as one forward pass.
+class EmbeddingBatcher:
+    def __init__(self, model: SentenceTransformer, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Queue[_Pending] = Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, texts: list[str]) -> Future:
+        pending = _Pending(texts=list(texts))
+        if not pending.texts:
+            pending.future.set_result([])
+            return pending.future
+
+        self._ensure_started()
+        self._queue.put(pending)
+        return pending.future
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        return self.submit(texts).result()
+
+    def _collect(self) -> list[_Pending]:
+        first = self._queue.get()
+        batch = [first]
+        size = len(first.texts)
+
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            batch.append(item)
+            size += len(item.texts)
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            flat = [t for p in batch for t in p.texts]
+            try:
+                vectors = self.model.encode(
+                    flat,
+                    batch_size=max(32, len(flat)),
+                    normalize_embeddings=True,
+                )
+            except Exception as exc:
+                print(traceback.format_exc())
+                for p in batch:
+                    p.future.set_exception(exc)
+                continue
+
+            start = 0
+            for p in batch:
+                end = start + len(p.texts)
+                p.future.set_result([v.tolist() for v in vectors[start:end]])
+                start = end
@@ -1,44 +1,125 @@
-from sentence_transformers import SentenceTransformer
+from __future__ import annotations
+
+import threading
 import traceback
+from typing import TYPE_CHECKING
+
 from app.core.config import settings
+from app.services.processing.embedding_runtime import EmbeddingBatcher, load_model
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# eager: load and warm up when the process starts; lazy: on the first embed call;
+# disabled: embed calls raise (processes that never embed, e.g. an API replica behind
+# /jobs only or extract-only workers). Chosen per process role, see init_model_for_role.
+MODEL_LOAD_MODES = ("eager", "lazy", "disabled")
 
 _model: SentenceTransformer | None = None
+_batcher: EmbeddingBatcher | None = None
+_lock = threading.Lock()
+# None until the API / worker startup hook runs; scripts and shells load lazily
+_role: str | None = None
+
+
+class EmbeddingModelDisabled(RuntimeError):
+    pass
+
+
+def model_load_mode(role: str | None = None) -> str:
+    role = role or _role
+    if role is None:
+        return "lazy"
+    mode = (getattr(settings, f"embedding_load_{role}", None) or "lazy").lower()
+    if mode not in MODEL_LOAD_MODES:
+        raise ValueError(f"Unsupported embedding load mode for {role}: {mode}")
+    if mode == "eager" and not settings.embedding_warmup:
+        return "lazy"
+    return mode
+
+
+def init_model_for_role(role: str) -> str:
+    # Called once at process start ("api" from the lifespan, "worker" from worker init)
+    global _role
+    _role = role
+    mode = model_load_mode(role)
+    if mode == "eager":
+        warmup_model()
+    return mode
 
 
 def get_model() -> SentenceTransformer:
     global _model
     if _model is None:
-        try:
-            _model = SentenceTransformer(settings.embedding_model_name)
-        except Exception:
-            print(traceback.format_exc())
-            raise
-            
+        if model_load_mode() == "disabled":
+            raise EmbeddingModelDisabled(f"Embedding model is disabled for this process (role {_role})")
+        with _lock:
+            if _model is None:
+                try:
+                    _model = load_model()
+                except Exception:
+                    print(traceback.format_exc())
+                    raise
+
     return _model
 
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
-    model_name = (settings.embedding_model_name or "").lower()
-    if "e5" in model_name:
-        return embed_passages(texts)
+def get_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        model = get_model()
+        with _lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher(
+                    model,
+                    max_batch_size=settings.embedding_batch_max_size,
+                    max_wait_ms=settings.embedding_batch_wait_ms,
+                )
+    return _batcher
+
+
+def warmup_model() -> None:
+    # Load weights and run one forward pass so the first real request doesn't pay for it
+    model = get_model()
+    model.encode(["warmup"], normalize_embeddings=True)
+
+
+def _encode(texts: list[str]) -> list[list[float]]:
+    if settings.embedding_batching_enabled:
+        return get_batcher().encode(texts)
 
     model = get_model()
     vectors = model.encode(texts, normalize_embeddings=True)
     return [v.tolist() for v in vectors]
 
 
+def uses_e5_prefixes(model_name: str | None = None) -> bool:
+    return "e5" in (model_name or settings.embedding_model_name or "").lower()
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    if uses_e5_prefixes():
+        return embed_passages(texts)
+
+    return _encode(texts)
+
+
 def _prefix_texts(texts: list[str], prefix: str) -> list[str]:
     p = prefix.strip() + " "
     return [p + (t or "") for t in texts]
 
 
 def embed_passages(texts: list[str]) -> list[list[float]]:
-    model = get_model()
-    vectors = model.encode(_prefix_texts(texts, "passage:"), normalize_embeddings=True)
-    return [v.tolist() for v in vectors]
+    return _encode(_prefix_texts(texts, "passage:"))
 
 
 def embed_queries(texts: list[str]) -> list[list[float]]:
-    model = get_model()
-    vectors = model.encode(_prefix_texts(texts, "query:"), normalize_embeddings=True)
-    return [v.tolist() for v in vectors]
\ No newline at end of file
+    return _encode(_prefix_texts(texts, "query:"))
+
+
+def embed_search_queries(texts: list[str]) -> list[list[float]]:
+    # Query side of asymmetric search: e5 needs "query:", other models embed as-is
+    if uses_e5_prefixes():
+        return embed_queries(texts)
+
+    return _encode(texts)
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from io import BytesIO
 
-from pypdf import PdfReader
+from app.core.metrics import StageTimings
 
 
 def _extract_with_pypdf(pdf_bytes: bytes) -> str:
+    from pypdf import PdfReader
+
     reader = PdfReader(BytesIO(pdf_bytes), strict=False)
 
     parts: list[str] = []
@@ -20,7 +22,8 @@ def _extract_with_pypdf(pdf_bytes: bytes) -> str:
         if text:
             parts.append(text)
 
-    return "\n\n".join(parts).strip()
+    # Form feed between pages, as pdfminer does (prompt compaction looks for running headers/footers per page)
+    return "\n\f\n".join(parts).strip()
 
 
 def _extract_with_pdfminer(pdf_bytes: bytes) -> str:
@@ -46,18 +49,24 @@ def _extract_with_ocr(pdf_bytes: bytes) -> str:
         if t:
             parts.append(t)
 
-    return "\n\n".join(parts).strip()
+    return "\n\f\n".join(parts).strip()
+
 
+def extract_text_from_pdf_bytes(pdf_bytes: bytes, timings: StageTimings | None = None) -> str:
+    timings = timings if timings is not None else StageTimings()
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
     # 1) Try pypdf
-    text = _extract_with_pypdf(pdf_bytes)
+    with timings.stage("extract", "pypdf"):
+        text = _extract_with_pypdf(pdf_bytes)
+    timings.set_method("pypdf")
     if len(text) >= 50:
         return text
 
     # 2) Try pdfminer.six
     try:
-        text = _extract_with_pdfminer(pdf_bytes)
+        with timings.stage("extract", "pdfminer"):
+            text = _extract_with_pdfminer(pdf_bytes)
+        timings.set_method("pdfminer")
         if len(text) >= 50:
             return text
     except Exception:
@@ -65,7 +74,9 @@ def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
 
     # 3) OCR fallback (slow but most robust)
     try:
-        text = _extract_with_ocr(pdf_bytes)
+        with timings.stage("extract", "ocr"):
+            text = _extract_with_ocr(pdf_bytes)
+        timings.set_method("ocr")
         return text
     except Exception:
         # Last resort: return whatever we got (even if small)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from app.core.config import settings
+from app.services.processing.embeddings import embed_search_queries
+
+
+def normalize_query_text(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "")).strip()
+
+
+@lru_cache(maxsize=max(1, settings.query_embedding_cache_size))
+def _cached_query_vector(model_key: str, text: str) -> tuple[float, ...]:
+    return tuple(embed_search_queries([text])[0])
+
+
+def embed_query(text: str) -> list[float]:
+    # Repeated JDs / fallback questions skip the encoder entirely
+    model_key = f"{settings.embedding_model_name}|{settings.embedding_backend}"
+    return list(_cached_query_vector(model_key, normalize_query_text(text)))
+
+
+def query_cache_info():
+    return _cached_query_vector.cache_info()
+
+
+def clear_query_cache() -> None:
+    _cached_query_vector.cache_clear()
@@ -1,12 +1,17 @@
-from typing import Any
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
 from io import BytesIO
-from docx import Document
 import subprocess
 import tempfile
 from pathlib import Path
+from app.core.metrics import StageTimings
 from app.services.gdrive.downloader import download_file_bytes, export_google_doc_bytes
 from app.services.processing.pdf_extract import extract_text_from_pdf_bytes
 
+if TYPE_CHECKING:
+    from app.services.gdrive.async_client import AsyncDriveClient
+
 DOC_MIME = "application/msword"
 def _convert_doc_to_docx_bytes(doc_bytes: bytes) -> bytes:
     with tempfile.TemporaryDirectory() as td:
@@ -29,47 +34,108 @@ def _convert_doc_to_docx_bytes(doc_bytes: bytes) -> bytes:
         return docx_files[0].read_bytes()
 GOOGLE_DOC_MIME = "application/vnd.google-apps.document"
 DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PDF_MIME = "application/pdf"
+LOCAL_SUFFIX_MIME = {
+    ".pdf": PDF_MIME,
+    ".docx": DOCX_MIME,
+    ".doc": DOC_MIME,
+    ".txt": "text/plain",
+}
 
-def get_text_for_drive_file(service: Any, file_meta: dict) -> str:
-    file_id = file_meta["id"]
-    mime_type = file_meta.get("mimeType") or ""
 
-    if mime_type == GOOGLE_DOC_MIME:
-        raw = export_google_doc_bytes(service, file_id, mime_type="text/plain")
-        return raw.decode("utf-8", errors="ignore")
+class UnsupportedMimeType(ValueError):
+    # Not a resume format we can read; the worker records these as skipped, not failed
+    pass
+
+
+def _docx_text(docx_bytes: bytes) -> str:
+    from docx import Document
+
+    doc = Document(BytesIO(docx_bytes))
+
+    parts: list[str] = []
+    for p in doc.paragraphs:
+        t = (p.text or "").strip()
+        if t:
+            parts.append(t)
+
+    return "\n".join(parts).strip()
+
+
+def text_from_bytes(raw: bytes, mime_type: str, timings: StageTimings | None = None) -> str:
+    # Shared by the Drive worker and the local batch scripts
+    timings = timings if timings is not None else StageTimings()
 
     if mime_type.startswith("text/"):
-        raw = download_file_bytes(service, file_id)
+        timings.set_method("text")
         return raw.decode("utf-8", errors="ignore")
 
-
-    if mime_type == "application/pdf":
-        raw = download_file_bytes(service, file_id)
-        return extract_text_from_pdf_bytes(raw)
+    if mime_type == PDF_MIME:
+        return extract_text_from_pdf_bytes(raw, timings)
 
     if mime_type == DOCX_MIME:
-        raw = download_file_bytes(service, file_id)
-        doc = Document(BytesIO(raw))
+        with timings.stage("extract", "docx"):
+            text = _docx_text(raw)
+        timings.set_method("docx")
+        return text
 
-        parts: list[str] = []
-        for p in doc.paragraphs:
-            t = (p.text or "").strip()
-            if t:
-                parts.append(t)
+    if mime_type == DOC_MIME:
+        with timings.stage("extract", "doc"):
+            text = _docx_text(_convert_doc_to_docx_bytes(raw))
+        timings.set_method("doc")
+        return text
 
-        return "\n".join(parts).strip()
+    raise UnsupportedMimeType(f"Unsupported mime type: {mime_type}")
+
+
+def check_drive_mime_type(mime_type: str) -> None:
+    # Before downloading: Google Docs are exported, everything else must be a resume format
+    if mime_type != GOOGLE_DOC_MIME and not (
+        mime_type.startswith("text/") or mime_type in (PDF_MIME, DOCX_MIME, DOC_MIME)
+    ):
+        raise UnsupportedMimeType(f"Unsupported mime type: {mime_type}")
+
+
+def text_from_drive_bytes(raw: bytes, file_meta: dict, timings: StageTimings | None = None) -> str:
+    mime_type = file_meta.get("mimeType") or ""
+    timings = timings if timings is not None else StageTimings()
+    if mime_type == GOOGLE_DOC_MIME:
+        timings.set_method("gdoc-export")
+        return raw.decode("utf-8", errors="ignore")
+    return text_from_bytes(raw, mime_type, timings)
+
+
+async def download_drive_file(drive: AsyncDriveClient, file_meta: dict) -> bytes:
+    mime_type = file_meta.get("mimeType") or ""
+    check_drive_mime_type(mime_type)
+    if mime_type == GOOGLE_DOC_MIME:
+        return await drive.export(file_meta["id"], mime_type="text/plain")
+    return await drive.download(file_meta["id"])
+
+
+def get_text_for_drive_file(service: Any, file_meta: dict, timings: StageTimings | None = None) -> str:
+    # Blocking variant on the googleapiclient service (scripts); the worker uses
+    # download_drive_file + text_from_drive_bytes
+    file_id = file_meta["id"]
+    mime_type = file_meta.get("mimeType") or ""
+    timings = timings if timings is not None else StageTimings()
+    check_drive_mime_type(mime_type)
+
+    with timings.stage("download"):
+        if mime_type == GOOGLE_DOC_MIME:
+            raw = export_google_doc_bytes(service, file_id, mime_type="text/plain")
+        else:
+            raw = download_file_bytes(service, file_id)
+    return text_from_drive_bytes(raw, file_meta, timings)
 
-    if mime_type == DOC_MIME:
-        raw = download_file_bytes(service, file_id)
-        docx_bytes = _convert_doc_to_docx_bytes(raw)
 
-        doc = Document(BytesIO(docx_bytes))
-        parts: list[str] = []
-        for p in doc.paragraphs:
-            t = (p.text or "").strip()
-            if t:
-                parts.append(t)
+def mime_type_for_path(path: Path) -> str:
+    mime_type = LOCAL_SUFFIX_MIME.get(path.suffix.lower())
+    if mime_type is None:
+        raise UnsupportedMimeType(f"Unsupported local file type: {path.suffix}")
+    return mime_type
 
-        return "\n".join(parts).strip()
 
-    raise ValueError(f"Unsupported mime type: {mime_type}")
\ No newline at end of file
+def get_text_for_local_file(path: Path, timings: StageTimings | None = None) -> str:
+    mime_type = mime_type_for_path(path)
+    return text_from_bytes(path.read_bytes(), mime_type, timings)
@@ -1,15 +1,48 @@
 from __future__ import annotations
 
 from app.core.config import settings
-from app.services.llm.groq_llm import groq_chat_json
+from app.core.metrics import StageTimings, count_prompt_tokens
+from app.services.llm.rate_limit import AsyncRateLimiter
+from app.services.llm.router import backend_name, chat_json, llm_available
 from app.services.resume.profile_schema import ResumeProfile
+from app.services.resume.prompt_compaction import compact_resume_text, estimate_tokens
 
 
-async def llm_build_resume_profile(text: str) -> ResumeProfile:
-    t = (text or "").strip()
-
+def _prompt_text(text: str, timings: StageTimings | None, compact: bool) -> str:
     # Keep prompts within a reasonable size
-    t = t[:12000]
+    if not compact:
+        t = (text or "").strip()[: settings.llm_prompt_max_chars]
+        sent, saved = estimate_tokens(t), 0
+    else:
+        result = compact_resume_text(text)
+        t, sent, saved = result.text, result.tokens_after, result.tokens_saved
+
+    count_prompt_tokens("profile", sent, saved)
+    if timings is not None:
+        timings.set_count("prompt_tokens", sent)
+        timings.set_count("prompt_tokens_saved", saved)
+    return t
+
+
+async def _chat_json(limiter: AsyncRateLimiter | None, **kwargs) -> dict:
+    if limiter is None:
+        return await chat_json("profile", **kwargs)
+    async with limiter:
+        return await chat_json("profile", **kwargs)
+
+
+async def llm_build_resume_profile(
+    text: str,
+    timings: StageTimings | None = None,
+    compact: bool | None = None,
+    limiter: AsyncRateLimiter | None = None,
+) -> ResumeProfile:
+    # limiter: a caller-side limit charged once per LLM call (the summary expansion is a
+    # second one), e.g. the batch profiler's --rpm
+    if not llm_available("profile"):
+        raise ValueError(f"LLM backend {backend_name('profile')!r} is not configured")
+
+    t = _prompt_text(text, timings, settings.llm_prompt_compaction if compact is None else compact)
 
     system = (
         "You are an expert resume parser.\n"
@@ -38,10 +71,7 @@ async def llm_build_resume_profile(text: str) -> ResumeProfile:
         {"role": "user", "content": f"Resume text:\n\n{t}"},
     ]
 
-    if not settings.groq_api_key:
-        raise ValueError("GROQ_API_KEY is not configured")
-
-    data = await groq_chat_json(messages=messages, temperature=0.0, max_tokens=1200)
+    data = await _chat_json(limiter, messages=messages, temperature=0.0, max_tokens=1200)
 
     def _clean_float_map(x):
         if not isinstance(x, dict):
@@ -81,7 +111,8 @@ async def llm_build_resume_profile(text: str) -> ResumeProfile:
             f"CURRENT SUMMARY:\n{profile.overall_summary}\n"
         )
 
-        expand_data = await groq_chat_json(
+        expand_data = await _chat_json(
+            limiter,
             messages=[
                 {"role": "system", "content": expand_system},
                 {"role": "user", "content": expand_user},
@@ -15,134 +15,117 @@ _KNOWN_SKILLS = [
 ]
 
 
-def _first_n_words(text: str, n: int) -> str:
-    words = re.split(r"\s+", (text or "").strip())
-    words = [w for w in words if w]
-    return " ".join(words[:n]).strip()
+# Fallback whenever Groq is missing or fails, so during an outage it runs for every file.
+# All patterns are compiled once; the text is lowercased and scanned once for years, skills
+# and "skill - N years", then walked line by line once for companies and the projects window
+# (lines that cannot match are rejected with a substring check before any regex runs).
+
+_NUM = r"(\d+(?:\.\d+)?)"
+_YEARS = r"\s*(?:years|yrs)\b"
+_SKILL_ALT = "|".join(re.escape(s) for s in sorted(_KNOWN_SKILLS, key=len, reverse=True))
+
+# One alternation: a skill (optionally followed by "- N years") or a bare "N years".
+# Matches cannot overlap (skills have no digits), so one finditer sees what separate
+# per-skill searches and the years findall used to.
+_SCAN_RE = re.compile(
+    rf"\b(?P<skill>{_SKILL_ALT})\b(?:\s*[:\-–]\s*(?P<skill_years>\d+(?:\.\d+)?){_YEARS})?"
+    rf"|(?P<years>\d+(?:\.\d+)?)\s*\+?{_YEARS}"
+)
+_COMPANY_LABEL_RE = re.compile(rf"Company\s*[:\-]\s*([A-Za-z0-9 &.,]+).*?{_NUM}{_YEARS}", re.I)
+_COMPANY_DASH_RE = re.compile(rf"^([A-Za-z0-9 &.,]{{2,}})\s*[-–]\s*{_NUM}{_YEARS}", re.I)
+_PROJECTS_HEADING_RE = re.compile(r"\bprojects?\b", re.I)
+_PROJECT_LINE_RE = re.compile(r"^(?:project\s*[:\-]\s*)?(.{3,80}?)(?:\s*[:\-]\s*(.+))?$", re.I)
+_PROJECT_HEADING_ONLY_RE = re.compile(r"projects?", re.I)
+_PROJECTS_WINDOW = 60
+_MAX_PROJECTS = 5
+
+
+def _scan_terms(lowered: str) -> tuple[float | None, list[str], dict[str, float]]:
+    # total years, skills (in _KNOWN_SKILLS order), first "skill - N years" per skill
+    years: list[float] = []
+    seen: set[str] = set()
+    skill_years: dict[str, float] = {}
+    for m in _SCAN_RE.finditer(lowered):
+        skill = m.group("skill")
+        if skill is None:
+            years.append(float(m.group("years")))
+            continue
+        seen.add(skill)
+        value = m.group("skill_years")
+        if value is not None:
+            years.append(float(value))
+            skill_years.setdefault(skill, float(value))
 
+    skills = [s for s in _KNOWN_SKILLS if s in seen]
+    return (max(years) if years else None), skills, {s: skill_years[s] for s in skills if s in skill_years}
 
-def _extract_total_years(text: str) -> float | None:
-    t = (text or "").lower()
 
-    # Examples: "3 years", "2.5 yrs", "5+ years"
-    matches = re.findall(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years|yrs)\b", t)
-    if not matches:
+def _company_years(line: str) -> tuple[str, float] | None:
+    # "Company: Infosys (2 years)" or "Infosys - 2 yrs"; durations in other formats are not parsed
+    m = _COMPANY_LABEL_RE.search(line) or _COMPANY_DASH_RE.search(line)
+    if m is None:
         return None
+    return m.group(1).strip(), float(m.group(2))
 
-    nums = []
-    for m in matches:
-        try:
-            nums.append(float(m))
-        except Exception:
-            pass
-    return max(nums) if nums else None
-
-
-def _extract_skills(text: str) -> list[str]:
-    t = (text or "").lower()
-    found = []
-    for s in _KNOWN_SKILLS:
-        if re.search(rf"\b{re.escape(s)}\b", t):
-            found.append(s)
-    # de-dup while preserving order
-    seen = set()
-    out = []
-    for s in found:
-        if s not in seen:
-            out.append(s)
-            seen.add(s)
-    return out
-
-
-def _extract_skill_years(text: str, skills: list[str]) -> dict[str, float]:
-    # Best-effort for patterns like:
-    # "Python - 3 years", "Django: 1.5 yrs"
-    t = (text or "").lower()
-    out: dict[str, float] = {}
-    for s in skills:
-        m = re.search(rf"\b{re.escape(s)}\b\s*[:\-–]\s*(\d+(?:\.\d+)?)\s*(?:years|yrs)\b", t)
-        if m:
-            try:
-                out[s] = float(m.group(1))
-            except Exception:
-                pass
-    return out
-
-
-def _extract_companies(text: str) -> dict[str, float]:
-    # Heuristic only. This does NOT reliably compute durations for all formats.
-    # Captures lines like: "Company: Infosys (2 years)" OR "Infosys - 2 yrs"
-    out: dict[str, float] = {}
-    for line in (text or "").splitlines():
-        l = line.strip()
-        if not l:
-            continue
-
-        m1 = re.search(r"Company\s*[:\-]\s*([A-Za-z0-9 &.,]+).*?(\d+(?:\.\d+)?)\s*(?:years|yrs)\b", l, re.I)
-        if m1:
-            name = m1.group(1).strip()
-            yrs = float(m1.group(2))
-            out[name] = max(out.get(name, 0.0), yrs)
-            continue
-
-        m2 = re.search(r"^([A-Za-z0-9 &.,]{2,})\s*[-–]\s*(\d+(?:\.\d+)?)\s*(?:years|yrs)\b", l, re.I)
-        if m2:
-            name = m2.group(1).strip()
-            yrs = float(m2.group(2))
-            out[name] = max(out.get(name, 0.0), yrs)
 
-    return out
+def _project(line: str) -> Project | None:
+    # "Project: CRM System - Built APIs..."
+    m = _PROJECT_LINE_RE.match(line)
+    if not m:
+        return None
+    name = (m.group(1) or "").strip()
+    # Avoid capturing the heading itself
+    if _PROJECT_HEADING_ONLY_RE.fullmatch(name):
+        return None
+    desc = (m.group(2) or "").strip() if m.group(2) else None
+    return Project(domain=None, project_name=name, project_description=desc)
 
 
-def _extract_projects(text: str) -> list[Project]:
-    # Minimal heuristic:
-    # Look for "Projects" section and take next lines with "Project" / ":" patterns.
-    lines = (text or "").splitlines()
-    projects: list[Project] = []
+def _walk_lines(text: str, lowered: str) -> tuple[dict[str, float], list[Project]]:
+    # lower() never adds or removes line breaks, so both split into the same lines
+    lines = text.splitlines()
+    lowered_lines = lowered.splitlines()
 
-    idx = None
-    for i, ln in enumerate(lines):
-        if re.search(r"\bprojects?\b", ln, re.I):
-            idx = i
-            break
-    if idx is None:
-        return projects
-
-    chunk = lines[idx : idx + 60]  # small window after Projects heading
-    for ln in chunk:
-        l = ln.strip()
-        if not l:
-            continue
-
-        # Example: "Project: CRM System - Built APIs..."
-        m = re.match(r"^(?:project\s*[:\-]\s*)?(.{3,80}?)(?:\s*[:\-]\s*(.+))?$", l, re.I)
-        if not m:
+    companies: dict[str, float] = {}
+    heading: int | None = None
+    for i, (line, low) in enumerate(zip(lines, lowered_lines)):
+        if heading is None and "project" in low and _PROJECTS_HEADING_RE.search(line):
+            heading = i
+        if "yrs" not in low and "years" not in low:
             continue
-
-        name = (m.group(1) or "").strip()
-        desc = (m.group(2) or "").strip() if m.group(2) else None
-
-        # Avoid capturing the heading itself
-        if re.fullmatch(r"projects?", name, re.I):
+        l = line.strip()
+        if not l:
             continue
+        found = _company_years(l)
+        if found is not None:
+            name, yrs = found
+            companies[name] = max(companies.get(name, 0.0), yrs)
 
-        projects.append(Project(domain=None, project_name=name, project_description=desc))
-
-        if len(projects) >= 5:
-            break
+    projects: list[Project] = []
+    if heading is not None:
+        for line in lines[heading : heading + _PROJECTS_WINDOW]:
+            l = line.strip()
+            if not l:
+                continue
+            project = _project(l)
+            if project is None:
+                continue
+            projects.append(project)
+            if len(projects) >= _MAX_PROJECTS:
+                break
 
-    return projects
+    return companies, projects
 
 
 def build_resume_profile(text: str) -> ResumeProfile:
-    total_years = _extract_total_years(text)
-    skills = _extract_skills(text)
-    skill_years = _extract_skill_years(text, skills)
-    companies = _extract_companies(text)
-    projects = _extract_projects(text)
+    text = text or ""
+    lowered = text.lower()
+    total_years, skills, skill_years = _scan_terms(lowered)
+    companies, projects = _walk_lines(text, lowered)
 
-    summary = _first_n_words(text, 200)
-    overview = _first_n_words(text, 120)
+    words = text.split()
+    summary = " ".join(words[:200])
+    overview = " ".join(words[:120])
 
     return ResumeProfile(
         total_years_experience=total_years,
@@ -152,4 +135,4 @@ def build_resume_profile(text: str) -> ResumeProfile:
         overview_for_rag=overview or None,
         company_experience_years=companies,
         projects=projects,
-    )
\ No newline at end of file
+    )
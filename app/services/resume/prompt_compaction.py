@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+
+# Shrinks extracted resume text before it is sent to the LLM: page headers/footers and
+# page numbers, contact details, personal data, references and hobbies are removed,
+# whitespace and bullets are normalized, and when the result is still over budget the
+# sections the profile needs most (experience, skills, projects, summary) are kept first.
+# Sections stay in their original order.
+
+# Sections by canonical kind; header lines are matched after lowercasing and stripping
+# punctuation, e.g. "WORK EXPERIENCE:" -> "work experience"
+_SECTION_ALIASES = {
+    "summary": (
+        "summary", "professional summary", "career summary", "executive summary", "profile",
+        "professional profile", "personal profile", "objective", "career objective", "about me", "overview",
+    ),
+    "experience": (
+        "experience", "work experience", "professional experience", "relevant experience", "employment",
+        "employment history", "work history", "career history", "internships", "internship",
+    ),
+    "skills": (
+        "skills", "technical skills", "key skills", "core skills", "skill set", "skills and tools",
+        "core competencies", "competencies", "technologies", "tech stack", "technical proficiency",
+    ),
+    "projects": ("projects", "key projects", "personal projects", "academic projects", "project experience", "selected projects"),
+    "education": ("education", "academic background", "qualifications", "educational qualifications", "academic qualifications"),
+    "certifications": ("certifications", "certificates", "licenses and certifications", "courses", "training"),
+    "awards": ("awards", "achievements", "honors", "honours", "accomplishments", "publications"),
+    "languages": ("languages",),
+    # Kept (ranked last): activities often hold work-like entries, unlike hobbies
+    "activities": ("activities", "extracurricular activities"),
+    "interests": ("interests", "hobbies", "hobbies and interests"),
+    "personal": ("personal details", "personal information", "personal data"),
+    "references": ("references", "referees"),
+    "declaration": ("declaration",),
+    "contact": ("contact", "contact information", "contact details"),
+}
+_HEADER_KIND = {alias: kind for kind, aliases in _SECTION_ALIASES.items() for alias in aliases}
+_MAX_HEADER_CHARS = 40
+
+# Never useful for the profile
+_DROP_SECTIONS = frozenset({"interests", "personal", "references", "declaration", "contact"})
+# Lower is kept first when the text is over budget; "preamble" is everything before the
+# first header (name, headline, often an untitled summary)
+_SECTION_RANK = {
+    "experience": 0,
+    "skills": 1,
+    "projects": 2,
+    "summary": 3,
+    "preamble": 4,
+    "certifications": 5,
+    "education": 6,
+    "awards": 7,
+    "languages": 8,
+    "activities": 9,
+}
+# A partly kept section must keep at least this much, otherwise it is dropped
+_MIN_PARTIAL_CHARS = 200
+# Page headers/footers are looked for in the first / last N lines of every page
+_EDGE_LINES = 2
+
+_ZERO_WIDTH_RE = re.compile("[​‌‍⁠﻿]")
+_BULLET_RE = re.compile(r"^[•●▪◦■□‣⁃∙·➢►✓✔*]+\s*")
+_SPACES_RE = re.compile(r"[ \t ]+")
+_RULE_RE = re.compile(r"[\W_]+")
+_PAGE_NO_RE = re.compile(r"(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?", re.I)
+_DIGITS_RE = re.compile(r"\d+")
+_HEADER_KEY_RE = re.compile(r"[^a-z& ]+")
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_URL_RE = re.compile(r"(?:https?://|www\.)\S+|\b(?:linkedin|github|gitlab)\.com/\S*", re.I)
+_PHONE_RE = re.compile(r"(?<![\w/])\+?\(?\d[\d\s().-]{7,}\d(?![\w/])")
+# Digit runs that contain a year are dates ("01.2019 - 03.2021"), never phone numbers
+_YEAR_RE = re.compile(r"(?<!\d)(?:19|20)\d\d(?!\d)")
+_LABELS = r"\b(?:e-?mail|phone|mobile|mob|tel|telephone|cell|contact|linkedin|github|portfolio|website)\b\s*[:.]?\s*"
+_LABEL_RE = re.compile(_LABELS, re.I)
+# A label whose value was just removed ("Email: " before a separator, another label or the end)
+_EMPTY_LABEL_RE = re.compile(_LABELS + r"(?=[|•·●;,/]|" + _LABELS + r"|$)", re.I)
+_DANGLING_SEP_RE = re.compile(r"(?:\s*[|•·●;,/]\s*){2,}")
+_PERSONAL_LINE_RE = re.compile(
+    r"(?:address|date of birth|dob|nationality|marital status|gender|passport(?: no)?|father'?s name)\s*[:\-]",
+    re.I,
+)
+_REFERENCES_LINE_RE = re.compile(r"references? (?:are )?(?:available )?(?:up)?on request\.?", re.I)
+
+
+@dataclass
+class CompactionResult:
+    text: str
+    # The uncompacted prompt text (stripped, cut to the same budget), i.e. what was sent before
+    chars_before: int
+    chars_after: int
+    tokens_before: int
+    tokens_after: int
+    # Lines removed per reason: header_footer, page_number, contact, personal, section:<kind>, budget
+    removed: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+    @property
+    def savings(self) -> float:
+        return self.tokens_saved / self.tokens_before if self.tokens_before else 0.0
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text with the Llama/GPT BPE tokenizers; good
+    # enough for reporting savings, not for enforcing context limits
+    return math.ceil(len(text or "") / 4)
+
+
+def _count(removed: dict[str, int], reason: str, n: int = 1) -> None:
+    removed[reason] = removed.get(reason, 0) + n
+
+
+def _normalize_line(line: str) -> str:
+    line = _SPACES_RE.sub(" ", line).strip()
+    if _BULLET_RE.match(line):
+        line = "- " + _BULLET_RE.sub("", line)
+    return line
+
+
+def _pages(text: str) -> list[list[str]]:
+    # pdfminer and the pypdf/OCR extractors separate pages with a form feed
+    text = _ZERO_WIDTH_RE.sub("", unicodedata.normalize("NFKC", text)).replace("\r\n", "\n").replace("\r", "\n")
+    return [[_normalize_line(line) for line in page.split("\n")] for page in text.split("\f")]
+
+
+def _edge_key(line: str) -> str:
+    return _DIGITS_RE.sub("#", line.lower())
+
+
+def _drop_headers_footers(pages: list[list[str]], removed: dict[str, int]) -> list[str]:
+    # A line in the first/last lines of at least half the pages (and of two or more) is a
+    # running header or footer. Only an occurrence at the top of the first page is kept
+    # (usually the candidate's name or headline)
+    edges: list[set[int]] = []
+    counts: dict[str, int] = {}
+    for page in pages:
+        nonblank = [i for i, line in enumerate(page) if line]
+        idx = set(nonblank[:_EDGE_LINES] + nonblank[-_EDGE_LINES:])
+        edges.append(idx)
+        for key in {_edge_key(page[i]) for i in idx}:
+            counts[key] = counts.get(key, 0) + 1
+
+    repeated = {k for k, n in counts.items() if n >= max(2, math.ceil(len(pages) / 2))} if len(pages) > 1 else set()
+    first_top = set([i for i, line in enumerate(pages[0]) if line][:_EDGE_LINES])
+    lines: list[str] = []
+    for n, (page, idx) in enumerate(zip(pages, edges)):
+        for i, line in enumerate(page):
+            if _PAGE_NO_RE.fullmatch(line):
+                _count(removed, "page_number")
+                continue
+            if i in idx and _edge_key(line) in repeated and not (n == 0 and i in first_top):
+                _count(removed, "header_footer")
+                continue
+            lines.append(line)
+        lines.append("")
+    return lines
+
+
+def _strip_phone(m: re.Match) -> str:
+    s = m.group(0)
+    if sum(c.isdigit() for c in s) < 9 or _YEAR_RE.search(s):
+        return s
+    return ""
+
+
+def _strip_contact(line: str) -> str | None:
+    # None: the line was only contact details
+    cleaned = _PHONE_RE.sub(_strip_phone, _URL_RE.sub("", _EMAIL_RE.sub("", line)))
+    if cleaned == line:
+        return line
+    if len(re.sub(r"\W", "", _LABEL_RE.sub("", cleaned))) < 2:
+        return None
+    # Separators left behind go from the end; at the start only non-bullet ones, so a
+    # normalized "- " bullet survives
+    return _DANGLING_SEP_RE.sub(" | ", _EMPTY_LABEL_RE.sub("", cleaned)).rstrip(" |•·●;,/:-").lstrip(" |;,/:")
+
+
+def _header_kind(line: str) -> str | None:
+    # Section kind for a header line, including ones with inline content ("Skills: Python, SQL")
+    for candidate in (line, line.partition(":")[0]):
+        if len(candidate) > _MAX_HEADER_CHARS:
+            continue
+        key = " ".join(_HEADER_KEY_RE.sub(" ", candidate.lower().replace("&", "and")).split())
+        kind = _HEADER_KIND.get(key)
+        if kind is not None:
+            return kind
+    return None
+
+
+def _sections(lines: list[str]) -> list[tuple[str, list[str]]]:
+    sections: list[tuple[str, list[str]]] = [("preamble", [])]
+    for line in lines:
+        kind = _header_kind(line) if line else None
+        if kind is None:
+            sections[-1][1].append(line)
+        else:
+            sections.append((kind, [line]))
+    return sections
+
+
+def _clean_section(kind: str, lines: list[str], removed: dict[str, int]) -> list[str]:
+    out: list[str] = []
+    for line in lines:
+        if not line:
+            if out and out[-1]:
+                out.append("")
+            continue
+        if _RULE_RE.fullmatch(line):
+            continue
+        if _PERSONAL_LINE_RE.match(line):
+            _count(removed, "personal")
+            continue
+        if _REFERENCES_LINE_RE.fullmatch(line):
+            _count(removed, "section:references")
+            continue
+        stripped = _strip_contact(line)
+        if stripped is None:
+            _count(removed, "contact")
+            continue
+        if stripped != line:
+            _count(removed, "contact")
+        if out and stripped == out[-1]:
+            continue
+        out.append(stripped)
+    while out and not out[-1]:
+        out.pop()
+    return out
+
+
+def _fit(sections: list[tuple[str, list[str]]], max_chars: int, removed: dict[str, int]) -> list[list[str]]:
+    # Whole sections by rank while they fit, then the head of the best-ranked ones left over
+    sizes = [sum(len(line) + 1 for line in lines) + 1 for _, lines in sections]
+    if sum(sizes) <= max_chars:
+        return [lines for _, lines in sections]
+
+    kept: list[list[str]] = [[] for _ in sections]
+    budget = max_chars
+    order = sorted(range(len(sections)), key=lambda i: (_SECTION_RANK.get(sections[i][0], len(_SECTION_RANK)), i))
+    for i in order:
+        if sizes[i] <= budget:
+            kept[i] = sections[i][1]
+            budget -= sizes[i]
+    for i in order:
+        lines = sections[i][1]
+        if kept[i]:
+            continue
+        if budget >= _MIN_PARTIAL_CHARS:
+            used = 1
+            for line in lines:
+                if used + len(line) + 1 > budget:
+                    break
+                kept[i].append(line)
+                used += len(line) + 1
+            budget -= used
+        _count(removed, "budget", len(lines) - len(kept[i]))
+    return kept
+
+
+def compact_resume_text(text: str, max_chars: int | None = None) -> CompactionResult:
+    max_chars = max_chars or settings.llm_prompt_max_chars
+    baseline = (text or "").strip()[:max_chars]
+    removed: dict[str, int] = {}
+
+    lines = _drop_headers_footers(_pages(text or ""), removed)
+    sections = []
+    for kind, section_lines in _sections(lines):
+        if kind in _DROP_SECTIONS:
+            _count(removed, f"section:{kind}", sum(1 for line in section_lines if line))
+            continue
+        cleaned = _clean_section(kind, section_lines, removed)
+        if cleaned:
+            sections.append((kind, cleaned))
+
+    kept = _fit(sections, max_chars, removed)
+    compacted = "\n\n".join("\n".join(lines) for lines in kept if lines).strip()
+    if not compacted:
+        # Nothing recognizable survived; send what was sent before rather than nothing
+        compacted = baseline
+
+    return CompactionResult(
+        text=compacted,
+        chars_before=len(baseline),
+        chars_after=len(compacted),
+        tokens_before=estimate_tokens(baseline),
+        tokens_after=estimate_tokens(compacted),
+        removed=removed,
+    )
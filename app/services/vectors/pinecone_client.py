@@ -1,13 +1,97 @@
-from pinecone import Pinecone
+from __future__ import annotations
+
+import asyncio
+import threading
+import traceback
+import weakref
+from typing import TYPE_CHECKING
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from pinecone import Pinecone
 
-def get_index():
+# One client / index handle per process so HTTP connections (and TLS sessions) are reused
+_client: Pinecone | None = None
+_index = None
+# The asyncio index's HTTP session belongs to one loop: one handle per loop
+_async_indexes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _check_config() -> None:
     if not settings.pinecone_api_key:
         raise ValueError("PINECONE_API_KEY is not set")
     if not settings.pinecone_index_host:
         raise ValueError("PINECONE_INDEX_HOST is not set")
 
-    pc = Pinecone(api_key=settings.pinecone_api_key)
-    return pc.Index(host=settings.pinecone_index_host)
\ No newline at end of file
+
+def get_client() -> Pinecone:
+    global _client
+    _check_config()
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from pinecone import Pinecone
+
+                _client = Pinecone(api_key=settings.pinecone_api_key)
+    return _client
+
+
+def get_index():
+    global _index
+    if _index is None:
+        pc = get_client()
+        with _lock:
+            if _index is None:
+                _index = pc.Index(
+                    host=settings.pinecone_index_host,
+                    pool_threads=settings.pinecone_pool_threads,
+                    connection_pool_maxsize=settings.pinecone_connection_pool_maxsize,
+                )
+    return _index
+
+
+def get_async_index():
+    # asyncio index (requires pinecone[asyncio]); its HTTP session is bound to the running loop
+    loop = asyncio.get_running_loop()
+    index = _async_indexes.get(loop)
+    if index is None:
+        pc = get_client()
+        with _lock:
+            index = _async_indexes.get(loop)
+            if index is None:
+                index = _async_indexes[loop] = pc.IndexAsyncio(host=settings.pinecone_index_host)
+    return index
+
+
+def _close_quietly(obj) -> None:
+    try:
+        close = getattr(obj, "close", None)
+        if callable(close):
+            close()
+        elif hasattr(obj, "__exit__"):
+            obj.__exit__(None, None, None)
+    except Exception:
+        print(traceback.format_exc())
+
+
+def close_index() -> None:
+    global _client, _index
+    with _lock:
+        if _index is not None:
+            _close_quietly(_index)
+        _index = None
+        _client = None
+
+
+async def aclose_index() -> None:
+    # Closes the current loop's asyncio index, then the shared client (API shutdown)
+    with _lock:
+        index = _async_indexes.pop(asyncio.get_running_loop(), None)
+    if index is not None:
+        try:
+            await index.close()
+        except Exception:
+            print(traceback.format_exc())
+    close_index()
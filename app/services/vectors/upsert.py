@@ -1,5 +1,34 @@
 from typing import Any
 
+from app.core.config import settings
+
+
+def upsert_vectors_batched(
+    index: Any,
+    namespace: str,
+    vectors: list[dict],
+    batch_size: int | None = None,
+    max_concurrency: int | None = None,
+) -> None:
+    # Batches go out in parallel on the index's connection pool, at most max_concurrency at a time
+    batch_size = max(1, batch_size or settings.pinecone_upsert_batch_size)
+    max_concurrency = max(1, max_concurrency or settings.pinecone_upsert_concurrency)
+
+    batches = [vectors[i : i + batch_size] for i in range(0, len(vectors), batch_size)]
+    if len(batches) <= 1 or max_concurrency == 1:
+        for batch in batches:
+            index.upsert(vectors=batch, namespace=namespace)
+        return
+
+    for start in range(0, len(batches), max_concurrency):
+        window = [
+            index.upsert(vectors=batch, namespace=namespace, async_req=True)
+            for batch in batches[start : start + max_concurrency]
+        ]
+        for res in window:
+            res.get()
+
+
 def upsert_file_chunks(
     index: Any,
     namespace: str,
@@ -14,30 +43,45 @@ def upsert_file_chunks(
     file_name = file_meta.get("name")
     mime_type = file_meta.get("mimeType")
 
-    total = len(vectors)
-    for start in range(0, total, batch_size):
-        end = min(start + batch_size, total)
-        payload = []
-
-        for i in range(start, end):
-            chunk_index = chunk_index_offset + i
-            payload.append(
-                {
-                    "id": f"{job_id}:{file_id}:{chunk_index}",
-                    "values": vectors[i],
-                    "metadata": {
-                        "job_id": job_id,
-                        "file_id": file_id,
-                        "file_name": file_name,
-                        "mime_type": mime_type,
-                        "chunk_index": chunk_index,
-                        "text_preview": chunks[i][:200],
-                        "source": "gdrive",
-                    },
-                }
-            )
-
-        index.upsert(vectors=payload, namespace=namespace)
+    payload = []
+    for i in range(len(vectors)):
+        chunk_index = chunk_index_offset + i
+        payload.append(
+            {
+                "id": f"{job_id}:{file_id}:{chunk_index}",
+                "values": vectors[i],
+                "metadata": {
+                    "job_id": job_id,
+                    "file_id": file_id,
+                    "file_name": file_name,
+                    "mime_type": mime_type,
+                    "chunk_index": chunk_index,
+                    "text_preview": chunks[i][:200],
+                    "source": "gdrive",
+                },
+            }
+        )
+
+    upsert_vectors_batched(index, namespace, payload, batch_size=batch_size)
+
+
+def resume_embedding_vector(
+    file_id: str,
+    file_name: str,
+    vector: list[float],
+    job_id: str | None = None,
+) -> dict:
+    # One vector per file, keyed by the ingested_files row id
+    return {
+        "id": file_id,
+        "values": vector,
+        "metadata": {
+            "file_id": file_id,
+            "file_name": file_name,
+            "job_id": job_id,
+            "source": "resume_overall_summary",
+        },
+    }
 
 
 def upsert_resume_embedding(
@@ -48,16 +92,5 @@ def upsert_resume_embedding(
     vector: list[float],
     job_id: str | None = None,
 ) -> None:
-    payload = [
-        {
-            "id": file_id,
-            "values": vector,
-            "metadata": {
-                "file_id": file_id,
-                "file_name": file_name,
-                "job_id": job_id,
-                "source": "resume_overall_summary",
-            },
-        }
-    ]
+    payload = [resume_embedding_vector(file_id, file_name, vector, job_id)]
     index.upsert(vectors=payload, namespace=namespace)
\ No newline at end of file
@@ -1,10 +1,158 @@
+import traceback
+
+from celery import chain, chord
+from celery.exceptions import SoftTimeLimitExceeded
+
 from app.celery_app import celery_app
-from app.workers.ingest_worker import run_ingest_job
+from app.core.config import settings
+from app.workers.ingest_worker import (
+    finalize_ingest_job,
+    prepare_fanout_job,
+    record_stage_failure,
+    run_embed_upsert_stage,
+    run_enrich_profile,
+    run_extract_stage,
+    run_ingest_batch,
+    run_ingest_job,
+    run_profile_stage,
+)
 
 
 @celery_app.task(name="app.tasks.ingest.ingest_job", bind=True, max_retries=2)
-def ingest_job(self, job_id: str, namespace: str) -> None:
+def ingest_job(self, job_id: str, namespace: str, continuation: bool = False) -> None:
+    if settings.ingest_fanout_enabled:
+        _fan_out(job_id, namespace)
+        return
+
     try:
-        run_ingest_job(job_id, namespace)
+        finished = run_ingest_job(job_id, namespace, continuation=continuation)
+    except SoftTimeLimitExceeded:
+        # Raised outside the coroutine, which flushed its rows when run_async cancelled it
+        finished = False
     except Exception as exc:
         raise self.retry(exc=exc, countdown=10)
+
+    if not finished:
+        # Time budget used up: pick up from the checkpoints in a fresh task (not a retry)
+        ingest_job.apply_async(
+            args=[job_id, namespace],
+            kwargs={"continuation": True},
+            queue="ingest",
+        )
+
+
+def _fan_out(job_id: str, namespace: str) -> None:
+    # Parent only lists; per-file batches run on any worker node and a chord callback finalizes the job
+    files = prepare_fanout_job(job_id)
+    if files is None:
+        return
+
+    size = max(1, settings.ingest_fanout_batch_size)
+    batches = [files[i : i + size] for i in range(0, len(files), size)]
+    if not batches:
+        finalize_job.apply_async(args=[[], job_id], queue="ingest")
+        return
+
+    if settings.ingest_stage_queues_enabled:
+        # One chain per file; queues come from task_routes
+        header = [
+            chain(extract_file.s(job_id, namespace, f), profile_file.s(), embed_upsert_file.s())
+            for f in files
+        ]
+    else:
+        header = [ingest_file_batch.s(job_id, namespace, batch).set(queue="ingest") for batch in batches]
+
+    # A header task that dies (hard time limit, worker lost) fails the chord and the callback
+    # never runs; the errback still finalizes the job
+    callback = finalize_job.s(job_id).set(queue="ingest")
+    callback.link_error(finalize_job_on_error.s(job_id).set(queue="ingest"))
+    chord(header)(callback)
+
+
+@celery_app.task(
+    name="app.tasks.ingest.ingest_file_batch",
+    bind=True,
+    max_retries=settings.ingest_file_max_retries,
+)
+def ingest_file_batch(self, job_id: str, namespace: str, files: list[dict]) -> dict:
+    try:
+        return run_ingest_batch(job_id, namespace, files)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            # Never fail the chord header: report the error so finalize_job marks the job failed
+            return {"files": len(files), "succeeded": 0, "failed": len(files), "error": str(exc)}
+        raise self.retry(exc=exc, countdown=min(300, 10 * 2 ** self.request.retries))
+
+
+def _retry_or_report(task, exc: Exception, payload: dict, f: dict | None) -> dict:
+    if task.request.retries >= task.max_retries:
+        if f:
+            # Called from the except block: mark the file failed, nothing later in the chain will
+            try:
+                record_stage_failure(payload["job_id"], f, traceback.format_exc())
+            except Exception:
+                print(traceback.format_exc(), flush=True)
+        return {**payload, "file": None, "error": str(exc)}
+    raise task.retry(exc=exc, countdown=min(300, 10 * 2 ** task.request.retries))
+
+
+@celery_app.task(
+    name="app.tasks.ingest.extract_file",
+    bind=True,
+    max_retries=settings.ingest_file_max_retries,
+)
+def extract_file(self, job_id: str, namespace: str, f: dict) -> dict:
+    try:
+        return run_extract_stage(job_id, namespace, f)
+    except Exception as exc:
+        return _retry_or_report(self, exc, {"job_id": job_id, "namespace": namespace}, f)
+
+
+@celery_app.task(
+    name="app.tasks.ingest.profile_file",
+    bind=True,
+    max_retries=settings.ingest_file_max_retries,
+)
+def profile_file(self, payload: dict) -> dict:
+    try:
+        return run_profile_stage(payload)
+    except Exception as exc:
+        return _retry_or_report(self, exc, payload, payload.get("file"))
+
+
+@celery_app.task(
+    name="app.tasks.ingest.embed_upsert_file",
+    bind=True,
+    max_retries=settings.ingest_file_max_retries,
+)
+def embed_upsert_file(self, payload: dict) -> dict:
+    try:
+        return run_embed_upsert_stage(payload)
+    except Exception as exc:
+        return _retry_or_report(self, exc, payload, payload.get("file"))
+
+
+@celery_app.task(
+    name="app.tasks.ingest.enrich_profile",
+    bind=True,
+    max_retries=settings.ingest_enrich_max_retries,
+)
+def enrich_profile(self, file_id: str, namespace: str) -> str:
+    # Shadow profiling: the file is already searchable, so failing here only means it keeps
+    # its heuristic profile; back off generously (Groq outages are what this mode rides out)
+    try:
+        return run_enrich_profile(file_id, namespace)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            return "failed"
+        raise self.retry(exc=exc, countdown=min(1800, 30 * 2 ** self.request.retries))
+
+
+@celery_app.task(name="app.tasks.ingest.finalize_job")
+def finalize_job(batch_results: list[dict], job_id: str) -> None:
+    finalize_ingest_job(job_id, batch_results)
+
+
+@celery_app.task(name="app.tasks.ingest.finalize_job_on_error")
+def finalize_job_on_error(request, exc, tb, job_id: str) -> None:
+    finalize_ingest_job(job_id, [{"error": str(exc)}])
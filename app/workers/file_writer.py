@@ -0,0 +1,311 @@
+import time
+import traceback
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import func, literal_column, null, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import StageTimings, count_files, observe_stage
+from app.db.models.file import File
+from app.db.models.job import Job
+from app.services.jobs.events import progress_event, publish_job_events
+
+_CONFLICT_COLS = ["job_id", "gdrive_file_id"]
+# Terminal file status -> ingestion_jobs counter column
+_COUNTER_COLS = {
+    "succeeded": "succeeded_files",
+    "failed": "failed_files",
+    "skipped": "skipped_files",
+}
+_EMPTY_JSONB = literal_column("'{}'::jsonb")
+
+
+def file_row_id(job_id: uuid.UUID, gdrive_file_id: str) -> uuid.UUID:
+    # Deterministic, so a retry (crash, soft time limit, redelivery) before the row was
+    # flushed gets the same id as the Pinecone vector it may already have upserted
+    return uuid.uuid5(job_id, gdrive_file_id)
+
+
+@dataclass
+class FileState:
+    id: uuid.UUID
+    status: str
+    # Last checkpoint reached: extracted -> profiled -> succeeded
+    stage: str | None = None
+    # Which builder produced the stored profile: heuristic | llm
+    profile_tier: str | None = None
+
+
+async def load_file_states(
+    session: AsyncSession,
+    job_id: uuid.UUID,
+    gdrive_file_ids: list[str] | None = None,
+) -> dict[str, FileState]:
+    # Every existing row for the job (or for a fan-out batch) in one query,
+    # instead of a SELECT per listed file
+    stmt = select(File.gdrive_file_id, File.id, File.status, File.stage, File.profile_tier).where(
+        File.job_id == job_id
+    )
+    if gdrive_file_ids is not None:
+        stmt = stmt.where(File.gdrive_file_id.in_(gdrive_file_ids))
+    result = await session.execute(stmt)
+    return {
+        gid: FileState(id=fid, status=status, stage=stage, profile_tier=tier)
+        for gid, fid, status, stage, tier in result.all()
+    }
+
+
+class FileRowWriter:
+    # Buffers ingested_files state changes and writes them as one
+    # INSERT ... ON CONFLICT (job_id, gdrive_file_id) per batch, instead of several commits per file.
+    def __init__(
+        self,
+        session: AsyncSession,
+        job_id: uuid.UUID,
+        flush_every: int = 25,
+        flush_interval_s: float = 5.0,
+        states: dict[str, FileState] | None = None,
+    ) -> None:
+        self.session = session
+        self.job_id = job_id
+        self.states = states if states is not None else {}
+        self.flush_every = max(1, flush_every)
+        self.flush_interval_s = flush_interval_s
+        self._pending: dict[str, dict[str, Any]] = {}
+        # Run once the rows buffered so far are committed (e.g. enqueue follow-up tasks)
+        self._after_flush: list[Callable[[], None]] = []
+        # Rows whose stored extracted_text is no longer needed (set to NULL on flush)
+        self._drop_text: set[str] = set()
+        self._last_flush = time.monotonic()
+        # Status as last written to the DB, to turn each flush into counter deltas
+        self._stored_status = {gid: state.status for gid, state in self.states.items()}
+
+    def status_of(self, gdrive_file_id: str) -> str | None:
+        state = self.states.get(gdrive_file_id)
+        return state.status if state is not None else None
+
+    def claim_row(self, gdrive_file_id: str) -> uuid.UUID:
+        # Existing rows keep their id (it is also the Pinecone vector id). New rows are only
+        # inserted by the next flush, possibly after their vector was upserted, so their id
+        # is derived from (job, Drive file) rather than random: see file_row_id.
+        state = self.states.get(gdrive_file_id)
+        if state is None:
+            state = FileState(id=file_row_id(self.job_id, gdrive_file_id), status="running")
+            self.states[gdrive_file_id] = state
+        return state.id
+
+    def stage_of(self, gdrive_file_id: str) -> str | None:
+        state = self.states.get(gdrive_file_id)
+        return state.stage if state is not None else None
+
+    def tier_of(self, gdrive_file_id: str) -> str | None:
+        state = self.states.get(gdrive_file_id)
+        return state.profile_tier if state is not None else None
+
+    def on_flush(self, callback: Callable[[], None]) -> None:
+        self._after_flush.append(callback)
+
+    async def load_checkpoint(self, gdrive_file_id: str) -> tuple[str | None, dict | None]:
+        # Stored text / profile of a partially processed file (pending buffer first, then DB)
+        pending = self._pending.get(gdrive_file_id)
+        if pending is not None and pending.get("extracted_text") is not None:
+            profile = pending.get("resume_profile")
+            return pending["extracted_text"], profile if isinstance(profile, dict) else None
+
+        result = await self.session.execute(
+            select(File.extracted_text, File.resume_profile).where(
+                File.job_id == self.job_id,
+                File.gdrive_file_id == gdrive_file_id,
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None, None
+        return row[0], row[1]
+
+    def record(
+        self,
+        *,
+        file_id: uuid.UUID,
+        gdrive_file_id: str,
+        name: str,
+        mime_type: str | None,
+        status: str,
+        error: str | None = None,
+        resume_profile: dict | None = None,
+        num_chunks: int | None = None,
+        stage: str | None = None,
+        extracted_text: str | None = None,
+        timings: StageTimings | None = None,
+        minhash: bytes | None = None,
+        lsh_bands: list[int] | None = None,
+        duplicate_of: uuid.UUID | None = None,
+        profile_tier: str | None = None,
+        keep_text: bool = False,
+    ) -> None:
+        # The text is only a checkpoint: a succeeded row drops it unless keep_text (shadow
+        # mode, until enrich_profile has built the LLM profile from it)
+        prev = self._pending.get(gdrive_file_id) or {}
+        timing_values = timings.as_dict() if timings is not None else None
+        if isinstance(prev.get("timings"), dict):
+            timing_values = {**prev["timings"], **(timing_values or {})}
+        if stage is None:
+            stage = self.stage_of(gdrive_file_id)
+        if status == "succeeded" and not keep_text:
+            extracted_text = None
+            self._drop_text.add(gdrive_file_id)
+        else:
+            self._drop_text.discard(gdrive_file_id)
+            if extracted_text is None:
+                extracted_text = prev.get("extracted_text")
+        if resume_profile is None and isinstance(prev.get("resume_profile"), dict):
+            resume_profile = prev["resume_profile"]
+        if num_chunks is None:
+            num_chunks = prev.get("num_chunks")
+        if minhash is None:
+            minhash, lsh_bands = prev.get("minhash"), prev.get("lsh_bands")
+        if duplicate_of is None:
+            duplicate_of = prev.get("duplicate_of")
+        if profile_tier is None:
+            profile_tier = self.tier_of(gdrive_file_id)
+
+        self.states[gdrive_file_id] = FileState(id=file_id, status=status, stage=stage, profile_tier=profile_tier)
+        self._pending[gdrive_file_id] = {
+            "id": file_id,
+            "job_id": self.job_id,
+            "gdrive_file_id": gdrive_file_id,
+            "name": name,
+            "mime_type": mime_type,
+            "status": status,
+            "error": error,
+            # SQL NULL, not JSON 'null', so the coalesce below keeps an existing profile
+            "resume_profile": resume_profile if resume_profile is not None else null(),
+            "num_chunks": num_chunks,
+            "stage": stage,
+            "extracted_text": extracted_text,
+            "timings": timing_values if timing_values is not None else null(),
+            "minhash": minhash,
+            "lsh_bands": lsh_bands,
+            "duplicate_of": duplicate_of,
+            "profile_tier": profile_tier,
+            "created_at": datetime.utcnow(),
+        }
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def pending_rows(self) -> list[dict[str, Any]]:
+        # Buffered rows not yet flushed (e.g. for dedup lookups that must see them)
+        return list(self._pending.values())
+
+    async def maybe_flush(self) -> None:
+        if len(self._pending) >= self.flush_every or (
+            self._pending and time.monotonic() - self._last_flush >= self.flush_interval_s
+        ):
+            await self.flush()
+
+    def _counter_deltas(self, rows: list[dict[str, Any]]) -> dict[str, int]:
+        deltas: dict[str, int] = {}
+        for row in rows:
+            old = self._stored_status.get(row["gdrive_file_id"])
+            new = row["status"]
+            if old == new:
+                continue
+            if old in _COUNTER_COLS:
+                col = _COUNTER_COLS[old]
+                deltas[col] = deltas.get(col, 0) - 1
+            if new in _COUNTER_COLS:
+                col = _COUNTER_COLS[new]
+                deltas[col] = deltas.get(col, 0) + 1
+        return {col: d for col, d in deltas.items() if d}
+
+    async def flush(self) -> None:
+        rows = list(self._pending.values())
+        progress = None
+        start = time.perf_counter()
+        if rows:
+            stmt = pg_insert(File).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=_CONFLICT_COLS,
+                set_={
+                    "name": stmt.excluded.name,
+                    "mime_type": stmt.excluded.mime_type,
+                    "status": stmt.excluded.status,
+                    "error": stmt.excluded.error,
+                    # A failure after an earlier success keeps the stored profile
+                    "resume_profile": func.coalesce(stmt.excluded.resume_profile, File.resume_profile),
+                    "num_chunks": func.coalesce(stmt.excluded.num_chunks, File.num_chunks),
+                    "stage": stmt.excluded.stage,
+                    "extracted_text": func.coalesce(stmt.excluded.extracted_text, File.extracted_text),
+                    "minhash": func.coalesce(stmt.excluded.minhash, File.minhash),
+                    "lsh_bands": func.coalesce(stmt.excluded.lsh_bands, File.lsh_bands),
+                    "duplicate_of": func.coalesce(stmt.excluded.duplicate_of, File.duplicate_of),
+                    "profile_tier": func.coalesce(stmt.excluded.profile_tier, File.profile_tier),
+                    # Stage tasks each time their own stages; merge into what is stored
+                    "timings": func.coalesce(File.timings, _EMPTY_JSONB).op("||")(
+                        func.coalesce(stmt.excluded.timings, _EMPTY_JSONB)
+                    ),
+                },
+            )
+            await self.session.execute(stmt)
+            if self._drop_text:
+                await self.session.execute(
+                    update(File)
+                    .where(File.job_id == self.job_id, File.gdrive_file_id.in_(self._drop_text))
+                    .values(extracted_text=None)
+                    .execution_options(synchronize_session=False)
+                )
+
+            # Same transaction as the file rows, as relative updates so concurrent
+            # fan-out batches of one job don't overwrite each other's counts
+            deltas = self._counter_deltas(rows)
+            if deltas:
+                result = await self.session.execute(
+                    update(Job)
+                    .where(Job.id == self.job_id)
+                    .values({col: getattr(Job, col) + d for col, d in deltas.items()})
+                    .returning(Job.total_files, Job.succeeded_files, Job.failed_files, Job.skipped_files)
+                    .execution_options(synchronize_session=False)
+                )
+                counts = result.one_or_none()
+                if counts is not None:
+                    progress = progress_event(self.job_id, *counts)
+
+        await self.session.commit()
+        self._pending.clear()
+        self._drop_text.clear()
+        self._last_flush = time.monotonic()
+
+        if rows:
+            observe_stage("db", time.perf_counter() - start)
+            for row in rows:
+                if row["status"] in _COUNTER_COLS and self._stored_status.get(row["gdrive_file_id"]) != row["status"]:
+                    count_files(row["status"])
+                self._stored_status[row["gdrive_file_id"]] = row["status"]
+            events = [
+                {
+                    "type": "file",
+                    "job_id": str(self.job_id),
+                    "file_id": str(row["id"]),
+                    "gdrive_file_id": row["gdrive_file_id"],
+                    "name": row["name"],
+                    "status": row["status"],
+                    "stage": row["stage"],
+                }
+                for row in rows
+            ]
+            if progress is not None:
+                events.append(progress)
+            publish_job_events(self.job_id, events)
+
+        callbacks, self._after_flush = self._after_flush, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                print(traceback.format_exc(), flush=True)
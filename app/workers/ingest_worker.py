@@ -1,218 +1,878 @@
 import asyncio
+import time
 import traceback
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
 
-from sqlalchemy import select
+from celery.exceptions import SoftTimeLimitExceeded
+from sqlalchemy import BigInteger, bindparam, func, literal, select, update
+from sqlalchemy import text as sql_text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 
+from app.celery_app import celery_app
+from app.core.metrics import StageTimings, track_stage
 from app.db.models.file import File
 from app.db.models.job import Job
-from app.db.session import AsyncSessionLocal
-from app.services.gdrive.client import get_drive_service
-from app.services.gdrive.listing import list_files_in_folder
+from app.services.gdrive.async_client import AsyncDriveClient, get_async_drive_client
 from app.services.gdrive.parse import extract_folder_id
+from app.services.processing.dedup import (
+    lsh_band_keys,
+    minhash_signature,
+    signature_bytes,
+    signature_from_bytes,
+    similarity,
+)
 from app.services.processing.embeddings import embed_texts
-from app.services.processing.text_extract import get_text_for_drive_file
+from app.services.jobs.events import job_event, publish_job_events
+from app.services.processing.text_extract import (
+    UnsupportedMimeType,
+    check_drive_mime_type,
+    download_drive_file,
+    text_from_drive_bytes,
+)
 from app.core.config import settings
 from app.services.resume.profile_builder import build_resume_profile
+from app.services.llm.router import backend_name, llm_available
 from app.services.resume.llm_profile_builder import llm_build_resume_profile
+from app.services.resume.profile_schema import ResumeProfile
 from app.services.vectors.pinecone_client import get_index
 from app.services.vectors.upsert import upsert_resume_embedding
-
-async def _run_ingest_job(job_id: uuid.UUID, namespace: str) -> None:
-    async with AsyncSessionLocal() as session:
+from app.workers.file_writer import FileRowWriter, load_file_states
+from app.workers.lifecycle import run_async, worker_session
+
+SHORTCUT_MIME = "application/vnd.google-apps.shortcut"
+MAX_PDF_BYTES = 15 * 1024 * 1024
+# Statuses a (re)run does not process again
+DONE_STATUSES = ("succeeded", "skipped")
+
+
+def _profile_json(profile: ResumeProfile) -> dict:
+    # Vectors must be stored only in Pinecone, never in Postgres.
+    return profile.model_dump(
+        mode="json",
+        exclude_none=True,
+        exclude={"overall_summary_embedding"},
+    )
+
+
+def _file_row(writer: FileRowWriter, file_meta: dict) -> dict:
+    gdrive_file_id = file_meta["id"]
+    return {
+        "file_id": writer.claim_row(gdrive_file_id),
+        "gdrive_file_id": gdrive_file_id,
+        "name": file_meta.get("name") or "",
+        "mime_type": file_meta.get("mimeType"),
+        # Filled in by the stages below and stored with every record() of this file
+        "timings": StageTimings(),
+    }
+
+
+def _check_size(file_meta: dict) -> None:
+    size = int(file_meta.get("size") or 0)
+    if file_meta.get("mimeType") == "application/pdf" and size > MAX_PDF_BYTES:
+        raise ValueError(f"PDF too large ({size} bytes), skipping to avoid OOM/crash")
+
+
+async def _extract_stage(
+    drive: AsyncDriveClient,
+    writer: FileRowWriter,
+    row: dict,
+    file_meta: dict,
+    download: asyncio.Task | None = None,
+) -> str:
+    _check_size(file_meta)
+
+    timings: StageTimings = row["timings"]
+    # A download started ahead (_DownloadsAhead) only costs what is left of it here
+    with timings.stage("download"):
+        raw = await (download if download is not None else download_drive_file(drive, file_meta))
+    # Off the loop, so downloads of the next files keep going during OCR / parsing
+    text = await asyncio.to_thread(text_from_drive_bytes, raw, file_meta, timings)
+    writer.record(**row, status="running", stage="extracted", extracted_text=text)
+    await writer.maybe_flush()
+    return text
+
+
+@dataclass
+class Canonical:
+    id: uuid.UUID
+    job_id: uuid.UUID
+    name: str
+    resume_profile: dict
+    profile_tier: str | None
+    similarity: float
+
+
+async def _find_canonical(writer: FileRowWriter, file_id: uuid.UUID, signature, bands: list[int]) -> Canonical | None:
+    # Best already-succeeded, non-duplicate file sharing an LSH band and above the threshold.
+    # Rows still buffered in the writer count too, so copies close together in a folder match.
+    candidates: list[tuple] = [
+        (r["id"], r["job_id"], r["name"], r["resume_profile"], r["profile_tier"], r["minhash"])
+        for r in writer.pending_rows()
+        if r["status"] == "succeeded"
+        and r["duplicate_of"] is None
+        and r["minhash"] is not None
+        and isinstance(r["resume_profile"], dict)
+        and set(r["lsh_bands"] or ()) & set(bands)
+    ]
+    result = await writer.session.execute(
+        select(File.id, File.job_id, File.name, File.resume_profile, File.profile_tier, File.minhash)
+        .where(
+            File.lsh_bands.overlap(bands),
+            File.status == "succeeded",
+            File.duplicate_of.is_(None),
+            File.resume_profile.isnot(None),
+            File.id != file_id,
+        )
+        # Most shared band keys first: template-heavy resumes share common bands, and the
+        # true match must not fall outside an arbitrary 50
+        .order_by(
+            sql_text(
+                "cardinality(array(SELECT unnest(ingested_files.lsh_bands) INTERSECT SELECT unnest(:bands))) DESC"
+            ).bindparams(bindparam("bands", bands, type_=ARRAY(BigInteger)))
+        )
+        .limit(50)
+    )
+    candidates.extend(result.all())
+
+    best: Canonical | None = None
+    for cid, job_id, name, profile, tier, minhash in candidates:
+        if cid == file_id or not minhash:
+            continue
+        score = similarity(signature, signature_from_bytes(minhash))
+        if score >= settings.dedup_threshold and (best is None or score > best.similarity):
+            best = Canonical(
+                id=cid, job_id=job_id, name=name, resume_profile=profile, profile_tier=tier, similarity=score
+            )
+    return best
+
+
+def _reuse_canonical_vector(namespace: str, canonical: Canonical) -> None:
+    # The candidate keeps one vector (the canonical's); only write it when this namespace lacks it
+    if not (settings.pinecone_api_key and settings.pinecone_index_host):
+        raise ValueError("Pinecone is not configured (missing PINECONE_API_KEY or PINECONE_INDEX_HOST)")
+
+    index = get_index()
+    vector_id = str(canonical.id)
+    fetched = index.fetch(ids=[vector_id], namespace=namespace)
+    if vector_id in (getattr(fetched, "vectors", None) or {}):
+        return
+
+    summary = (canonical.resume_profile.get("overall_summary") or "").strip()
+    if not summary:
+        raise ValueError("canonical profile has no overall_summary; cannot embed")
+    upsert_resume_embedding(
+        index=index,
+        namespace=namespace,
+        file_id=vector_id,
+        file_name=canonical.name,
+        vector=embed_texts([summary])[0],
+        job_id=str(canonical.job_id),
+    )
+
+
+async def _dedup_stage(writer: FileRowWriter, row: dict, namespace: str, text: str) -> bool:
+    # Runs after extraction. A near-duplicate of an already ingested resume is linked to it
+    # and reuses its profile and vector (no LLM / embedding); returns True when the file is done.
+    if not settings.dedup_enabled:
+        return False
+
+    timings: StageTimings = row["timings"]
+    with timings.stage("dedup"):
+        signature = minhash_signature(text)
+        if signature is None:
+            return False
+        bands = lsh_band_keys(signature)
+        canonical = await _find_canonical(writer, row["file_id"], signature, bands)
+
+    fingerprint = {"minhash": signature_bytes(signature), "lsh_bands": bands}
+    if canonical is not None:
+        try:
+            with timings.stage("upsert", "reuse"):
+                await asyncio.to_thread(_reuse_canonical_vector, namespace, canonical)
+        except SoftTimeLimitExceeded:
+            raise
+        except Exception:
+            # Dedup is only a shortcut: fall back to processing the file on its own
+            print(traceback.format_exc(), flush=True)
+            canonical = None
+
+    if canonical is None:
+        writer.record(**row, status="running", stage="extracted", **fingerprint)
+        await writer.maybe_flush()
+        return False
+
+    print(
+        f"DUPLICATE name={row['name']!r} of={canonical.name!r} similarity={canonical.similarity:.2f}",
+        flush=True,
+    )
+    writer.record(
+        **row,
+        status="succeeded",
+        stage="succeeded",
+        resume_profile=canonical.resume_profile,
+        profile_tier=canonical.profile_tier,
+        num_chunks=0,
+        duplicate_of=canonical.id,
+        **fingerprint,
+    )
+    await writer.maybe_flush()
+    return True
+
+
+def _shadow_profiling() -> bool:
+    return bool(settings.ingest_shadow_profiling and llm_available("profile"))
+
+
+async def _profile_stage(writer: FileRowWriter, row: dict, text: str) -> ResumeProfile:
+    timings: StageTimings = row["timings"]
+    tier = "heuristic"
+    try:
+        if llm_available("profile") and not _shadow_profiling():
+            with timings.stage("llm", backend_name("profile")):
+                profile = await llm_build_resume_profile(text, timings)
+            tier = "llm"
+        else:
+            # Shadow mode: go live with this profile now, enrich_profile upgrades it later
+            with timings.stage("llm", "heuristic"):
+                profile = build_resume_profile(text)
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception:
+        with timings.stage("llm", "heuristic"):
+            profile = build_resume_profile(text)
+
+    writer.record(
+        **row,
+        status="running",
+        stage="profiled",
+        resume_profile=_profile_json(profile),
+        profile_tier=tier,
+    )
+    await writer.maybe_flush()
+    return profile
+
+
+def _queue_enrichment(file_id: uuid.UUID, namespace: str) -> None:
+    # By name: the task module imports this one
+    celery_app.send_task(
+        "app.tasks.ingest.enrich_profile",
+        args=[str(file_id), namespace],
+        queue=settings.ingest_queue_enrich,
+        priority=settings.ingest_enrich_priority,
+    )
+
+
+async def _embed_upsert_stage(
+    writer: FileRowWriter,
+    row: dict,
+    job_id: uuid.UUID,
+    namespace: str,
+    profile: ResumeProfile,
+) -> bool:
+    timings: StageTimings = row["timings"]
+    try:
+        if profile.overall_summary and profile.overall_summary.strip():
+            with timings.stage("embed"):
+                profile.overall_summary_embedding = embed_texts(
+                    [profile.overall_summary.strip()]
+                )[0]
+        else:
+            profile.overall_summary_embedding = []
+    except Exception:
+        profile.overall_summary_embedding = []
+
+    try:
+        if not (settings.pinecone_api_key and settings.pinecone_index_host):
+            raise ValueError("Pinecone is not configured (missing PINECONE_API_KEY or PINECONE_INDEX_HOST)")
+
+        if not (profile.overall_summary_embedding and len(profile.overall_summary_embedding) > 0):
+            raise ValueError("overall_summary_embedding is empty; cannot upsert to Pinecone")
+
+        index = get_index()
+        with timings.stage("upsert"):
+            upsert_resume_embedding(
+                index=index,
+                namespace=namespace,
+                file_id=str(row["file_id"]),
+                file_name=row["name"],
+                vector=profile.overall_summary_embedding,
+                job_id=str(job_id),
+            )
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception:
+        # On Pinecone failure, do NOT store vectors in Postgres.
+        profile.overall_summary_embedding = []
+        writer.record(
+            **row,
+            status="failed",
+            error="Pinecone upsert failed:\n" + traceback.format_exc(),
+            resume_profile=_profile_json(profile),
+        )
+        await writer.maybe_flush()
+        return False
+
+    # Pinecone upsert succeeded; clear embedding so it is never persisted to Postgres.
+    profile.overall_summary_embedding = []
+
+    enrich = _shadow_profiling() and writer.tier_of(row["gdrive_file_id"]) == "heuristic"
+    writer.record(
+        **row,
+        status="succeeded",
+        stage="succeeded",
+        resume_profile=_profile_json(profile),
+        num_chunks=0,
+        keep_text=enrich,
+    )
+    if enrich:
+        # Searchable from the next flush on; enrichment must only see committed rows
+        file_id = row["file_id"]
+        writer.on_flush(lambda: _queue_enrichment(file_id, namespace))
+    await writer.maybe_flush()
+    return True
+
+
+async def _process_file(
+    drive: AsyncDriveClient,
+    writer: FileRowWriter,
+    job_id: uuid.UUID,
+    namespace: str,
+    file_meta: dict,
+    download: asyncio.Task | None = None,
+) -> None:
+    gdrive_file_id = file_meta["id"]
+    name = file_meta.get("name") or ""
+    mime_type = file_meta.get("mimeType")
+
+    size = int(file_meta.get("size") or 0)
+    print(
+        f"PROCESSING name={name!r} mime={mime_type!r} size={size}",
+        flush=True,
+    )
+
+    row = _file_row(writer, file_meta)
+    stage = writer.stage_of(gdrive_file_id)
+
+    try:
+        # Resume from the last checkpoint of this file, if any
+        text: str | None = None
+        profile: ResumeProfile | None = None
+        if stage in ("extracted", "profiled"):
+            text, stored_profile = await writer.load_checkpoint(gdrive_file_id)
+            if stage == "profiled" and stored_profile:
+                profile = ResumeProfile.model_validate(stored_profile)
+
+        if text is None:
+            text = await _extract_stage(drive, writer, row, file_meta, download)
+
+        if profile is None:
+            if await _dedup_stage(writer, row, namespace, text):
+                return
+            profile = await _profile_stage(writer, row, text)
+
+        await _embed_upsert_stage(writer, row, job_id, namespace, profile)
+
+    except SoftTimeLimitExceeded:
+        raise
+    except UnsupportedMimeType as e:
+        writer.record(**row, status="skipped", error=str(e))
+        await writer.maybe_flush()
+    except Exception:
+        writer.record(**row, status="failed", error=traceback.format_exc())
+        await writer.maybe_flush()
+
+
+async def _resolve_listed_files(
+    drive: AsyncDriveClient,
+    writer: FileRowWriter,
+    files: list[dict],
+    done_statuses: tuple[str, ...] = DONE_STATUSES,
+) -> list[dict]:
+    # Metadata of the real files still to process, in listing order; shortcut targets are
+    # fetched with batch requests. Done files and broken shortcuts are left out.
+    todo: list[dict] = []
+    for f in files:
+        original_file_id = f.get("id")
+        target_id = original_file_id
+        if f.get("mimeType") == SHORTCUT_MIME:
+            target_id = (f.get("shortcutDetails") or {}).get("targetId")
+        if target_id and writer.status_of(target_id) in done_statuses:
+            continue
+        if "failed" in done_statuses and original_file_id and writer.status_of(original_file_id) == "failed":
+            continue
+        todo.append(f)
+
+    target_ids = [
+        (f.get("shortcutDetails") or {}).get("targetId")
+        for f in todo
+        if f.get("mimeType") == SHORTCUT_MIME and (f.get("shortcutDetails") or {}).get("targetId")
+    ]
+    try:
+        targets = await drive.get_files(target_ids) if target_ids else {}
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception as e:
+        # A failed batch call fails its shortcuts, not the job
+        targets = {target_id: e for target_id in target_ids}
+
+    resolved: list[dict] = []
+    seen: set[str] = set()
+    for f in todo:
+        file_meta = f
+        # Shortcut resolution must not fail the whole job.
+        try:
+            if f.get("mimeType") == SHORTCUT_MIME:
+                target_id = (f.get("shortcutDetails") or {}).get("targetId")
+                if not target_id:
+                    raise ValueError("Drive shortcut missing targetId")
+
+                # the actual file metadata (this is the real resume)
+                file_meta = targets[target_id]
+                if isinstance(file_meta, Exception):
+                    raise file_meta
+        except Exception:
+            # Record failure on the shortcut itself (best-effort)
+            if f.get("id"):
+                writer.record(
+                    file_id=writer.claim_row(f["id"]),
+                    gdrive_file_id=f["id"],
+                    name=f.get("name") or "",
+                    mime_type=f.get("mimeType"),
+                    status="failed",
+                    error=traceback.format_exc(),
+                )
+                await writer.maybe_flush()
+            continue
+
+        # A file and shortcuts to it are processed once
+        if file_meta["id"] not in seen:
+            seen.add(file_meta["id"])
+            resolved.append(file_meta)
+    return resolved
+
+
+async def _resolve_listed_file(
+    drive: AsyncDriveClient,
+    writer: FileRowWriter,
+    f: dict,
+    done_statuses: tuple[str, ...] = DONE_STATUSES,
+) -> dict | None:
+    # Returns the real file's metadata, or None when it is already done / the shortcut is broken
+    resolved = await _resolve_listed_files(drive, writer, [f], done_statuses)
+    return resolved[0] if resolved else None
+
+
+class _DownloadsAhead:
+    # Downloads of the next `ahead` files run while the current one is extracted, profiled
+    # and upserted; the Drive client's quota limiter caps how many are in flight
+    def __init__(self, drive: AsyncDriveClient, writer: FileRowWriter, files: list[dict], ahead: int) -> None:
+        self.drive = drive
+        self.writer = writer
+        self.files = files
+        self.ahead = max(0, ahead)
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._next = 0
+
+    def _wanted(self, file_meta: dict) -> bool:
+        # Files resuming from a checkpoint, too large or of an unsupported type never download
+        if self.writer.stage_of(file_meta["id"]) in ("extracted", "profiled"):
+            return False
+        try:
+            _check_size(file_meta)
+            check_drive_mime_type(file_meta.get("mimeType") or "")
+        except ValueError:
+            return False
+        return True
+
+    def take(self, i: int) -> asyncio.Task | None:
+        # Starts the downloads up to i + ahead and hands over the one for file i
+        while self._next < len(self.files) and self._next <= i + self.ahead:
+            file_meta = self.files[self._next]
+            if self._wanted(file_meta):
+                self._tasks[self._next] = asyncio.create_task(download_drive_file(self.drive, file_meta))
+            self._next += 1
+        return self._tasks.pop(i, None)
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            if task.done() and not task.cancelled():
+                task.exception()  # retrieved, so asyncio does not log it
+            else:
+                task.cancel()
+        self._tasks.clear()
+
+
+async def _ingest_files(
+    drive: AsyncDriveClient,
+    writer: FileRowWriter,
+    job_id: uuid.UUID,
+    namespace: str,
+    files: list[dict],
+    done_statuses: tuple[str, ...] = DONE_STATUSES,
+    deadline: float | None = None,
+) -> bool:
+    # Returns False when the deadline (time.monotonic()) passed before all files were processed
+    resolved = await _resolve_listed_files(drive, writer, files, done_statuses)
+    downloads = _DownloadsAhead(drive, writer, resolved, settings.gdrive_download_ahead)
+    try:
+        for i, file_meta in enumerate(resolved):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            download = downloads.take(i)
+            try:
+                await _process_file(drive, writer, job_id, namespace, file_meta, download)
+            finally:
+                if download is not None:
+                    download.cancel()
+        return True
+    finally:
+        downloads.cancel()
+
+
+async def _run_ingest_job(job_id: uuid.UUID, namespace: str, continuation: bool = False) -> bool:
+    # Returns False when the time budget ran out and the job should continue in a new task.
+    started = time.monotonic()
+
+    async with worker_session() as session:
         result = await session.execute(select(Job).where(Job.id == job_id))
         job = result.scalar_one_or_none()
         if job is None:
-            return
+            return True
 
+        if not continuation or job.started_at is None:
+            job.started_at = datetime.utcnow()
         job.status = "running"
-        job.started_at = datetime.utcnow()
         job.error = None
         await session.commit()
-
-        any_failed = False
+        publish_job_events(job_id, [job_event(job_id, job.status)])
+
+        # Retries / continuations resume from here: finished files are skipped and
+        # partially processed ones restart from their last checkpoint.
+        writer = FileRowWriter(
+            session,
+            job_id,
+            flush_every=settings.ingest_db_flush_every,
+            flush_interval_s=settings.ingest_db_flush_interval_s,
+            states=await load_file_states(session, job_id),
+        )
+        done_statuses = (*DONE_STATUSES, "failed") if continuation else DONE_STATUSES
 
         try:
-            folder_id = extract_folder_id(job.folder_url)
-            service = get_drive_service()
-            files = list_files_in_folder(service, folder_id)
-
-            for f in files:
-                SHORTCUT_MIME = "application/vnd.google-apps.shortcut"
-                original_meta = f
-                original_file_id = original_meta.get("id")
-                original_name = original_meta.get("name") or ""
-                original_mime = original_meta.get("mimeType")
-
-                file_meta = f
-                mime_type = file_meta.get("mimeType")
-
-                # Shortcut resolution must not fail the whole job.
-                try:
-                    if mime_type == SHORTCUT_MIME:
-                        details = file_meta.get("shortcutDetails") or {}
-                        target_id = details.get("targetId")
-                        if not target_id:
-                            raise ValueError("Drive shortcut missing targetId")
-
-                        # fetch the actual file metadata (this is the real resume)
-                        file_meta = (
-                            service.files()
-                            .get(fileId=target_id, fields="id,name,mimeType,size,modifiedTime")
-                            .execute()
-                        )
-                except Exception:
-                    any_failed = True
-
-                    # Record failure on the shortcut itself (best-effort)
-                    if original_file_id:
-                        file_row_result = await session.execute(
-                            select(File).where(
-                                File.job_id == job_id,
-                                File.gdrive_file_id == original_file_id,
-                            )
-                        )
-                        file_row = file_row_result.scalar_one_or_none()
-
-                        if file_row is None:
-                            file_row = File(
-                                job_id=job_id,
-                                gdrive_file_id=original_file_id,
-                                name=original_name,
-                                mime_type=original_mime,
-                                status="failed",
-                                error=traceback.format_exc(),
-                            )
-                            session.add(file_row)
-                        else:
-                            file_row.status = "failed"
-                            file_row.error = traceback.format_exc()
-
-                        await session.commit()
-
-                    continue
-
-
-                gdrive_file_id = file_meta["id"]
-                name = file_meta.get("name") or ""
-                mime_type = file_meta.get("mimeType")
-
-                size = int(file_meta.get("size") or 0)
-                print(
-                    f"PROCESSING name={name!r} mime={mime_type!r} size={size}",
-                    flush=True,
-                )
+            drive = get_async_drive_client()
 
-                file_row_result = await session.execute(
-                    select(File).where(File.job_id == job_id, File.gdrive_file_id == gdrive_file_id)
-                )
-                file_row = file_row_result.scalar_one_or_none()
-
-                if file_row is None:
-                    file_row = File(
-                        job_id=job_id,
-                        gdrive_file_id=gdrive_file_id,
-                        name=name,
-                        mime_type=mime_type,
-                        status="running",
-                    )
-                    session.add(file_row)
-                    await session.commit()
-                    await session.refresh(file_row)
-                else:
-                    file_row.status = "running"
-                    file_row.error = None
-                    await session.commit()
-
-                try:
-                    if mime_type == "application/pdf" and size > 15 * 1024 * 1024:
-                        raise ValueError(f"PDF too large ({size} bytes), skipping to avoid OOM/crash")
-
-                    text = get_text_for_drive_file(service, file_meta)
-
-                    try:
-                        if settings.groq_api_key:
-                            profile = await llm_build_resume_profile(text)
-                        else:
-                            profile = build_resume_profile(text)
-                    except Exception:
-                        profile = build_resume_profile(text)
-
-                    try:
-                        if profile.overall_summary and profile.overall_summary.strip():
-                            profile.overall_summary_embedding = embed_texts(
-                                [profile.overall_summary.strip()]
-                            )[0]
-                        else:
-                            profile.overall_summary_embedding = []
-                    except Exception:
-                        profile.overall_summary_embedding = []
-                    
-                    try:
-                        if not (settings.pinecone_api_key and settings.pinecone_index_host):
-                            raise ValueError("Pinecone is not configured (missing PINECONE_API_KEY or PINECONE_INDEX_HOST)")
-
-                        if not (profile.overall_summary_embedding and len(profile.overall_summary_embedding) > 0):
-                            raise ValueError("overall_summary_embedding is empty; cannot upsert to Pinecone")
-
-                        index = get_index()
-                        upsert_resume_embedding(
-                            index=index,
-                            namespace=namespace,
-                            file_id=str(file_row.id),
-                            file_name=name,
-                            vector=profile.overall_summary_embedding,
-                            job_id=str(job_id),
-                        )
-                    except Exception:
-                        any_failed = True
-
-                        # Vectors must be stored only in Pinecone.
-                        # On Pinecone failure, do NOT store vectors in Postgres.
-                        profile.overall_summary_embedding = []
-                        file_row.resume_profile = profile.model_dump(
-                            mode="json",
-                            exclude_none=True,
-                            exclude={"overall_summary_embedding"},
-                        )
-                        file_row.status = "failed"
-                        file_row.error = "Pinecone upsert failed:\n" + traceback.format_exc()
-                        await session.commit()
-                        continue
-
-                    # Pinecone upsert succeeded; clear embedding so it is never persisted to Postgres.
-                    profile.overall_summary_embedding = []
-
-
-                    file_row.resume_profile = profile.model_dump(
-                        mode="json", 
-                        exclude_none=True,
-                        exclude={"overall_summary_embedding"},
-                    )
-                    await session.commit()
-
-                    file_row.status = "succeeded"
-                    file_row.num_chunks = 0
-                    await session.commit()
-
-                except Exception as e:
-                    any_failed = True
-                    await session.rollback()
-                    file_row.status = "failed"
-                    file_row.error = traceback.format_exc()
-                    await session.commit()
+            files = job.listing_snapshot
+            if files is None:
+                folder_id = extract_folder_id(job.folder_url)
+                with track_stage("listing"):
+                    files = await drive.list_folder(folder_id)
+                job.listing_snapshot = files
+                job.total_files = len(files)
+                await session.commit()
+
+            deadline = started + settings.ingest_task_time_budget_s
+            if not await _ingest_files(drive, writer, job_id, namespace, files, done_statuses, deadline):
+                await writer.flush()
+                return False
 
+            await writer.flush()
+
+            any_failed = any(s.status == "failed" for s in writer.states.values())
             job.status = "failed" if any_failed else "succeeded"
             job.finished_at = datetime.utcnow()
             await session.commit()
+            publish_job_events(job_id, [job_event(job_id, job.status)])
+            return True
+
+        except (SoftTimeLimitExceeded, asyncio.CancelledError) as e:
+            # Hit the Celery soft limit: save progress and continue in a new task. Raised in the
+            # loop's selector rather than here, it arrives as run_async cancelling this coroutine
+            await session.rollback()
+            await writer.flush()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return False
 
+        except Exception as e:
+            await session.rollback()
+            try:
+                # Keep per-file results gathered before the job-level failure
+                await writer.flush()
+            except Exception:
+                await session.rollback()
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            await session.commit()
+            publish_job_events(job_id, [job_event(job_id, job.status, job.error)])
+            return True
+
+
+def _listed_ids(files: list[dict]) -> list[str]:
+    # Row keys a listed entry can end up under: the shortcut itself and its target
+    ids: list[str] = []
+    for f in files:
+        if f.get("id"):
+            ids.append(f["id"])
+        target_id = (f.get("shortcutDetails") or {}).get("targetId")
+        if target_id:
+            ids.append(target_id)
+    return ids
+
+
+async def _prepare_fanout(job_id: uuid.UUID) -> list[dict] | None:
+    # Fan-out parent: take the listing snapshot and return the entries still to process
+    async with worker_session() as session:
+        result = await session.execute(select(Job).where(Job.id == job_id))
+        job = result.scalar_one_or_none()
+        if job is None:
+            return None
+
+        if job.started_at is None or job.status != "running":
+            job.started_at = datetime.utcnow()
+        job.status = "running"
+        job.error = None
+        job.finished_at = None
+        await session.commit()
+        publish_job_events(job_id, [job_event(job_id, job.status)])
+
+        try:
+            files = job.listing_snapshot
+            if files is None:
+                drive = get_async_drive_client()
+                with track_stage("listing"):
+                    files = await drive.list_folder(extract_folder_id(job.folder_url))
+                job.listing_snapshot = files
+                job.total_files = len(files)
+                await session.commit()
         except Exception as e:
             job.status = "failed"
             job.error = str(e)
             job.finished_at = datetime.utcnow()
             await session.commit()
+            publish_job_events(job_id, [job_event(job_id, job.status, job.error)])
+            return None
+
+        states = await load_file_states(session, job_id)
+
+    pending = []
+    for f in files:
+        target_id = f.get("id")
+        if f.get("mimeType") == SHORTCUT_MIME:
+            target_id = (f.get("shortcutDetails") or {}).get("targetId") or target_id
+        state = states.get(target_id) if target_id else None
+        if state is not None and state.status in DONE_STATUSES:
+            continue
+        pending.append(f)
+    return pending
+
+
+async def _run_ingest_batch(job_id: uuid.UUID, namespace: str, files: list[dict]) -> dict:
+    async with worker_session() as session:
+        writer = FileRowWriter(
+            session,
+            job_id,
+            flush_every=settings.ingest_db_flush_every,
+            flush_interval_s=settings.ingest_db_flush_interval_s,
+            states=await load_file_states(session, job_id, _listed_ids(files)),
+        )
+        await _ingest_files(get_async_drive_client(), writer, job_id, namespace, files)
+        await writer.flush()
+
+        ids = _listed_ids(files)
+        failed = sum(1 for gid in ids if writer.status_of(gid) == "failed")
+        succeeded = sum(1 for gid in ids if writer.status_of(gid) == "succeeded")
+        skipped = sum(1 for gid in ids if writer.status_of(gid) == "skipped")
+        return {"files": len(files), "succeeded": succeeded, "failed": failed, "skipped": skipped}
+
+
+async def _finalize_job(job_id: uuid.UUID, batch_results: list[dict] | None = None) -> None:
+    async with worker_session() as session:
+        result = await session.execute(select(Job).where(Job.id == job_id))
+        job = result.scalar_one_or_none()
+        if job is None:
+            return
+
+        states = await load_file_states(session, job_id)
+        # Nothing processes a file after this: a row still queued / running (abandoned stage
+        # chain, batch killed mid-file) is failed, not left to count as success
+        unfinished = [gid for gid, s in states.items() if s.status not in (*DONE_STATUSES, "failed")]
+        if unfinished:
+            await session.execute(
+                update(File)
+                .where(File.job_id == job_id, File.gdrive_file_id.in_(unfinished))
+                .values(status="failed", error="Not finished when the job was finalized")
+                .execution_options(synchronize_session=False)
+            )
+            job.failed_files = (job.failed_files or 0) + len(unfinished)
+        any_failed = bool(unfinished) or any(s.status == "failed" for s in states.values())
+        # A batch that exhausted its retries returns an error instead of raising (keeps the chord alive)
+        any_failed = any_failed or any((r or {}).get("error") for r in (batch_results or []))
+
+        job.status = "failed" if any_failed else "succeeded"
+        job.finished_at = datetime.utcnow()
+        await session.commit()
+        publish_job_events(job_id, [job_event(job_id, job.status)])
+
+
+async def _run_extract_stage(job_id: uuid.UUID, namespace: str, f: dict) -> dict:
+    # First stage of the per-stage pipeline; later stages read the text / profile checkpoints
+    payload = {"job_id": str(job_id), "namespace": namespace, "file": None}
+    async with worker_session() as session:
+        writer = FileRowWriter(session, job_id, states=await load_file_states(session, job_id, _listed_ids([f])))
+        drive = get_async_drive_client()
+        file_meta = await _resolve_listed_file(drive, writer, f)
+        if file_meta is not None:
+            row = _file_row(writer, file_meta)
+            try:
+                duplicate = False
+                if writer.stage_of(file_meta["id"]) not in ("extracted", "profiled"):
+                    text = await _extract_stage(drive, writer, row, file_meta)
+                    duplicate = await _dedup_stage(writer, row, namespace, text)
+                if not duplicate:
+                    payload["file"] = file_meta
+            except UnsupportedMimeType as e:
+                writer.record(**row, status="skipped", error=str(e))
+            except Exception:
+                writer.record(**row, status="failed", error=traceback.format_exc())
+        await writer.flush()
+    return payload
+
+
+async def _run_later_stage(stage: str, payload: dict) -> dict:
+    file_meta = payload.get("file")
+    if not file_meta:
+        return payload
+
+    job_id = uuid.UUID(payload["job_id"])
+    gdrive_file_id = file_meta["id"]
+    async with worker_session() as session:
+        writer = FileRowWriter(session, job_id, states=await load_file_states(session, job_id, [gdrive_file_id]))
+        row = _file_row(writer, file_meta)
+        try:
+            text, stored_profile = await writer.load_checkpoint(gdrive_file_id)
+            if stage == "profile":
+                if writer.stage_of(gdrive_file_id) != "profiled" or not stored_profile:
+                    if text is None:
+                        raise RuntimeError("extracted text checkpoint missing")
+                    await _profile_stage(writer, row, text)
+            else:
+                ok = await _embed_upsert_stage(
+                    writer, row, job_id, payload["namespace"], ResumeProfile.model_validate(stored_profile or {})
+                )
+                if not ok:
+                    payload = {**payload, "file": None}
+        except Exception:
+            writer.record(**row, status="failed", error=traceback.format_exc())
+            payload = {**payload, "file": None}
+        await writer.flush()
+    return payload
+
+
+async def _record_stage_failure(job_id: uuid.UUID, f: dict, error: str) -> None:
+    # A stage task out of retries: without this its row stays running at the last checkpoint
+    async with worker_session() as session:
+        writer = FileRowWriter(session, job_id, states=await load_file_states(session, job_id, _listed_ids([f])))
+        file_meta = f
+        if f.get("mimeType") == SHORTCUT_MIME:
+            # On the target's row once the shortcut was resolved, else on the shortcut itself
+            details = f.get("shortcutDetails") or {}
+            if writer.status_of(details.get("targetId")) is not None:
+                file_meta = {"id": details["targetId"], "name": f.get("name"), "mimeType": details.get("targetMimeType")}
+        if not file_meta.get("id") or writer.status_of(file_meta["id"]) in DONE_STATUSES:
+            return
+        writer.record(**_file_row(writer, file_meta), status="failed", error=error)
+        await writer.flush()
+
+
+async def _enrich_profile(file_id: uuid.UUID, namespace: str) -> str:
+    # Shadow mode, second phase: build the Groq profile from the stored text, re-embed the
+    # summary and swap both in. The file stays searchable on its heuristic profile meanwhile.
+    async with worker_session() as session:
+        result = await session.execute(
+            select(File.job_id, File.name, File.status, File.profile_tier, File.duplicate_of, File.extracted_text).where(
+                File.id == file_id
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            return "missing"
+        job_id, name, status, tier, duplicate_of, text = row
+        if status != "succeeded" or tier == "llm" or duplicate_of is not None:
+            return "skipped"
+        if not (text or "").strip():
+            return "no_text"
+
+        timings = StageTimings()
+        with timings.stage("llm", backend_name("profile")):
+            profile = await llm_build_resume_profile(text, timings)
+
+        if profile.overall_summary and profile.overall_summary.strip():
+            with timings.stage("embed"):
+                vector = embed_texts([profile.overall_summary.strip()])[0]
+            with timings.stage("upsert"):
+                upsert_resume_embedding(
+                    index=get_index(),
+                    namespace=namespace,
+                    file_id=str(file_id),
+                    file_name=name,
+                    vector=vector,
+                    job_id=str(job_id),
+                )
+
+        profile_json = _profile_json(profile)
+        await session.execute(
+            update(File)
+            .where(File.id == file_id)
+            .values(
+                resume_profile=profile_json,
+                profile_tier="llm",
+                extracted_text=None,
+                timings=func.coalesce(File.timings, literal({}, JSONB)).op("||")(literal(timings.as_dict() or {}, JSONB)),
+            )
+        )
+        # Near-duplicates carry a copy of this file's profile
+        await session.execute(
+            update(File)
+            .where(File.duplicate_of == file_id)
+            .values(resume_profile=profile_json, profile_tier="llm")
+        )
+        await session.commit()
+    return "enriched"
+
+
+def run_ingest_job(job_id: str, namespace: str, continuation: bool = False) -> bool:
+    return run_async(_run_ingest_job(uuid.UUID(job_id), namespace, continuation=continuation))
+
+
+def prepare_fanout_job(job_id: str) -> list[dict] | None:
+    return run_async(_prepare_fanout(uuid.UUID(job_id)))
+
+
+def run_ingest_batch(job_id: str, namespace: str, files: list[dict]) -> dict:
+    return run_async(_run_ingest_batch(uuid.UUID(job_id), namespace, files))
+
+
+def finalize_ingest_job(job_id: str, batch_results: list[dict] | None = None) -> None:
+    run_async(_finalize_job(uuid.UUID(job_id), batch_results))
+
+
+def run_extract_stage(job_id: str, namespace: str, f: dict) -> dict:
+    return run_async(_run_extract_stage(uuid.UUID(job_id), namespace, f))
+
+
+def run_profile_stage(payload: dict) -> dict:
+    return run_async(_run_later_stage("profile", payload))
+
+
+def run_embed_upsert_stage(payload: dict) -> dict:
+    return run_async(_run_later_stage("embed", payload))
+
+
+def record_stage_failure(job_id: str, f: dict, error: str) -> None:
+    run_async(_record_stage_failure(uuid.UUID(job_id), f, error))
 
 
-def run_ingest_job(job_id: str, namespace: str) -> None:
-    asyncio.run(_run_ingest_job(uuid.UUID(job_id), namespace))
\ No newline at end of file
+def run_enrich_profile(file_id: str, namespace: str) -> str:
+    return run_async(_enrich_profile(uuid.UUID(file_id), namespace))
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import threading
+import traceback
+from dataclasses import dataclass
+
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+# Long-lived per-worker resources. Tasks used to call asyncio.run, which built and tore down
+# an event loop per task and dropped every pooled asyncpg connection with it.
+# Here each worker thread (one per prefork child, N for the threads pool) keeps one loop
+# and an engine bound to it for its whole life.
+
+
+@dataclass
+class _LoopState:
+    loop: asyncio.AbstractEventLoop
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker
+
+
+_local = threading.local()
+_states: list[_LoopState] = []
+_states_lock = threading.Lock()
+
+
+def _loop_state() -> _LoopState:
+    state = getattr(_local, "state", None)
+    if state is None or state.loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        engine = create_async_engine(
+            settings.database_url,
+            pool_pre_ping=True,
+            pool_size=settings.worker_db_pool_size,
+        )
+        state = _LoopState(
+            loop=loop,
+            engine=engine,
+            sessionmaker=async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False),
+        )
+        _local.state = state
+        with _states_lock:
+            _states.append(state)
+    return state
+
+
+def run_async(coro):
+    # Drop-in for asyncio.run that reuses this thread's loop (and its warm DB pool)
+    loop = _loop_state().loop
+    task = loop.create_task(coro)
+    try:
+        return loop.run_until_complete(task)
+    except BaseException:
+        # e.g. SoftTimeLimitExceeded raised in the selector, outside the task: nothing on the
+        # loop may stay pending, or it resumes inside the next task's run_until_complete
+        _cancel_pending(loop)
+        raise
+
+
+def _cancel_pending(loop: asyncio.AbstractEventLoop) -> None:
+    pending = [t for t in asyncio.all_tasks(loop) if not t.done()]
+    for t in pending:
+        t.cancel()
+    if pending:
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+
+
+def worker_session() -> AsyncSession:
+    # Session on the current worker loop's engine; plain AsyncSessionLocal elsewhere (API, scripts)
+    state = getattr(_local, "state", None)
+    if state is not None:
+        try:
+            if asyncio.get_running_loop() is state.loop:
+                return state.sessionmaker()
+        except RuntimeError:
+            pass
+    return AsyncSessionLocal()
+
+
+def init_worker_resources() -> None:
+    _loop_state()
+
+    from app.services.processing.embeddings import init_model_for_role
+
+    try:
+        init_model_for_role("worker")
+    except Exception:
+        print(traceback.format_exc())
+
+    if settings.gdrive_service_account_json_path:
+        from app.services.gdrive.client import get_access_token
+
+        try:
+            # Credentials and the first access token, shared by every loop's Drive client
+            get_access_token()
+        except Exception:
+            print(traceback.format_exc())
+
+
+def close_worker_resources() -> None:
+    with _states_lock:
+        states = list(_states)
+        _states.clear()
+
+    from app.services.gdrive.async_client import close_async_drive_client
+
+    for state in states:
+        try:
+            if not state.loop.is_closed() and not state.loop.is_running():
+                state.loop.run_until_complete(close_async_drive_client())
+                state.loop.run_until_complete(state.engine.dispose())
+                state.loop.close()
+        except Exception:
+            print(traceback.format_exc())
+    _local.state = None
+
+    from app.services.vectors.pinecone_client import close_index
+
+    close_index()
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs) -> None:
+    # prefork child: load after fork so each process owns its model, loop and pool
+    init_worker_resources()
+
+
+@worker_init.connect
+def _on_worker_init(sender=None, **kwargs) -> None:
+    # Main process, before any fork: one metrics exporter per worker node
+    metrics.start_worker_server()
+
+    # threads / solo pools never fork, so warm up in the main process instead
+    pool_cls = getattr(sender, "pool_cls", "")
+    pool_name = getattr(pool_cls, "__module__", "") or str(pool_cls)
+    if "prefork" not in pool_name.lower():
+        init_worker_resources()
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(pid=None, **kwargs) -> None:
+    close_worker_resources()
+    metrics.mark_process_dead(pid or os.getpid())
+
+
+@worker_shutdown.connect
+def _on_worker_shutdown(**kwargs) -> None:
+    close_worker_resources()
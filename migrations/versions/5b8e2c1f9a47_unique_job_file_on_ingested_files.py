@@ -0,0 +1,42 @@
+"""unique (job_id, gdrive_file_id) on ingested_files
+
+Revision ID: 5b8e2c1f9a47
+Revises: 13332a9b932b
+Create Date: 2026-10-19 10:12:41.508112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2c1f9a47'
+down_revision: Union[str, Sequence[str], None] = '13332a9b932b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the newest row per (job_id, gdrive_file_id) before adding the constraint
+    op.execute(
+        """
+        DELETE FROM ingested_files a
+        USING ingested_files b
+        WHERE a.job_id = b.job_id
+          AND a.gdrive_file_id = b.gdrive_file_id
+          AND (a.created_at, a.id) < (b.created_at, b.id)
+        """
+    )
+    op.create_unique_constraint(
+        'uq_ingested_files_job_id_gdrive_file_id',
+        'ingested_files',
+        ['job_id', 'gdrive_file_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_ingested_files_job_id_gdrive_file_id', 'ingested_files', type_='unique')
@@ -0,0 +1,36 @@
+"""ingested_files profile tier
+
+Revision ID: 8a5d3e7f1c64
+Revises: f4b2c8d61a93
+Create Date: 2026-10-19 18:40:09.512834
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a5d3e7f1c64'
+down_revision: Union[str, Sequence[str], None] = 'f4b2c8d61a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingested_files', sa.Column('profile_tier', sa.String(length=16), nullable=True))
+    # Rows with stage timings tell which builder ran (a Groq failure records both keys and
+    # falls back to the heuristic); older rows stay unknown (NULL)
+    op.execute(
+        "UPDATE ingested_files SET profile_tier = CASE "
+        "WHEN timings ? 'llm_heuristic' THEN 'heuristic' "
+        "WHEN timings ? 'llm_groq' THEN 'llm' END "
+        "WHERE resume_profile IS NOT NULL AND timings IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingested_files', 'profile_tier')
@@ -0,0 +1,33 @@
+"""ingest checkpoints: listing snapshot, file stage and extracted text
+
+Revision ID: a3d91f6c2e10
+Revises: 5b8e2c1f9a47
+Create Date: 2026-10-19 11:02:17.934520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d91f6c2e10'
+down_revision: Union[str, Sequence[str], None] = '5b8e2c1f9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingestion_jobs', sa.Column('listing_snapshot', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('ingested_files', sa.Column('stage', sa.String(length=32), nullable=True))
+    op.add_column('ingested_files', sa.Column('extracted_text', sa.Text(), nullable=True))
+    op.execute("UPDATE ingested_files SET stage = 'succeeded' WHERE status = 'succeeded'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingested_files', 'extracted_text')
+    op.drop_column('ingested_files', 'stage')
+    op.drop_column('ingestion_jobs', 'listing_snapshot')
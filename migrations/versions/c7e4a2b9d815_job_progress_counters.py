@@ -0,0 +1,50 @@
+"""job progress counters
+
+Revision ID: c7e4a2b9d815
+Revises: a3d91f6c2e10
+Create Date: 2026-10-19 14:21:45.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e4a2b9d815'
+down_revision: Union[str, Sequence[str], None] = 'a3d91f6c2e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingestion_jobs', sa.Column('total_files', sa.Integer(), nullable=True))
+    op.add_column('ingestion_jobs', sa.Column('succeeded_files', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ingestion_jobs', sa.Column('failed_files', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ingestion_jobs', sa.Column('skipped_files', sa.Integer(), server_default='0', nullable=False))
+    # Backfill existing jobs from their file rows
+    op.execute(
+        """
+        UPDATE ingestion_jobs j SET
+            succeeded_files = c.succeeded,
+            failed_files = c.failed,
+            total_files = CASE WHEN j.listing_snapshot IS NOT NULL
+                THEN jsonb_array_length(j.listing_snapshot) END
+        FROM (
+            SELECT job_id,
+                   count(*) FILTER (WHERE status = 'succeeded') AS succeeded,
+                   count(*) FILTER (WHERE status = 'failed') AS failed
+            FROM ingested_files GROUP BY job_id
+        ) c
+        WHERE c.job_id = j.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingestion_jobs', 'skipped_files')
+    op.drop_column('ingestion_jobs', 'failed_files')
+    op.drop_column('ingestion_jobs', 'succeeded_files')
+    op.drop_column('ingestion_jobs', 'total_files')
@@ -0,0 +1,28 @@
+"""ingested_files stage timings
+
+Revision ID: e1f08b3c4d27
+Revises: c7e4a2b9d815
+Create Date: 2026-10-19 15:03:12.441907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f08b3c4d27'
+down_revision: Union[str, Sequence[str], None] = 'c7e4a2b9d815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingested_files', sa.Column('timings', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingested_files', 'timings')
@@ -0,0 +1,41 @@
+"""ingested_files near-duplicate detection: minhash, lsh_bands, duplicate_of
+
+Revision ID: f4b2c8d61a93
+Revises: e1f08b3c4d27
+Create Date: 2026-10-19 17:21:45.203118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b2c8d61a93'
+down_revision: Union[str, Sequence[str], None] = 'e1f08b3c4d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingested_files', sa.Column('minhash', sa.LargeBinary(), nullable=True))
+    op.add_column('ingested_files', sa.Column('lsh_bands', postgresql.ARRAY(sa.BigInteger()), nullable=True))
+    op.add_column('ingested_files', sa.Column('duplicate_of', sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        'ingested_files_duplicate_of_fkey', 'ingested_files', 'ingested_files',
+        ['duplicate_of'], ['id'], ondelete='SET NULL',
+    )
+    op.create_index(op.f('ix_ingested_files_duplicate_of'), 'ingested_files', ['duplicate_of'], unique=False)
+    op.create_index('ix_ingested_files_lsh_bands', 'ingested_files', ['lsh_bands'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ingested_files_lsh_bands', table_name='ingested_files', postgresql_using='gin')
+    op.drop_index(op.f('ix_ingested_files_duplicate_of'), table_name='ingested_files')
+    op.drop_constraint('ingested_files_duplicate_of_fkey', 'ingested_files', type_='foreignkey')
+    op.drop_column('ingested_files', 'duplicate_of')
+    op.drop_column('ingested_files', 'lsh_bands')
+    op.drop_column('ingested_files', 'minhash')
@@ -1,194 +1,254 @@
 from __future__ import annotations
 
+# Bulk profiler for a local folder of resumes: writes <name>.llm.json next to each file.
+#
+# - text extraction runs in a process pool (PDF parsing / OCR no longer blocks the loop)
+# - LLM calls share a rate limiter (requests per minute + max in flight) and back off on 429
+# - every finished file is appended to a JSONL manifest, so an interrupted run resumes
+# - progress is printed as files complete
+#
+#   python -m scripts.batch_resume_profile_llm ./resumes --workers 8 --concurrency 4 --rpm 30
+
 import argparse
 import asyncio
 import json
-from io import BytesIO
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
-from docx import Document
-
-from app.services.llm.groq_llm import groq_chat_json
-from app.services.processing.pdf_extract import extract_text_from_pdf_bytes
-from app.services.resume.profile_schema import ResumeProfile
-
-
-def extract_text_from_local_file(path: Path) -> str:
-    suffix = path.suffix.lower()
-
-    if suffix == ".pdf":
-        return extract_text_from_pdf_bytes(path.read_bytes())
-
-    if suffix == ".docx":
-        doc = Document(BytesIO(path.read_bytes()))
-        parts: list[str] = []
-        for p in doc.paragraphs:
-            t = (p.text or "").strip()
-            if t:
-                parts.append(t)
-        return "\n".join(parts).strip()
-
-    raise ValueError(f"Unsupported local file type: {suffix}")
-
-
-async def llm_build_resume_profile(text: str) -> ResumeProfile:
-    text = (text or "").strip()
-
-    # Keep prompts within a reasonable size (tune later if needed)
-    text = text[:12000]
-
-    system = (
-        "You are an expert resume parser.\n"
-        "Return ONLY valid JSON (no markdown, no explanation, no extra text).\n"
-        "The JSON MUST match this schema:\n"
-        "{\n"
-        '  "total_years_experience": number|null,\n'
-        '  "skills": string[],\n'
-        '  "skill_experience_years": { [skill: string]: number },\n'
-        '  "overall_summary": string|null,\n'
-        '  "company_experience_years": { [company: string]: number },\n'
-        '  "projects": [ { "domain": string|null, "project_name": string, "project_description": string|null } ]\n'
-        "}\n"
-        "Rules:\n"
-        "- skills must be lowercase\n"
-        "- If unknown, use null or empty list/dict\n"
-        "- Years must be numbers (example 2.5)\n"
-        "- overall_summary must be an overall summary of the ENTIRE resume (not only the Summary section).\n"
-        "- overall_summary must be between 190 and 200 words.\n"
-        "- Do not use bullet points in overall_summary; write as a paragraph.\n"
-        "- For skill_experience_years and company_experience_years: NEVER use null values. If unknown, omit the key or use an empty object {}.\n"
-    )
-
-    messages = [
-        {"role": "system", "content": system},
-        {"role": "user", "content": f"Resume text:\n\n{text}"},
-    ]
-    
-    data = await groq_chat_json(messages=messages, temperature=0.0, max_tokens=1200)
-
-    def _clean_float_map(x):
-        if not isinstance(x, dict):
-            return {}
-        out = {}
-        for k, v in x.items():
-            if v is None:
-                continue
-            try:
-                out[str(k)] = float(v)
-            except Exception:
-                continue
-        return out
+from app.core.config import settings
+from app.services.llm.base import RateLimited
+from app.services.llm.rate_limit import AsyncRateLimiter
+from app.services.llm.router import backend_name, llm_available, reset_backends, resolve
+from app.services.processing.text_extract import LOCAL_SUFFIX_MIME, get_text_for_local_file
+from app.services.resume.llm_profile_builder import llm_build_resume_profile
+from app.services.resume.profile_builder import build_resume_profile
 
-    data["skill_experience_years"] = _clean_float_map(data.get("skill_experience_years"))
-    data["company_experience_years"] = _clean_float_map(data.get("company_experience_years"))
+MIN_TEXT_CHARS = 30
+# Manifest statuses that count as done on the next run
+DONE_STATUSES = ("ok", "no_text")
 
-    profile = ResumeProfile.model_validate(data)
 
-    def _wc(s: str | None) -> int:
-        return len((s or "").split())
+def _extract(path: str) -> tuple[str | None, str | None, str | None]:
+    # Runs in a worker process: (text, extract_method, error)
+    from app.core.metrics import StageTimings
 
-    # 1) If too short (<190), ask LLM to expand (1 retry)
-    if profile.overall_summary and _wc(profile.overall_summary) < 190:
-        expand_system = (
-            "Return ONLY valid JSON.\n"
-            'Schema: { "overall_summary": string }\n'
-            "Rules:\n"
-            "- overall_summary must be between 190 and 200 words\n"
-            "- single paragraph, no bullet points\n"
-            "- must summarize the ENTIRE resume\n"
-        )
+    timings = StageTimings()
+    try:
+        text = get_text_for_local_file(Path(path), timings)
+    except Exception as e:
+        return None, None, f"{type(e).__name__}: {e}"
+    return text, timings.values.get("extract_method"), None
 
-        expand_user = (
-            "Expand the summary to meet the 190-200 word requirement using the resume text.\n\n"
-            f"RESUME TEXT:\n{text}\n\n"
-            f"CURRENT SUMMARY:\n{profile.overall_summary}\n"
-        )
 
-        expand_data = await groq_chat_json(
-            messages=[
-                {"role": "system", "content": expand_system},
-                {"role": "user", "content": expand_user},
-            ],
-            temperature=0.0,
-            max_tokens=800,
-        )
+def _fingerprint(path: Path) -> dict:
+    st = path.stat()
+    return {"size": st.st_size, "mtime": int(st.st_mtime)}
 
-        new_summary = expand_data.get("overall_summary")
-        if isinstance(new_summary, str) and new_summary.strip():
-            profile.overall_summary = new_summary.strip()
 
-    # 2) Hard cap to 200 words
-    if profile.overall_summary:
-        words = profile.overall_summary.split()
-        if len(words) > 200:
-            profile.overall_summary = " ".join(words[:200])
+def _out_path(path: Path) -> Path:
+    return path.with_name(path.stem + ".llm.json")
 
-    return profile
 
+def load_manifest(manifest: Path) -> dict[str, dict]:
+    # Last entry per file wins
+    entries: dict[str, dict] = {}
+    if not manifest.exists():
+        return entries
+    with manifest.open(encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if isinstance(entry, dict) and entry.get("path"):
+                entries[entry["path"]] = entry
+    return entries
+
+
+def _is_done(entry: dict | None, path: Path) -> bool:
+    if not entry or entry.get("status") not in DONE_STATUSES:
+        return False
+    # Re-profile files that changed since they were recorded
+    return entry.get("size") == path.stat().st_size and entry.get("mtime") == int(path.stat().st_mtime)
+
+
+class Progress:
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.done = 0
+        self.counts: dict[str, int] = {}
+        self.started = time.monotonic()
+
+    def report(self, status: str, rel: str, detail: str = "") -> None:
+        self.done += 1
+        self.counts[status] = self.counts.get(status, 0) + 1
+        rate = self.done / max(1e-9, time.monotonic() - self.started)
+        eta = (self.total - self.done) / rate if rate else 0.0
+        suffix = f" ({detail})" if detail else ""
+        print(
+            f"[{self.done}/{self.total} {rate:.2f}/s eta {eta:,.0f}s] {status.upper()}: {rel}{suffix}",
+            flush=True,
+        )
 
-async def process_one(path: Path, overwrite: bool) -> tuple[bool, str]:
-    try:
-        out_path = path.with_name(path.stem + ".llm.json")
-        if out_path.exists() and not overwrite:
-            return True, f"SKIP (exists): {path.name}"
 
-        text = extract_text_from_local_file(path)
-        if not text or len(text.strip()) < 30:
-            return False, f"NO TEXT: {path.name}"
+def _route_profile_without_sdk_retries() -> None:
+    # The profile task runs on a copy of its backend with SDK retries off, so every 429
+    # reaches the limiter below; the API and workers keep the SDK's retries
+    backend, model = resolve("profile")
+    name = f"{backend.name}_batch"
+    settings.llm_backends = {**settings.llm_backends, name: {**backend.config, "max_retries": 0}}
+    settings.llm_routes = {**settings.llm_routes, "profile": f"{name}:{model}" if model else name}
+    reset_backends()
 
-        profile = await llm_build_resume_profile(text)
-        out = profile.model_dump(mode="json", exclude_none=True)
 
-        out_path.write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding="utf-8")
-        return True, f"OK: {path.name} -> {out_path.name}"
-    except Exception as e:
-        return False, f"FAIL: {path.name} ({e})"
+async def _profile(text: str, limiter: AsyncRateLimiter, use_llm: bool, max_retries: int):
+    if not use_llm:
+        return build_resume_profile(text)
 
+    # Every LLM call of the profile (including the summary expansion) takes a limiter token;
+    # 429s are retried here, after pausing the limiter, not by the SDK
+    for attempt in range(max_retries + 1):
+        try:
+            return await llm_build_resume_profile(text, limiter=limiter)
+        except RateLimited as e:
+            if attempt >= max_retries:
+                raise
+            limiter.pause(max(e.retry_after or 0.0, 2.0 ** attempt))
 
-async def main_async(folder: Path, concurrency: int, overwrite: bool) -> None:
-    files: list[Path] = []
-    for ext in (".pdf", ".docx"):
-        files.extend(folder.rglob(f"*{ext}"))
 
-    files = sorted(set(files))
+async def main_async(args: argparse.Namespace) -> None:
+    folder: Path = args.folder
+    files = sorted(p for p in folder.rglob("*") if p.is_file() and p.suffix.lower() in LOCAL_SUFFIX_MIME)
     if not files:
-        print("No .pdf or .docx files found in:", folder)
+        print("No resume files found in:", folder)
         return
 
-    sem = asyncio.Semaphore(concurrency)
+    manifest_path: Path = args.manifest or folder / ".profile_manifest.jsonl"
+    entries = load_manifest(manifest_path)
+
+    todo: list[Path] = []
+    skipped = 0
+    for p in files:
+        rel = str(p.relative_to(folder))
+        if not args.overwrite and (_is_done(entries.get(rel), p) or (rel not in entries and _out_path(p).exists())):
+            skipped += 1
+            continue
+        todo.append(p)
 
-    async def guarded(p: Path) -> tuple[bool, str]:
-        async with sem:
-            return await process_one(p, overwrite=overwrite)
+    print(f"{len(files)} files, {skipped} already done, {len(todo)} to profile (manifest: {manifest_path})")
+    if not todo:
+        return
 
-    tasks = [asyncio.create_task(guarded(p)) for p in files]
-    results = await asyncio.gather(*tasks)
+    use_llm = llm_available("profile") and not args.heuristic
+    if not use_llm and not args.heuristic:
+        print(f"LLM backend {backend_name('profile')!r} not configured: using the heuristic profile builder")
+
+    if use_llm:
+        _route_profile_without_sdk_retries()
+    limiter = AsyncRateLimiter(rate=args.rpm, per=60.0, max_concurrency=args.concurrency)
+    progress = Progress(len(todo))
+    manifest = manifest_path.open("a", encoding="utf-8")
+    loop = asyncio.get_running_loop()
+
+    def record(p: Path, status: str, started: float, **extra) -> None:
+        entry = {
+            "path": str(p.relative_to(folder)),
+            "status": status,
+            **_fingerprint(p),
+            "elapsed_s": round(time.monotonic() - started, 3),
+            "ts": datetime.now(timezone.utc).isoformat(),
+            **extra,
+        }
+        manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        manifest.flush()
+
+    # Extraction is bounded so at most a few texts wait for the LLM at any time
+    extract_slots = asyncio.Semaphore(args.workers * 2)
+
+    async def handle(p: Path, pool: ProcessPoolExecutor) -> None:
+        rel = str(p.relative_to(folder))
+        started = time.monotonic()
+        async with extract_slots:
+            text, method, error = await loop.run_in_executor(pool, _extract, str(p))
+        if error is not None:
+            record(p, "failed", started, error=error)
+            progress.report("failed", rel, error)
+            return
+        if not text or len(text.strip()) < MIN_TEXT_CHARS:
+            record(p, "no_text", started, extract_method=method)
+            progress.report("no_text", rel)
+            return
+
+        try:
+            profile = await _profile(text, limiter, use_llm, args.max_retries)
+        except Exception as e:
+            record(p, "failed", started, extract_method=method, error=f"{type(e).__name__}: {e}")
+            progress.report("failed", rel, str(e))
+            return
+
+        out = profile.model_dump(mode="json", exclude_none=True, exclude={"overall_summary_embedding"})
+        # Which builder made it, for bulk_import's profile_tier (the file name is the same)
+        out["profile_tier"] = "llm" if use_llm else "heuristic"
+        out_path = _out_path(p)
+        await asyncio.to_thread(
+            out_path.write_text, json.dumps(out, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        record(p, "ok", started, extract_method=method, out=out_path.name, llm=use_llm, profile_tier=out["profile_tier"])
+        progress.report("ok", rel, method or "")
 
-    ok = sum(1 for success, _ in results if success)
-    fail = sum(1 for success, _ in results if not success)
+    # Bounded number of in-flight handlers instead of one task per file up front
+    queue: asyncio.Queue[Path] = asyncio.Queue()
+    for p in todo:
+        queue.put_nowait(p)
 
-    for _, msg in results:
-        print(msg)
+    async def runner(pool: ProcessPoolExecutor) -> None:
+        while True:
+            try:
+                p = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await handle(p, pool)
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            n_runners = args.workers * 2 + args.concurrency
+            await asyncio.gather(*(runner(pool) for _ in range(n_runners)))
+    finally:
+        manifest.close()
 
     print("\nSUMMARY")
-    print("Total:", len(results))
-    print("OK:", ok)
-    print("FAILED:", fail)
+    print("Total:", progress.done)
+    for status, n in sorted(progress.counts.items()):
+        print(f"{status}: {n}")
+    print(f"Elapsed: {time.monotonic() - progress.started:.1f}s")
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("folder", help="Folder containing resumes (.pdf/.docx)")
-    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent Groq requests (start with 1)")
-    parser.add_argument("--overwrite", action="store_true", help="Overwrite existing .llm.json files")
+    parser = argparse.ArgumentParser(description="Build resume profiles for a local folder (.pdf/.docx/.doc/.txt)")
+    parser.add_argument("folder", help="Folder containing resumes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Extraction processes")
+    parser.add_argument("--concurrency", type=int, default=2, help="Max LLM requests in flight")
+    parser.add_argument("--rpm", type=float, default=30.0, help="Max LLM requests per minute")
+    parser.add_argument("--max-retries", type=int, default=4, help="Retries per file on HTTP 429")
+    parser.add_argument("--manifest", type=Path, default=None, help="JSONL manifest (default: <folder>/.profile_manifest.jsonl)")
+    parser.add_argument("--heuristic", action="store_true", help="Use the heuristic builder instead of the LLM")
+    parser.add_argument("--overwrite", action="store_true", help="Re-profile files already in the manifest")
     args = parser.parse_args()
 
-    folder = Path(args.folder).resolve()
-    if not folder.exists() or not folder.is_dir():
-        raise SystemExit(f"Folder not found: {folder}")
+    args.folder = Path(args.folder).resolve()
+    if not args.folder.exists() or not args.folder.is_dir():
+        raise SystemExit(f"Folder not found: {args.folder}")
+    args.workers = max(1, args.workers)
+    args.concurrency = max(1, args.concurrency)
 
-    asyncio.run(main_async(folder, concurrency=max(1, args.concurrency), overwrite=args.overwrite))
+    asyncio.run(main_async(args))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+# Load test for POST /chat/ask. Seeds N synthetic succeeded ingested_files rows (with
+# resume_profile) plus vectors in an in-memory index, stubs Groq, and drives the app
+# in-process over ASGI (needs httpx) with a weighted query mix at fixed concurrency.
+# Postgres is real: point DATABASE_URL at a local, migrated database.
+#
+#   python -m scripts.bench_chat --rows 100000 --requests 2000 --concurrency 32 --out bench-results/chat.json
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, insert
+
+from app.core.config import settings
+from app.db.models.file import File
+from app.db.models.job import Job
+from app.db.session import AsyncSessionLocal, engine
+from scripts.bench_fakes import COMPANIES, RARE_SKILLS, SKILLS, InMemoryIndex, StubGroqServer, install_fake_index, pct
+
+NAMESPACE = "bench-chat"
+DEFAULT_MIX = {"skill": 0.35, "skill_years": 0.30, "years": 0.15, "jd": 0.15, "fallback": 0.05}
+
+JD_TEMPLATE = (
+    "Job title: Senior {role}\n"
+    "We are looking for an engineer to design and operate backend services.\n"
+    "Responsibilities: build APIs with {a} and {b}, own data pipelines, review code, "
+    "mentor the team and improve reliability.\n"
+    "Requirements: {years}+ years of experience with {a}, strong {b} and {c}, "
+    "experience with cloud platforms and CI/CD. Nice to have: {d}."
+)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _profile(rng: random.Random) -> dict:
+    skills = rng.sample(SKILLS, k=rng.randint(3, 10))
+    total = round(rng.uniform(0.5, 20.0), 1)
+    return {
+        "total_years_experience": total,
+        "skills": skills,
+        "skill_experience_years": {s: round(rng.uniform(0.5, total), 1) for s in skills},
+        "overall_summary": f"Engineer with {total} years across {', '.join(skills)}.",
+        "company_experience_years": {c: round(rng.uniform(0.5, 5), 1) for c in rng.sample(COMPANIES, k=2)},
+        "projects": [],
+    }
+
+
+async def _seed(rows: int, vectors: int, dim: int, index: InMemoryIndex, seed: int) -> uuid.UUID:
+    import numpy as np
+
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    job_id = uuid.uuid4()
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            insert(Job).values(
+                id=job_id,
+                folder_url="https://drive.google.com/drive/folders/bench-chat",
+                status="succeeded",
+                created_at=datetime.utcnow(),
+            )
+        )
+        chunk = 2000
+        now = datetime.utcnow()
+        for start in range(0, rows, chunk):
+            batch = []
+            for i in range(start, min(rows, start + chunk)):
+                batch.append(
+                    {
+                        "id": uuid.uuid4(),
+                        "job_id": job_id,
+                        "gdrive_file_id": f"bench-{i:07d}",
+                        "name": f"candidate_{i:07d}.pdf",
+                        "mime_type": "application/pdf",
+                        "status": "succeeded",
+                        "stage": "succeeded",
+                        "num_chunks": 0,
+                        "resume_profile": _profile(rng),
+                        "created_at": now,
+                    }
+                )
+            await session.execute(insert(File), batch)
+            if len(batch) and vectors > start:
+                take = batch[: max(0, vectors - start)]
+                mat = np_rng.standard_normal((len(take), dim), dtype=np.float32)
+                index.upsert(
+                    vectors=[
+                        {
+                            "id": str(r["id"]),
+                            "values": mat[n].tolist(),
+                            "metadata": {"file_id": str(r["id"]), "file_name": r["name"]},
+                        }
+                        for n, r in enumerate(take)
+                    ],
+                    namespace=NAMESPACE,
+                )
+            print(f"seeded {min(rows, start + chunk)}/{rows}", end="\r", flush=True)
+        await session.commit()
+    print()
+    return job_id
+
+
+def _question(kind: str, rng: random.Random) -> tuple[str, bool]:
+    skill = rng.choice(SKILLS)
+    years = rng.randint(1, 10)
+    if kind == "skill":
+        return rng.choice([f"show me {skill} candidates", f"who knows {skill}?", f"resumes with {skill}"]), False
+    if kind == "skill_years":
+        return f"{skill} developers with {years}+ years", False
+    if kind == "years":
+        return f"candidates with at least {years} years of experience", False
+    if kind == "jd":
+        a, b, c, d = rng.sample(SKILLS, k=4)
+        return JD_TEMPLATE.format(role=rng.choice(["Backend Engineer", "Data Engineer"]), a=a, b=b, c=c, d=d, years=years), False
+    # No profile has these skills, so the DB filter is empty and the vector fallback runs
+    return f"{rng.choice(RARE_SKILLS)} engineers", True
+
+
+async def _drive(args, mix: dict[str, float]) -> dict:
+    import httpx
+
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    plan = [rng.choices(kinds, weights=weights)[0] for _ in range(args.requests)]
+
+    latencies: dict[str, list[float]] = {k: [] for k in kinds}
+    rows_scanned: dict[str, list[float]] = {k: [] for k in kinds}
+    stages: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for n, kind in enumerate(plan):
+        queue.put_nowait((n, kind))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+        async def ask(kind: str, qrng: random.Random) -> tuple[float, dict | None]:
+            question, fallback = _question(kind, qrng)
+            body = {
+                "question": question,
+                "namespace": NAMESPACE,
+                "top_k": 5,
+                "use_pinecone_fallback": fallback,
+                "debug": True,
+            }
+            t0 = time.perf_counter()
+            resp = await client.post("/chat/ask", json=body)
+            elapsed = (time.perf_counter() - t0) * 1000
+            if resp.status_code != 200:
+                return elapsed, None
+            return elapsed, resp.json()
+
+        for n in range(args.warmup):
+            await ask(kinds[n % len(kinds)], random.Random(n))
+
+        async def worker(wid: int) -> None:
+            qrng = random.Random(args.seed * 1000 + wid)
+            while True:
+                try:
+                    _, kind = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    elapsed, data = await ask(kind, qrng)
+                except Exception:
+                    errors[kind] = errors.get(kind, 0) + 1
+                    continue
+                if data is None:
+                    errors[kind] = errors.get(kind, 0) + 1
+                    continue
+                latencies[kind].append(elapsed)
+                timings = data.get("timings") or {}
+                rows_scanned[kind].append(float(timings.get("db_scan.rows") or 0))
+                for stage, ms in timings.items():
+                    if "." not in stage and stage != "total":
+                        stages.setdefault(stage, []).append(ms)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(args.concurrency)))
+        wall_s = time.perf_counter() - t0
+
+    all_lat = [v for vs in latencies.values() for v in vs]
+
+    def _lat(vs: list[float]) -> dict:
+        return {
+            "count": len(vs),
+            "p50_ms": round(pct(vs, 50), 2),
+            "p95_ms": round(pct(vs, 95), 2),
+            "p99_ms": round(pct(vs, 99), 2),
+        }
+
+    return {
+        "wall_s": round(wall_s, 3),
+        "rps": round(len(all_lat) / wall_s, 2) if wall_s else 0.0,
+        "latency": _lat(all_lat),
+        "by_kind": {
+            kind: {
+                **_lat(latencies[kind]),
+                "rows_scanned_mean": round(sum(rows_scanned[kind]) / len(rows_scanned[kind]), 1)
+                if rows_scanned[kind]
+                else 0.0,
+                "errors": errors.get(kind, 0),
+            }
+            for kind in kinds
+        },
+        "stages": {
+            stage: {"p50_ms": round(pct(vs, 50), 2), "p95_ms": round(pct(vs, 95), 2)}
+            for stage, vs in sorted(stages.items())
+        },
+    }
+
+
+async def _cleanup(job_id: uuid.UUID) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(Job).where(Job.id == job_id))
+        await session.commit()
+
+
+def _parse_mix(raw: str | None) -> dict[str, float]:
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in raw.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in DEFAULT_MIX:
+            raise SystemExit(f"unknown query kind: {kind}")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test /chat/ask with seeded profiles and stubbed services")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--vectors", type=int, default=20000, help="How many seeded rows also get a vector")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--mix", default=None, help="e.g. skill=0.35,skill_years=0.3,years=0.15,jd=0.15,fallback=0.05")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--groq-latency-ms", type=float, default=300.0)
+    parser.add_argument("--groq-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--groq-429-rate", type=float, default=0.0)
+    parser.add_argument("--no-single-flight", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded rows")
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    mix = _parse_mix(args.mix)
+
+    stub = StubGroqServer(
+        latency_ms=args.groq_latency_ms,
+        jitter_ms=args.groq_jitter_ms,
+        rate_429=args.groq_429_rate,
+    ).start()
+    stub.install()
+    index = InMemoryIndex()
+    install_fake_index(index)
+    settings.chat_single_flight_redis = False
+    if args.no_single_flight:
+        settings.chat_single_flight_enabled = False
+
+    from app.services.processing.embeddings import get_model, warmup_model
+
+    warmup_model()
+    dim = get_model().get_sentence_embedding_dimension()
+
+    async def run() -> dict:
+        t0 = time.perf_counter()
+        job_id = await _seed(args.rows, min(args.vectors, args.rows), dim, index, args.seed)
+        seed_s = time.perf_counter() - t0
+        try:
+            result = await _drive(args, mix)
+        finally:
+            if not args.keep:
+                await _cleanup(job_id)
+            await engine.dispose()
+        return {"seed_s": round(seed_s, 2), **result}
+
+    try:
+        run_result = asyncio.run(run())
+    finally:
+        stub.stop()
+
+    result = {
+        "benchmark": "chat",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "rows": args.rows,
+            "vectors": min(args.vectors, args.rows),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": mix,
+            "groq_latency_ms": args.groq_latency_ms,
+            "groq_429_rate": args.groq_429_rate,
+            "single_flight": settings.chat_single_flight_enabled,
+            "speculative": settings.chat_speculative_execution,
+        },
+        **run_result,
+        "groq": stub.summary(),
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.services.processing.embedding_runtime import SUPPORTED_BACKENDS, EmbeddingBatcher, load_model
+
+SAMPLE_TEXTS = [
+    "Senior backend engineer with 6 years of Python, FastAPI and PostgreSQL experience.",
+    "Data engineer: Airflow, Spark, AWS S3 and Redshift; built ETL pipelines for analytics.",
+    "Frontend developer skilled in React, TypeScript and design systems.",
+    "DevOps engineer running Kubernetes clusters on GCP with Terraform and Helm.",
+    "Java developer, Spring Boot microservices, Kafka event streaming, 4 yrs.",
+]
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, int(round(p / 100.0 * (len(s) - 1)))))
+    return s[k]
+
+
+def _texts(n: int) -> list[str]:
+    return [f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} (sample {i})" for i in range(n)]
+
+
+def bench_backend(backend: str, *, requests: int, batch_size: int, concurrency: int, threads: int | None) -> dict:
+    t0 = time.perf_counter()
+    model = load_model(backend=backend, num_threads=threads)
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    model.encode(["warmup"], normalize_embeddings=True)
+    first_call_ms = (time.perf_counter() - t0) * 1000
+
+    # Single-query latency (the /chat/ask JD path)
+    single_ms: list[float] = []
+    for text in _texts(requests):
+        t0 = time.perf_counter()
+        model.encode([text], normalize_embeddings=True)
+        single_ms.append((time.perf_counter() - t0) * 1000)
+
+    # Bulk throughput (the ingest path)
+    bulk = _texts(batch_size * 4)
+    t0 = time.perf_counter()
+    model.encode(bulk, batch_size=batch_size, normalize_embeddings=True)
+    bulk_tps = len(bulk) / (time.perf_counter() - t0)
+
+    # Concurrent single-text callers, coalesced by the batcher
+    batcher = EmbeddingBatcher(
+        model,
+        max_batch_size=settings.embedding_batch_max_size,
+        max_wait_ms=settings.embedding_batch_wait_ms,
+    )
+    batched_ms: list[float] = []
+
+    def _one(text: str) -> None:
+        t = time.perf_counter()
+        batcher.encode([text])
+        batched_ms.append((time.perf_counter() - t) * 1000)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(_one, _texts(requests)))
+    batched_rps = requests / (time.perf_counter() - t0)
+
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 3),
+        "first_call_ms": round(first_call_ms, 2),
+        "single_p50_ms": round(statistics.median(single_ms), 2),
+        "single_p95_ms": round(_pct(single_ms, 95), 2),
+        "bulk_texts_per_s": round(bulk_tps, 1),
+        "batched_concurrency": concurrency,
+        "batched_p50_ms": round(statistics.median(batched_ms), 2),
+        "batched_p95_ms": round(_pct(batched_ms, 95), 2),
+        "batched_req_per_s": round(batched_rps, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare embedding backends (latency / throughput)")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx-int8"], choices=SUPPORTED_BACKENDS)
+    parser.add_argument("--requests", type=int, default=200, help="Single-text calls per measurement")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent callers for the batcher run")
+    parser.add_argument("--threads", type=int, default=settings.embedding_num_threads)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this file")
+    args = parser.parse_args()
+
+    print("model:", settings.embedding_model_name)
+    results = []
+    for backend in args.backends:
+        try:
+            r = bench_backend(
+                backend,
+                requests=args.requests,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                threads=args.threads,
+            )
+        except Exception as e:
+            print(f"{backend}: FAILED ({e})")
+            continue
+        results.append(r)
+        print(json.dumps(r))
+
+    if len(results) > 1:
+        base = results[0]
+        print("\nRELATIVE TO", base["backend"])
+        for r in results[1:]:
+            print(
+                f"{r['backend']}: single p50 x{base['single_p50_ms'] / max(r['single_p50_ms'], 1e-9):.2f}, "
+                f"bulk x{r['bulk_texts_per_s'] / max(base['bulk_texts_per_s'], 1e-9):.2f}, "
+                f"batched rps x{r['batched_req_per_s'] / max(base['batched_req_per_s'], 1e-9):.2f}"
+            )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,572 @@
+from __future__ import annotations
+
+# Local stand-ins for the external services, shared by the bench_* scripts:
+# a synthetic resume corpus, a fake Drive service, a stub Groq HTTP server and an
+# in-memory vector index. Nothing here is imported by the app itself.
+
+import asyncio
+import io
+import json
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DOC_MIME = "application/msword"
+
+SKILLS = [
+    "python", "django", "fastapi", "flask", "java", "spring", "javascript", "typescript",
+    "react", "node", "sql", "postgresql", "mysql", "mongodb", "redis", "kafka",
+    "docker", "kubernetes", "aws", "azure", "gcp",
+]
+# Recognised by the stub intent classifier but never put in a profile: forces the
+# "no DB match -> vector fallback" path
+RARE_SKILLS = ["elixir", "haskell", "erlang"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+ROLES = ["Backend Engineer", "Data Engineer", "Frontend Developer", "DevOps Engineer", "Full Stack Developer"]
+FILLER = (
+    "Delivered features end to end, worked closely with product and design, reviewed code, "
+    "mentored junior engineers and improved reliability of production services."
+)
+
+
+def pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, int(round(p / 100.0 * (len(s) - 1)))))
+    return s[k]
+
+
+# --- corpus -----------------------------------------------------------------
+
+
+def resume_text(rng: random.Random, i: int) -> str:
+    skills = rng.sample(SKILLS, k=rng.randint(3, 8))
+    lines = [
+        f"Candidate {i}",
+        f"candidate{i}@example.com | +1 555 {i:07d}",
+        "",
+        "SUMMARY",
+        f"{rng.choice(ROLES)} with {rng.randint(1, 15)} years of experience. {FILLER}",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE",
+    ]
+    for company in rng.sample(COMPANIES, k=rng.randint(1, 3)):
+        start = rng.randint(2008, 2021)
+        end = min(2025, start + rng.randint(1, 5))
+        lines += [
+            f"{rng.choice(ROLES)} - {company} ({start} - {end})",
+            f"Built services with {', '.join(rng.sample(skills, k=min(3, len(skills))))}. {FILLER}",
+            "",
+        ]
+    lines += ["EDUCATION", "B.Sc. Computer Science"]
+    return "\n".join(lines)
+
+
+def _pdf_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_pdf_bytes(text: str) -> bytes:
+    # Minimal single-page PDF with a Helvetica text stream (no PDF library needed)
+    ops = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+    for line in text.splitlines():
+        ops.append(f"({_pdf_escape(line)}) Tj T*")
+    ops.append("ET")
+    stream = "\n".join(ops).encode("latin-1", errors="replace")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{n} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for off in offsets:
+        out.write(f"{off:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def scanned_pdf_bytes(text: str) -> bytes:
+    # Image-only PDF: pypdf / pdfminer find no text, so extraction falls through to OCR
+    from PIL import Image, ImageDraw
+
+    lines = text.splitlines()
+    img = Image.new("L", (1240, 40 + 28 * len(lines)), color=255)
+    draw = ImageDraw.Draw(img)
+    for n, line in enumerate(lines):
+        draw.text((40, 20 + 28 * n), line, fill=0)
+    buf = io.BytesIO()
+    img.save(buf, format="PDF", resolution=150)
+    return buf.getvalue()
+
+
+def docx_bytes(text: str) -> bytes:
+    from docx import Document
+
+    doc = Document()
+    for line in text.splitlines():
+        doc.add_paragraph(line)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def doc_bytes(text: str) -> bytes | None:
+    # Legacy .doc via LibreOffice (the same tool the app uses to read them); None if unavailable
+    if shutil.which("soffice") is None:
+        return None
+    with tempfile.TemporaryDirectory() as td:
+        src = Path(td) / "resume.docx"
+        src.write_bytes(docx_bytes(text))
+        subprocess.run(
+            ["soffice", "--headless", "--nologo", "--convert-to", "doc", "--outdir", td, str(src)],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        out = Path(td) / "resume.doc"
+        return out.read_bytes() if out.exists() else None
+
+
+@dataclass
+class CorpusFile:
+    id: str
+    name: str
+    mime_type: str
+    kind: str
+    data: bytes
+    text: str
+
+    def meta(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "mimeType": self.mime_type,
+            "size": str(len(self.data)),
+            "modifiedTime": "2026-01-01T00:00:00.000Z",
+        }
+
+
+DEFAULT_MIX = {"pdf": 0.6, "docx": 0.25, "doc": 0.05, "scanned": 0.10}
+
+
+def build_corpus(n: int, mix: dict[str, float] | None = None, seed: int = 7) -> list[CorpusFile]:
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+
+    files: list[CorpusFile] = []
+    doc_ok = True
+    for i in range(n):
+        kind = rng.choices(kinds, weights=weights)[0]
+        text = resume_text(rng, i)
+        if kind == "doc" and doc_ok:
+            data = doc_bytes(text)
+            if data is None:
+                print("soffice not found: generating .docx instead of .doc")
+                doc_ok = False
+        if kind == "doc" and doc_ok:
+            mime, ext = DOC_MIME, "doc"
+        elif kind in ("docx", "doc"):
+            kind, mime, ext, data = "docx", DOCX_MIME, "docx", docx_bytes(text)
+        elif kind == "scanned":
+            mime, ext, data = PDF_MIME, "pdf", scanned_pdf_bytes(text)
+        else:
+            kind, mime, ext, data = "pdf", PDF_MIME, "pdf", text_pdf_bytes(text)
+        files.append(
+            CorpusFile(
+                id=f"fake-{i:06d}",
+                name=f"candidate_{i:06d}.{ext}",
+                mime_type=mime,
+                kind=kind,
+                data=data,
+                text=text,
+            )
+        )
+    return files
+
+
+# --- Drive ------------------------------------------------------------------
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class _Files:
+    def __init__(self, drive: "FakeDriveService") -> None:
+        self.drive = drive
+
+    def list(self, q: str = "", fields: str = "", pageToken: str | None = None, pageSize: int = 100, **kwargs):
+        def run():
+            start = int(pageToken or 0)
+            page = self.drive.listing[start : start + pageSize]
+            resp = {"files": page}
+            if start + pageSize < len(self.drive.listing):
+                resp["nextPageToken"] = str(start + pageSize)
+            return resp
+
+        return _Request(run)
+
+    def get(self, fileId: str, fields: str = "", **kwargs):
+        return _Request(lambda: self.drive.by_id[fileId].meta())
+
+    def get_media(self, fileId: str, **kwargs):
+        return _Request(lambda: self.drive.download(fileId))
+
+    def export(self, fileId: str, mimeType: str = "text/plain", **kwargs):
+        return _Request(lambda: self.drive.by_id[fileId].text.encode("utf-8"))
+
+
+class FakeDriveService:
+    # Enough of the googleapiclient Drive v3 surface for listing + downloads
+    def __init__(self, corpus: list[CorpusFile], download_latency_ms: float = 0.0) -> None:
+        self.by_id = {f.id: f for f in corpus}
+        self.listing = [f.meta() for f in corpus]
+        self.download_latency_s = download_latency_ms / 1000.0
+        self.downloads = 0
+        self._lock = threading.Lock()
+
+    def files(self) -> _Files:
+        return _Files(self)
+
+    def download(self, file_id: str, latency: bool = True) -> bytes:
+        if latency and self.download_latency_s:
+            time.sleep(self.download_latency_s)
+        with self._lock:
+            self.downloads += 1
+        return self.by_id[file_id].data
+
+
+class FakeAsyncDrive:
+    # The AsyncDriveClient surface the worker uses, on top of a FakeDriveService; latency is
+    # awaited, so downloads started ahead overlap like real ones
+    def __init__(self, drive: FakeDriveService) -> None:
+        self.drive = drive
+        self.batch_calls = 0
+
+    async def list_folder(self, folder_id: str) -> list[dict]:
+        return list(self.drive.listing)
+
+    async def get_files(self, file_ids: list[str], fields: str = "") -> dict:
+        from app.services.gdrive.async_client import BATCH_MAX, DriveApiError
+
+        ids = list(dict.fromkeys(file_ids))
+        self.batch_calls += (len(ids) + BATCH_MAX - 1) // BATCH_MAX
+        return {
+            fid: self.drive.by_id[fid].meta() if fid in self.drive.by_id else DriveApiError(404, "notFound", fid)
+            for fid in ids
+        }
+
+    async def download(self, file_id: str) -> bytes:
+        if self.drive.download_latency_s:
+            await asyncio.sleep(self.drive.download_latency_s)
+        return self.drive.download(file_id, latency=False)
+
+    async def export(self, file_id: str, mime_type: str = "text/plain") -> bytes:
+        return self.drive.by_id[file_id].text.encode("utf-8")
+
+
+def install_fake_drive(service: FakeDriveService) -> FakeAsyncDrive:
+    # Route the app's Drive entry points to the fake: the worker's async client, and the
+    # blocking helpers (MediaIoBaseDownload needs a real HTTP request)
+    import app.services.processing.text_extract as text_extract
+    import app.workers.ingest_worker as ingest_worker
+
+    text_extract.download_file_bytes = lambda svc, file_id: service.download(file_id)
+    text_extract.export_google_doc_bytes = lambda svc, file_id, mime_type="text/plain": (
+        service.files().export(fileId=file_id, mimeType=mime_type).execute()
+    )
+    drive = FakeAsyncDrive(service)
+    ingest_worker.get_async_drive_client = lambda: drive
+    return drive
+
+
+# --- vector store -----------------------------------------------------------
+
+
+class _Done:
+    def __init__(self, value=None) -> None:
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class InMemoryIndex:
+    # Pinecone Index stand-in: upsert / query (cosine, numpy brute force) per namespace
+    def __init__(self, upsert_latency_ms: float = 0.0, query_latency_ms: float = 0.0) -> None:
+        self.namespaces: dict[str, dict[str, tuple[list[float], dict]]] = {}
+        self.upsert_latency_s = upsert_latency_ms / 1000.0
+        self.query_latency_s = query_latency_ms / 1000.0
+        self._matrices: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors: list[dict], namespace: str = "", async_req: bool = False, **kwargs):
+        if self.upsert_latency_s:
+            time.sleep(self.upsert_latency_s)
+        with self._lock:
+            ns = self.namespaces.setdefault(namespace, {})
+            for v in vectors:
+                ns[v["id"]] = (list(v["values"]), dict(v.get("metadata") or {}))
+            self._matrices.pop(namespace, None)
+        result = {"upserted_count": len(vectors)}
+        return _Done(result) if async_req else result
+
+    def _matrix(self, namespace: str):
+        import numpy as np
+
+        with self._lock:
+            cached = self._matrices.get(namespace)
+            if cached is None:
+                items = list(self.namespaces.get(namespace, {}).items())
+                ids = [vid for vid, _ in items]
+                metas = [md for _, (_, md) in items]
+                mat = np.asarray([values for _, (values, _) in items], dtype=np.float32)
+                if len(items):
+                    mat /= np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12
+                cached = (ids, metas, mat)
+                self._matrices[namespace] = cached
+        return cached
+
+    def query(self, vector: list[float], top_k: int = 10, namespace: str = "", include_metadata: bool = False, **kwargs):
+        import numpy as np
+
+        if self.query_latency_s:
+            time.sleep(self.query_latency_s)
+        ids, metas, mat = self._matrix(namespace)
+        if not ids:
+            return {"matches": []}
+        q = np.asarray(vector, dtype=np.float32)
+        q /= np.linalg.norm(q) + 1e-12
+        scores = mat @ q
+        k = min(top_k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return {
+            "matches": [
+                {
+                    "id": ids[i],
+                    "score": float(scores[i]),
+                    **({"metadata": metas[i]} if include_metadata else {}),
+                }
+                for i in top
+            ]
+        }
+
+    def count(self, namespace: str = "") -> int:
+        return len(self.namespaces.get(namespace, {}))
+
+    def close(self) -> None:
+        pass
+
+
+def install_fake_index(index: InMemoryIndex) -> None:
+    import app.services.chat.pinecone_search as pinecone_search
+    import app.services.vectors.pinecone_client as pinecone_client
+    import app.workers.ingest_worker as ingest_worker
+    from app.core.config import settings
+
+    settings.pinecone_api_key = settings.pinecone_api_key or "bench"
+    settings.pinecone_index_host = settings.pinecone_index_host or "in-memory"
+    settings.pinecone_use_asyncio = False
+    pinecone_client._index = index
+    pinecone_search.get_index = lambda: index
+    ingest_worker.get_index = lambda: index
+
+
+# --- Groq -------------------------------------------------------------------
+
+
+def _summary(text: str) -> str:
+    words = re.findall(r"[A-Za-z]+", text) or ["resume"]
+    out = []
+    while len(out) < 195:
+        out.extend(words)
+    return " ".join(out[:195])
+
+
+def _fake_profile(text: str) -> dict:
+    low = text.lower()
+    skills = [s for s in SKILLS if re.search(rf"\b{re.escape(s)}\b", low)]
+    m = re.search(r"(\d+)\s+years", low)
+    years = float(m.group(1)) if m else None
+    return {
+        "total_years_experience": years,
+        "skills": skills,
+        "skill_experience_years": {s: float(years or 1) for s in skills},
+        "overall_summary": _summary(text),
+        "company_experience_years": {c: 2.0 for c in COMPANIES if c.lower() in low},
+        "projects": [],
+    }
+
+
+def _fake_intent(message: str) -> dict:
+    low = message.lower()
+    skill = next((s for s in SKILLS + RARE_SKILLS if re.search(rf"\b{re.escape(s)}\b", low)), None)
+    m = re.search(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years|yrs)\b", low)
+    years = float(m.group(1)) if m else None
+    if skill is None and years is None and len(low) < 200:
+        return {"intent": "GENERAL", "skill": None, "min_years": None}
+    return {"intent": "RESUME_FILTER", "skill": skill, "min_years": years}
+
+
+def stub_completion(messages: list[dict]) -> str:
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    if "resume parser" in system:
+        return json.dumps(_fake_profile(user))
+    if '"overall_summary": string }' in system:
+        return json.dumps({"overall_summary": _summary(user)})
+    if "RESUME_FILTER" in system:
+        return json.dumps(_fake_intent(user))
+    if '"skill": string|null' in system:
+        intent = _fake_intent(user)
+        return json.dumps({"skill": intent["skill"], "min_years": intent["min_years"]})
+    return "{}"
+
+
+@dataclass
+class StubGroqStats:
+    requests: int = 0
+    rate_limited: int = 0
+    latencies_ms: list[float] = field(default_factory=list)
+
+
+class StubGroqServer:
+    # OpenAI-compatible /chat/completions on localhost with fixed latency and a 429 rate.
+    # Point the app at it with settings.groq_base_url = server.url.
+    def __init__(self, latency_ms: float = 800.0, jitter_ms: float = 200.0, rate_429: float = 0.0, seed: int = 11) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.stats = StubGroqStats()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, status: int, body: dict, headers: dict | None = None) -> None:
+                raw = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.stats.requests += 1
+                    limited = stub._rng.random() < stub.rate_429
+                    delay = max(0.0, stub.latency_ms + stub._rng.uniform(-stub.jitter_ms, stub.jitter_ms))
+                if limited:
+                    with stub._lock:
+                        stub.stats.rate_limited += 1
+                    self._send(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                        {"retry-after": "1"},
+                    )
+                    return
+
+                time.sleep(delay / 1000.0)
+                with stub._lock:
+                    stub.stats.latencies_ms.append(delay)
+                content = stub_completion(payload.get("messages") or [])
+                self._send(
+                    200,
+                    {
+                        "id": f"chatcmpl-{uuid.uuid4().hex}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": payload.get("model") or "stub",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": content},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    },
+                )
+
+        return Handler
+
+    def start(self) -> "StubGroqServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def install(self) -> None:
+        from app.core.config import settings
+        from app.services.llm.router import reset_backends
+
+        settings.groq_api_key = "stub"
+        settings.groq_base_url = self.url
+        # Every LLM task goes to the stub, whatever LLM_ROUTES says
+        settings.llm_routes = {}
+        settings.llm_default_backend = "groq"
+        reset_backends()
+
+    def summary(self) -> dict:
+        s = self.stats
+        return {
+            "requests": s.requests,
+            "rate_limited": s.rate_limited,
+            "latency_p50_ms": round(pct(s.latencies_ms, 50), 1),
+            "latency_p95_ms": round(pct(s.latencies_ms, 95), 1),
+        }
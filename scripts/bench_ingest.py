@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+# End-to-end ingest benchmark: runs _run_ingest_job against a synthetic corpus served by a
+# fake Drive service, a stub Groq server and an in-memory vector index. Postgres is real:
+# point DATABASE_URL at a local database migrated with `alembic upgrade head`.
+#
+#   python -m scripts.bench_ingest --files 200 --groq-latency-ms 800 --groq-429-rate 0.05 \
+#       --out bench-results/ingest.json --compare bench-results/ingest-baseline.json
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, select
+
+from app.core.config import settings
+from app.db.models.file import File
+from app.db.models.job import Job
+from app.db.session import AsyncSessionLocal, engine
+from scripts.bench_fakes import (
+    DEFAULT_MIX,
+    FakeDriveService,
+    InMemoryIndex,
+    StubGroqServer,
+    build_corpus,
+    install_fake_drive,
+    install_fake_index,
+    pct,
+)
+
+NAMESPACE = "bench-ingest"
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _parse_mix(raw: str | None) -> dict[str, float]:
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in raw.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is KiB on Linux (bytes on macOS)
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def _stage_stats(rows: list[dict]) -> dict[str, dict]:
+    values: dict[str, list[float]] = {}
+    for timings in rows:
+        for key, v in timings.items():
+            if isinstance(v, (int, float)) and not key.startswith("prompt_"):
+                values.setdefault(key, []).append(float(v) * 1000)
+    return {
+        key: {
+            "count": len(vs),
+            "p50_ms": round(pct(vs, 50), 2),
+            "p95_ms": round(pct(vs, 95), 2),
+            "mean_ms": round(sum(vs) / len(vs), 2),
+        }
+        for key, vs in sorted(values.items())
+    }
+
+
+def _prompt_stats(rows: list[dict]) -> dict:
+    # Estimated LLM prompt tokens (resume text only) and what compaction saved
+    sent = sum(int(t.get("prompt_tokens") or 0) for t in rows)
+    saved = sum(int(t.get("prompt_tokens_saved") or 0) for t in rows)
+    return {"tokens": sent, "tokens_saved": saved, "savings": round(saved / (sent + saved), 4) if sent + saved else 0.0}
+
+
+async def _run(args) -> dict:
+    from app.workers.ingest_worker import _run_ingest_job
+
+    async with AsyncSessionLocal() as session:
+        job = Job(folder_url="https://drive.google.com/drive/folders/bench", status="queued")
+        session.add(job)
+        await session.commit()
+        job_id = job.id
+
+    t0 = time.perf_counter()
+    tasks = 1
+    finished = await _run_ingest_job(job_id, NAMESPACE)
+    while not finished:
+        # Time budget continuation, as the Celery task would re-enqueue it
+        tasks += 1
+        finished = await _run_ingest_job(job_id, NAMESPACE, continuation=True)
+    wall_s = time.perf_counter() - t0
+
+    async with AsyncSessionLocal() as session:
+        job = (await session.execute(select(Job).where(Job.id == job_id))).scalar_one()
+        rows = (
+            await session.execute(select(File.status, File.timings).where(File.job_id == job_id))
+        ).all()
+        if not args.keep:
+            await session.execute(delete(Job).where(Job.id == job_id))
+            await session.commit()
+
+    statuses: dict[str, int] = {}
+    methods: dict[str, int] = {}
+    for status, timings in rows:
+        statuses[status] = statuses.get(status, 0) + 1
+        method = (timings or {}).get("extract_method")
+        if method:
+            methods[method] = methods.get(method, 0) + 1
+
+    await engine.dispose()
+    return {
+        "job_id": str(job_id),
+        "job_status": job.status,
+        "tasks": tasks,
+        "wall_s": round(wall_s, 3),
+        "statuses": statuses,
+        "extract_methods": methods,
+        "stages": _stage_stats([t for _, t in rows if t]),
+        "prompt": _prompt_stats([t for _, t in rows if t]),
+    }
+
+
+def _compare(result: dict, baseline_path: str, max_regression: float) -> bool:
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    ok = True
+    base_fps, fps = baseline.get("files_per_s") or 0.0, result["files_per_s"]
+    change = (fps - base_fps) / base_fps if base_fps else 0.0
+    print(f"\nvs {baseline.get('commit')}: files/s {base_fps} -> {fps} ({change:+.1%})")
+    if change < -max_regression:
+        ok = False
+    for stage, cur in result["stages"].items():
+        prev = (baseline.get("stages") or {}).get(stage)
+        if not prev or not prev.get("p95_ms"):
+            continue
+        delta = (cur["p95_ms"] - prev["p95_ms"]) / prev["p95_ms"]
+        print(f"  {stage:<18} p95 {prev['p95_ms']:>10.1f} -> {cur['p95_ms']:>10.1f} ms ({delta:+.1%})")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the ingest pipeline with local fakes")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--mix", default=None, help="e.g. pdf=0.6,docx=0.25,doc=0.05,scanned=0.1")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--groq-latency-ms", type=float, default=800.0)
+    parser.add_argument("--groq-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--groq-429-rate", type=float, default=0.0)
+    parser.add_argument("--no-llm", action="store_true", help="Heuristic profiles only (no Groq stub)")
+    parser.add_argument("--download-latency-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--download-ahead", type=int, default=None, help="Override GDRIVE_DOWNLOAD_AHEAD (0: download on demand)"
+    )
+    parser.add_argument("--upsert-latency-ms", type=float, default=0.0)
+    parser.add_argument("--cold", action="store_true", help="Don't load the embedding model before timing")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark job rows")
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to diff against")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Exit 1 if files/s drops more than this")
+    args = parser.parse_args()
+
+    mix = _parse_mix(args.mix)
+    t0 = time.perf_counter()
+    corpus = build_corpus(args.files, mix, seed=args.seed)
+    corpus_s = time.perf_counter() - t0
+    kinds: dict[str, int] = {}
+    for f in corpus:
+        kinds[f.kind] = kinds.get(f.kind, 0) + 1
+    print(f"corpus: {len(corpus)} files {kinds} in {corpus_s:.1f}s")
+
+    install_fake_drive(FakeDriveService(corpus, download_latency_ms=args.download_latency_ms))
+    if args.download_ahead is not None:
+        settings.gdrive_download_ahead = args.download_ahead
+    index = InMemoryIndex(upsert_latency_ms=args.upsert_latency_ms)
+    install_fake_index(index)
+    settings.job_events_enabled = False
+
+    stub = None
+    if args.no_llm:
+        settings.groq_api_key = None
+        settings.llm_routes = {}
+        settings.llm_default_backend = "groq"
+    else:
+        stub = StubGroqServer(
+            latency_ms=args.groq_latency_ms,
+            jitter_ms=args.groq_jitter_ms,
+            rate_429=args.groq_429_rate,
+        ).start()
+        stub.install()
+
+    if not args.cold:
+        from app.services.processing.embeddings import warmup_model
+
+        warmup_model()
+
+    try:
+        run = asyncio.run(_run(args))
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    result = {
+        "benchmark": "ingest",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "files": args.files,
+            "mix": mix,
+            "kinds": kinds,
+            "seed": args.seed,
+            "groq_latency_ms": None if args.no_llm else args.groq_latency_ms,
+            "groq_429_rate": None if args.no_llm else args.groq_429_rate,
+            "download_latency_ms": args.download_latency_ms,
+            "download_ahead": settings.gdrive_download_ahead,
+            "upsert_latency_ms": args.upsert_latency_ms,
+            "embedding_backend": settings.embedding_backend,
+            "flush_every": settings.ingest_db_flush_every,
+        },
+        **run,
+        "files_per_s": round(args.files / run["wall_s"], 3) if run["wall_s"] else 0.0,
+        "vectors_upserted": index.count(NAMESPACE),
+        "groq": stub.summary() if stub is not None else None,
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_rss_children_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    if args.compare and not _compare(result, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
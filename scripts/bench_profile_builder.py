@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+# Micro-benchmark for the heuristic profile builder (the Groq fallback): the single-pass
+# app.services.resume.profile_builder against the previous multi-pass implementation,
+# kept verbatim below as the baseline. Checks both produce identical profiles on the
+# corpus and reports files/s, per-file latency and peak memory. Pure CPU, no services.
+#
+#   python -m scripts.bench_profile_builder --files 20000 --out bench-results/profile_builder.json
+
+import argparse
+import json
+import random
+import re
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.services.resume.profile_builder import _KNOWN_SKILLS, build_resume_profile
+from app.services.resume.profile_schema import Project, ResumeProfile
+from scripts.bench_fakes import COMPANIES, FILLER, SKILLS, pct, resume_text
+
+
+# --- baseline: profile_builder before the single-pass rewrite -----------------------------
+
+def _first_n_words(text: str, n: int) -> str:
+    words = re.split(r"\s+", (text or "").strip())
+    words = [w for w in words if w]
+    return " ".join(words[:n]).strip()
+
+
+def _extract_total_years(text: str) -> float | None:
+    t = (text or "").lower()
+
+    # Examples: "3 years", "2.5 yrs", "5+ years"
+    matches = re.findall(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years|yrs)\b", t)
+    if not matches:
+        return None
+
+    nums = []
+    for m in matches:
+        try:
+            nums.append(float(m))
+        except Exception:
+            pass
+    return max(nums) if nums else None
+
+
+def _extract_skills(text: str) -> list[str]:
+    t = (text or "").lower()
+    found = []
+    for s in _KNOWN_SKILLS:
+        if re.search(rf"\b{re.escape(s)}\b", t):
+            found.append(s)
+    # de-dup while preserving order
+    seen = set()
+    out = []
+    for s in found:
+        if s not in seen:
+            out.append(s)
+            seen.add(s)
+    return out
+
+
+def _extract_skill_years(text: str, skills: list[str]) -> dict[str, float]:
+    # Best-effort for patterns like:
+    # "Python - 3 years", "Django: 1.5 yrs"
+    t = (text or "").lower()
+    out: dict[str, float] = {}
+    for s in skills:
+        m = re.search(rf"\b{re.escape(s)}\b\s*[:\-–]\s*(\d+(?:\.\d+)?)\s*(?:years|yrs)\b", t)
+        if m:
+            try:
+                out[s] = float(m.group(1))
+            except Exception:
+                pass
+    return out
+
+
+def _extract_companies(text: str) -> dict[str, float]:
+    # Heuristic only. This does NOT reliably compute durations for all formats.
+    # Captures lines like: "Company: Infosys (2 years)" OR "Infosys - 2 yrs"
+    out: dict[str, float] = {}
+    for line in (text or "").splitlines():
+        l = line.strip()
+        if not l:
+            continue
+
+        m1 = re.search(r"Company\s*[:\-]\s*([A-Za-z0-9 &.,]+).*?(\d+(?:\.\d+)?)\s*(?:years|yrs)\b", l, re.I)
+        if m1:
+            name = m1.group(1).strip()
+            yrs = float(m1.group(2))
+            out[name] = max(out.get(name, 0.0), yrs)
+            continue
+
+        m2 = re.search(r"^([A-Za-z0-9 &.,]{2,})\s*[-–]\s*(\d+(?:\.\d+)?)\s*(?:years|yrs)\b", l, re.I)
+        if m2:
+            name = m2.group(1).strip()
+            yrs = float(m2.group(2))
+            out[name] = max(out.get(name, 0.0), yrs)
+
+    return out
+
+
+def _extract_projects(text: str) -> list[Project]:
+    # Minimal heuristic:
+    # Look for "Projects" section and take next lines with "Project" / ":" patterns.
+    lines = (text or "").splitlines()
+    projects: list[Project] = []
+
+    idx = None
+    for i, ln in enumerate(lines):
+        if re.search(r"\bprojects?\b", ln, re.I):
+            idx = i
+            break
+    if idx is None:
+        return projects
+
+    chunk = lines[idx : idx + 60]  # small window after Projects heading
+    for ln in chunk:
+        l = ln.strip()
+        if not l:
+            continue
+
+        # Example: "Project: CRM System - Built APIs..."
+        m = re.match(r"^(?:project\s*[:\-]\s*)?(.{3,80}?)(?:\s*[:\-]\s*(.+))?$", l, re.I)
+        if not m:
+            continue
+
+        name = (m.group(1) or "").strip()
+        desc = (m.group(2) or "").strip() if m.group(2) else None
+
+        # Avoid capturing the heading itself
+        if re.fullmatch(r"projects?", name, re.I):
+            continue
+
+        projects.append(Project(domain=None, project_name=name, project_description=desc))
+
+        if len(projects) >= 5:
+            break
+
+    return projects
+
+
+def legacy_build_resume_profile(text: str) -> ResumeProfile:
+    total_years = _extract_total_years(text)
+    skills = _extract_skills(text)
+    skill_years = _extract_skill_years(text, skills)
+    companies = _extract_companies(text)
+    projects = _extract_projects(text)
+
+    summary = _first_n_words(text, 200)
+    overview = _first_n_words(text, 120)
+
+    return ResumeProfile(
+        total_years_experience=total_years,
+        skills=skills,
+        skill_experience_years=skill_years,
+        overall_summary=summary or None,
+        overview_for_rag=overview or None,
+        company_experience_years=companies,
+        projects=projects,
+    )
+
+
+# --- corpus ---------------------------------------------------------------------------------
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def rich_resume_text(rng: random.Random, i: int, blocks: int) -> str:
+    # Exercises every extractor: "skill - N years", company durations, a projects section
+    skills = rng.sample(SKILLS, k=rng.randint(4, 10))
+    lines = [
+        f"CANDIDATE {i}",
+        f"Senior engineer with {rng.randint(1, 20)}+ years of experience. {FILLER}",
+        "",
+        "SKILLS",
+    ]
+    lines += [f"{s.capitalize()} - {rng.randint(1, 12)} {rng.choice(['years', 'yrs'])}" for s in skills[:4]]
+    lines += [", ".join(skills[4:]) or "Communication", "", "EXPERIENCE"]
+    for b in range(blocks):
+        company = rng.choice(COMPANIES)
+        if rng.random() < 0.5:
+            lines.append(f"Company: {company} ({rng.randint(1, 6)} years)")
+        else:
+            lines.append(f"{company} - {rng.uniform(0.5, 6):.1f} yrs")
+        lines.append(f"Worked on {', '.join(rng.sample(skills, k=3))}. {FILLER}")
+        lines.append("")
+    lines += ["PROJECTS"]
+    for p in range(rng.randint(1, 7)):
+        lines.append(f"Project: {rng.choice(['CRM', 'Billing', 'Search', 'Payments'])} System {p} - Built APIs with {rng.choice(skills)}")
+    lines += ["", "EDUCATION", "B.Sc. Computer Science"]
+    return "\n".join(lines)
+
+
+def build_texts(n: int, long_ratio: float, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    texts = []
+    for i in range(n):
+        roll = rng.random()
+        if roll < long_ratio:
+            texts.append(rich_resume_text(rng, i, blocks=rng.randint(20, 60)))  # 10-30 KB
+        elif roll < 0.5 + long_ratio / 2:
+            texts.append(rich_resume_text(rng, i, blocks=rng.randint(1, 5)))
+        else:
+            texts.append(resume_text(rng, i))
+    # Edge cases: empty, whitespace, no newline, unicode dashes
+    texts += ["", "   \n\t ", "python-2 years java: 3.5 yrs", "Acme – 2 years\nProjects\nProject: X – y"]
+    return texts
+
+
+# --- benchmark ------------------------------------------------------------------------------
+
+
+def _run(builder, texts: list[str], rounds: int) -> dict:
+    per_file_us: list[float] = []
+    best_s = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for text in texts:
+            t1 = time.perf_counter()
+            builder(text)
+            per_file_us.append((time.perf_counter() - t1) * 1e6)
+        best_s = min(best_s, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    for text in texts[:200]:
+        builder(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "best_round_s": round(best_s, 3),
+        "files_per_s": round(len(texts) / best_s, 1) if best_s else 0.0,
+        "p50_us": round(pct(per_file_us, 50), 1),
+        "p95_us": round(pct(per_file_us, 95), 1),
+        "p99_us": round(pct(per_file_us, 99), 1),
+        "peak_kb_200_files": round(peak / 1024, 1),
+    }
+
+
+def _mismatches(texts: list[str], limit: int = 5) -> tuple[int, list[dict]]:
+    count = 0
+    examples = []
+    for n, text in enumerate(texts):
+        old = legacy_build_resume_profile(text).model_dump()
+        new = build_resume_profile(text).model_dump()
+        if old != new:
+            count += 1
+            if len(examples) < limit:
+                diff = {k: {"old": old[k], "new": new[k]} for k in old if old[k] != new[k]}
+                examples.append({"index": n, "diff": diff})
+    return count, examples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the heuristic profile builder against the multi-pass baseline")
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--long-ratio", type=float, default=0.2, help="Share of 10-30 KB resumes")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-verify", action="store_true", help="Skip the identical-output check")
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    texts = build_texts(args.files, args.long_ratio, args.seed)
+    corpus_mb = sum(len(t) for t in texts) / 1e6
+    print(f"corpus: {len(texts)} texts, {corpus_mb:.1f} MB", flush=True)
+
+    mismatches, examples = (0, []) if args.no_verify else _mismatches(texts)
+
+    baseline = _run(legacy_build_resume_profile, texts, args.rounds)
+    single_pass = _run(build_resume_profile, texts, args.rounds)
+
+    result = {
+        "benchmark": "profile_builder",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "files": len(texts),
+            "corpus_mb": round(corpus_mb, 2),
+            "long_ratio": args.long_ratio,
+            "rounds": args.rounds,
+            "known_skills": len(_KNOWN_SKILLS),
+        },
+        "baseline": baseline,
+        "single_pass": single_pass,
+        "speedup": round(baseline["best_round_s"] / single_pass["best_round_s"], 2) if single_pass["best_round_s"] else None,
+        "mismatches": mismatches,
+        "mismatch_examples": examples,
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} profiles differ from the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+# Prompt compaction check: token savings of app.services.resume.prompt_compaction on a
+# corpus (synthetic multi-page resumes with the usual boilerplate, or a local folder), and
+# profile quality against the uncompacted baseline:
+#
+# - heuristic (no services): build_resume_profile on the baseline and on the compacted
+#   text must agree on skills, skill/company years and projects
+# - --llm N: the first N resumes are profiled by the "profile" LLM backend from both
+#   prompts and compared (skills / companies Jaccard, total years delta)
+#
+# Exits 1 when agreement falls below --min-heuristic-match / --min-llm-jaccard.
+#
+#   python -m scripts.bench_prompt_compaction --files 2000 --out bench-results/prompt_compaction.json
+#   python -m scripts.bench_prompt_compaction --folder ./resumes --llm 50
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.resume.profile_builder import build_resume_profile
+from app.services.resume.prompt_compaction import compact_resume_text
+from scripts.bench_fakes import pct
+from scripts.bench_profile_builder import rich_resume_text
+
+HOBBIES = ["Chess, hiking and photography", "Reading, travel, cooking", "Football and music"]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def noisy_resume_text(rng: random.Random, i: int) -> tuple[str, str]:
+    # (noisy, clean): rich_resume_text laid out as extracted from a multi-page PDF, with a
+    # contact block, running header/footer and page numbers, bullets, ragged whitespace and
+    # trailing boilerplate
+    clean = rich_resume_text(rng, i, blocks=rng.randint(2, 30))
+    body = clean.split("\n")
+    body[1:1] = [
+        f"Email: candidate{i}@example.com  |  Phone: +1 (555) {i % 1000:03d}-{rng.randint(1000, 9999)}",
+        f"LinkedIn: https://www.linkedin.com/in/candidate-{i}   GitHub: github.com/cand{i}",
+        f"Address: {rng.randint(1, 999)} Main Street, Springfield",
+    ]
+    body = [f"•   {line}" if line.startswith("Worked on") else line for line in body]
+    body += [
+        "",
+        "HOBBIES",
+        rng.choice(HOBBIES),
+        "",
+        "PERSONAL DETAILS",
+        f"Date of Birth: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/19{rng.randint(70, 99)}",
+        "Nationality: Examplean",
+        "",
+        "REFERENCES",
+        "John Smith, Engineering Manager, Acme Corp, john.smith@example.com",
+        "References available upon request.",
+        "",
+        "DECLARATION",
+        "I hereby declare that the above information is true to the best of my knowledge.",
+    ]
+
+    per_page = 25
+    chunks = [body[n : n + per_page] for n in range(0, len(body), per_page)]
+    pages = []
+    for n, chunk in enumerate(chunks, start=1):
+        header = [f"Candidate {i} - Curriculum Vitae", "_" * 40]
+        footer = ["", f"Page {n} of {len(chunks)}", "Confidential"]
+        pages.append("\n".join(header + ["  ".join(line.split(" ")) if n % 2 else line for line in chunk] + footer))
+    return "\n\f\n".join(pages), clean
+
+
+def _load_folder(folder: Path, limit: int) -> list[str]:
+    from app.services.processing.text_extract import LOCAL_SUFFIX_MIME, get_text_for_local_file
+
+    texts = []
+    for path in sorted(p for p in folder.rglob("*") if p.is_file() and p.suffix.lower() in LOCAL_SUFFIX_MIME):
+        try:
+            text = get_text_for_local_file(path)
+        except Exception as e:
+            print(f"skip {path}: {type(e).__name__}: {e}")
+            continue
+        if text.strip():
+            texts.append(text)
+        if limit and len(texts) >= limit:
+            break
+    return texts
+
+
+def _savings(texts: list[str]) -> tuple[dict, list]:
+    results = []
+    per_file_us: list[float] = []
+    for text in texts:
+        t0 = time.perf_counter()
+        results.append(compact_resume_text(text))
+        per_file_us.append((time.perf_counter() - t0) * 1e6)
+
+    before = sum(r.tokens_before for r in results)
+    after = sum(r.tokens_after for r in results)
+    removed: dict[str, int] = {}
+    for r in results:
+        for reason, n in r.removed.items():
+            removed[reason] = removed.get(reason, 0) + n
+    return {
+        "tokens_before": before,
+        "tokens_after": after,
+        "savings": round(1 - after / before, 4) if before else 0.0,
+        "per_file_savings_p50": round(pct([r.savings for r in results], 50), 4),
+        "per_file_savings_p95": round(pct([r.savings for r in results], 95), 4),
+        "compact_p50_us": round(pct(per_file_us, 50), 1),
+        "compact_p95_us": round(pct(per_file_us, 95), 1),
+        "removed_lines": dict(sorted(removed.items())),
+    }, results
+
+
+def _heuristic_view(text: str) -> dict:
+    # Whitespace inside names is not information
+    p = build_resume_profile(text)
+
+    def norm(s: str) -> str:
+        return " ".join(s.split())
+
+    return {
+        "skills": sorted(p.skills),
+        "skill_experience_years": {norm(k): v for k, v in p.skill_experience_years.items()},
+        "company_experience_years": {norm(k): v for k, v in p.company_experience_years.items()},
+        "projects": sorted(norm(pr.project_name) for pr in p.projects),
+    }
+
+
+def _heuristic_check(references: list[str], results: list, limit: int = 5) -> dict:
+    # Synthetic corpus: the reference is the clean resume the noisy text was made from, so
+    # compaction must recover exactly its profile. Folder: the uncompacted baseline prompt.
+    matches = 0
+    examples = []
+    for n, (reference, result) in enumerate(zip(references, results)):
+        old = _heuristic_view(reference.strip()[: settings.llm_prompt_max_chars])
+        new = _heuristic_view(result.text)
+        if old == new:
+            matches += 1
+        elif len(examples) < limit:
+            examples.append({"index": n, "diff": {k: {"reference": old[k], "compacted": new[k]} for k in old if old[k] != new[k]}})
+    return {"match_rate": round(matches / len(references), 4) if references else 1.0, "examples": examples}
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+async def _llm_check(texts: list[str], concurrency: int) -> dict:
+    from app.services.resume.llm_profile_builder import llm_build_resume_profile
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def both(text: str) -> dict | None:
+        async with slots:
+            try:
+                base = await llm_build_resume_profile(text, compact=False)
+                comp = await llm_build_resume_profile(text, compact=True)
+            except Exception as e:
+                print(f"llm error: {type(e).__name__}: {e}")
+                return None
+        return {
+            "skills_jaccard": _jaccard({s.lower() for s in base.skills}, {s.lower() for s in comp.skills}),
+            "companies_jaccard": _jaccard(
+                {c.lower() for c in base.company_experience_years}, {c.lower() for c in comp.company_experience_years}
+            ),
+            "total_years_delta": abs((base.total_years_experience or 0.0) - (comp.total_years_experience or 0.0)),
+            "projects_delta": abs(len(base.projects) - len(comp.projects)),
+        }
+
+    rows = [r for r in await asyncio.gather(*(both(t) for t in texts)) if r is not None]
+    if not rows:
+        return {"files": 0}
+    return {
+        "files": len(rows),
+        **{f"{key}_mean": round(sum(r[key] for r in rows) / len(rows), 4) for key in rows[0]},
+        "skills_jaccard_p5": round(pct([r["skills_jaccard"] for r in rows], 5), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure prompt compaction savings and profile agreement with the baseline")
+    parser.add_argument("--files", type=int, default=1000, help="Synthetic resumes (or max files with --folder)")
+    parser.add_argument("--folder", type=Path, default=None, help="Use real resumes from this folder instead")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--llm", type=int, default=0, help="Also compare LLM profiles on the first N resumes")
+    parser.add_argument("--llm-concurrency", type=int, default=2)
+    parser.add_argument("--min-heuristic-match", type=float, default=0.98)
+    parser.add_argument("--min-llm-jaccard", type=float, default=0.8, help="Mean skills Jaccard, baseline vs compacted")
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    if args.folder is not None:
+        texts = _load_folder(args.folder, args.files)
+        references = texts
+    else:
+        rng = random.Random(args.seed)
+        texts, references = map(list, zip(*(noisy_resume_text(rng, i) for i in range(args.files)))) if args.files else ([], [])
+    print(f"corpus: {len(texts)} texts, {sum(len(t) for t in texts) / 1e6:.1f} MB", flush=True)
+
+    savings, results = _savings(texts)
+    heuristic = _heuristic_check(references, results)
+    llm = asyncio.run(_llm_check(texts[: args.llm], args.llm_concurrency)) if args.llm else None
+
+    result = {
+        "benchmark": "prompt_compaction",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "files": len(texts),
+            "source": str(args.folder) if args.folder else "synthetic",
+            "max_chars": settings.llm_prompt_max_chars,
+            "llm_files": args.llm,
+        },
+        **savings,
+        "heuristic": heuristic,
+        "llm": llm,
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    failures = []
+    if heuristic["match_rate"] < args.min_heuristic_match:
+        failures.append(f"heuristic match rate {heuristic['match_rate']} < {args.min_heuristic_match}")
+    if llm and llm.get("files") and llm["skills_jaccard_mean"] < args.min_llm_jaccard:
+        failures.append(f"LLM skills Jaccard {llm['skills_jaccard_mean']} < {args.min_llm_jaccard}")
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
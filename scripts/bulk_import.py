@@ -0,0 +1,596 @@
+from __future__ import annotations
+
+# Offline bulk import of a local folder (or a .tar / .tar.gz / .tgz of one) into
+# ingested_files and Pinecone, without going through Google Drive.
+#
+# - an existing <name>.llm.json next to a resume (e.g. from batch_resume_profile_llm) is used
+#   as its profile and the file is not even opened; other files are extracted in a process
+#   pool and get the heuristic profile
+# - summaries are embedded in batches and upserted with upsert_vectors_batched
+# - rows go to Postgres with COPY into a temp table + one INSERT ... ON CONFLICT per chunk,
+#   so re-running with --job-id resumes a partial import instead of duplicating it
+#
+#   python -m scripts.bulk_import ./resumes --namespace default
+#   python -m scripts.bulk_import resumes.tar.gz --chunk-size 2000 --workers 8
+#   python -m scripts.bulk_import ./resumes --job-id <uuid>        # resume / refresh an import
+#
+# --skip-vectors leaves rows queued at the profiled checkpoint and the job vectors_pending;
+# re-running with --job-id (without --skip-vectors) upserts them from the stored profiles
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import tarfile
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.metrics import StageTimings
+from app.db.models.file import File
+from app.db.models.job import Job
+from app.db.session import AsyncSessionLocal, engine
+from app.services.jobs.events import job_event, progress_event, publish_job_events
+from app.services.processing.dedup import lsh_band_keys, minhash_signature, signature_bytes
+from app.services.processing.text_extract import LOCAL_SUFFIX_MIME, UnsupportedMimeType, text_from_bytes
+from app.services.resume.profile_builder import build_resume_profile
+from app.services.resume.profile_schema import ResumeProfile
+from app.workers.file_writer import file_row_id, load_file_states
+from app.workers.ingest_worker import DONE_STATUSES
+
+PROFILE_SUFFIX = ".llm.json"
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+_STAGE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS bulk_import_stage (
+    id uuid,
+    gdrive_file_id text,
+    name text,
+    mime_type text,
+    status text,
+    stage text,
+    num_chunks integer,
+    resume_profile text,
+    profile_tier text,
+    timings text,
+    error text,
+    minhash bytea,
+    lsh_bands bigint[]
+)
+"""
+_STAGE_COLUMNS = [
+    "id",
+    "gdrive_file_id",
+    "name",
+    "mime_type",
+    "status",
+    "stage",
+    "num_chunks",
+    "resume_profile",
+    "profile_tier",
+    "timings",
+    "error",
+    "minhash",
+    "lsh_bands",
+]
+
+# Same merge rules as FileRowWriter.flush
+_UPSERT_SQL = """
+INSERT INTO ingested_files (
+    id, job_id, gdrive_file_id, name, mime_type, status, stage, num_chunks,
+    resume_profile, profile_tier, timings, error, minhash, lsh_bands, created_at
+)
+SELECT id, $1, gdrive_file_id, name, mime_type, status, stage, num_chunks,
+       resume_profile::jsonb, profile_tier, timings::jsonb, error, minhash, lsh_bands, now()
+FROM bulk_import_stage
+ON CONFLICT ON CONSTRAINT uq_ingested_files_job_id_gdrive_file_id DO UPDATE SET
+    name = excluded.name,
+    mime_type = excluded.mime_type,
+    status = excluded.status,
+    stage = excluded.stage,
+    error = excluded.error,
+    resume_profile = coalesce(excluded.resume_profile, ingested_files.resume_profile),
+    profile_tier = coalesce(excluded.profile_tier, ingested_files.profile_tier),
+    num_chunks = coalesce(excluded.num_chunks, ingested_files.num_chunks),
+    minhash = coalesce(excluded.minhash, ingested_files.minhash),
+    lsh_bands = coalesce(excluded.lsh_bands, ingested_files.lsh_bands),
+    timings = coalesce(ingested_files.timings, '{}'::jsonb) || coalesce(excluded.timings, '{}'::jsonb)
+"""
+
+# Profiles of rows left at the profiled checkpoint (an earlier --skip-vectors run)
+_STORED_PROFILES_SQL = """
+SELECT gdrive_file_id, resume_profile::text, profile_tier
+FROM ingested_files
+WHERE job_id = $1 AND gdrive_file_id = any($2::text[]) AND stage = 'profiled' AND resume_profile IS NOT NULL
+"""
+
+# Recount instead of deltas: one importer per job, and it also repairs counts after a crash
+_COUNTERS_SQL = """
+UPDATE ingestion_jobs AS j SET
+    succeeded_files = c.succeeded,
+    failed_files = c.failed,
+    skipped_files = c.skipped
+FROM (
+    SELECT count(*) FILTER (WHERE status = 'succeeded') AS succeeded,
+           count(*) FILTER (WHERE status = 'failed') AS failed,
+           count(*) FILTER (WHERE status = 'skipped') AS skipped
+    FROM ingested_files WHERE job_id = $1
+) AS c
+WHERE j.id = $1
+RETURNING j.total_files, j.succeeded_files, j.failed_files, j.skipped_files
+"""
+
+
+@dataclass
+class Source:
+    rel: str
+    mime_type: str
+    path: Path | None = None
+    member: tarfile.TarInfo | None = None
+    profile_json: str | None = None
+
+
+def local_file_id(rel: str) -> str:
+    # Stable stand-in for the Drive file id (the column is 128 chars, paths can be longer)
+    return "local:" + hashlib.sha1(rel.encode("utf-8")).hexdigest()
+
+
+def _is_tar(path: Path) -> bool:
+    return path.is_file() and path.name.lower().endswith(TAR_SUFFIXES)
+
+
+def _profile_key(rel: str) -> str:
+    stem, _, _ = rel.rpartition(".")
+    return stem
+
+
+def scan_folder(folder: Path) -> list[Source]:
+    sources: list[Source] = []
+    for p in sorted(folder.rglob("*")):
+        if not p.is_file() or p.suffix.lower() not in LOCAL_SUFFIX_MIME:
+            continue
+        profile_path = p.with_name(p.stem + PROFILE_SUFFIX)
+        sources.append(
+            Source(
+                rel=str(p.relative_to(folder)),
+                mime_type=LOCAL_SUFFIX_MIME[p.suffix.lower()],
+                path=p,
+                profile_json=profile_path.read_text(encoding="utf-8") if profile_path.exists() else None,
+            )
+        )
+    return sources
+
+
+def scan_tar(tar: tarfile.TarFile) -> list[Source]:
+    # Profiles are small: read them all up front, resumes are read chunk by chunk later
+    members = [m for m in tar.getmembers() if m.isfile()]
+    profiles: dict[str, str] = {}
+    for m in members:
+        if m.name.lower().endswith(PROFILE_SUFFIX):
+            fh = tar.extractfile(m)
+            if fh is not None:
+                profiles[m.name[: -len(PROFILE_SUFFIX)]] = fh.read().decode("utf-8", errors="ignore")
+
+    sources: list[Source] = []
+    for m in sorted(members, key=lambda m: m.name):
+        suffix = Path(m.name).suffix.lower()
+        if suffix not in LOCAL_SUFFIX_MIME or m.name.lower().endswith(PROFILE_SUFFIX):
+            continue
+        sources.append(
+            Source(
+                rel=m.name,
+                mime_type=LOCAL_SUFFIX_MIME[suffix],
+                member=m,
+                profile_json=profiles.get(_profile_key(m.name)),
+            )
+        )
+    return sources
+
+
+def _fingerprint(text: str | None, timings: StageTimings) -> dict:
+    # MinHash / LSH bands as the worker's dedup stage stores them, so imported rows are found
+    # as canonicals by later Drive ingests
+    if not settings.dedup_enabled:
+        return {}
+    with timings.stage("dedup"):
+        signature = minhash_signature(text or "")
+        if signature is None:
+            return {}
+        return {"minhash": signature_bytes(signature), "lsh_bands": lsh_band_keys(signature)}
+
+
+def _extract(raw: bytes | str, mime_type: str) -> tuple[str | None, dict | None, str | None, bool, dict]:
+    # Runs in a worker process: (text, timings, error, unsupported, fingerprint)
+    timings = StageTimings()
+    try:
+        if isinstance(raw, str):
+            with timings.stage("download", "local"):
+                raw = Path(raw).read_bytes()
+        text = text_from_bytes(raw, mime_type, timings)
+    except UnsupportedMimeType as e:
+        return None, timings.as_dict(), str(e), True, {}
+    except Exception:
+        return None, timings.as_dict(), traceback.format_exc(), False, {}
+    fingerprint = _fingerprint(text, timings)
+    return text, timings.as_dict(), None, False, fingerprint
+
+
+def _profile_from_json(raw: str, timings: StageTimings) -> tuple[ResumeProfile, str]:
+    # (profile, tier). The batch profiler records its builder in the file; files without
+    # the marker are from older runs and may be heuristic, so they are not claimed as llm
+    with timings.stage("llm", "import"):
+        data = json.loads(raw)
+        data.pop("overall_summary_embedding", None)
+        tier = data.pop("profile_tier", None)
+        return ResumeProfile.model_validate(data), tier if tier in ("llm", "heuristic") else "heuristic"
+
+
+def _profile_dump(profile: ResumeProfile) -> str:
+    # Vectors go to Pinecone only, as in the worker
+    return json.dumps(
+        profile.model_dump(mode="json", exclude_none=True, exclude={"overall_summary_embedding"}),
+        ensure_ascii=False,
+    )
+
+
+class Importer:
+    def __init__(
+        self, args: argparse.Namespace, job_id: uuid.UUID, ids: dict[str, uuid.UUID], profiled: set[str]
+    ) -> None:
+        self.args = args
+        self.job_id = job_id
+        self.ids = ids
+        # Rows stored at the profiled checkpoint: their stored profile is reused
+        self.profiled = profiled
+        self.counts: dict[str, int] = {}
+        self.stage_s: dict[str, float] = {}
+        self.index = None
+        if not args.skip_vectors:
+            from app.services.vectors.pinecone_client import get_index
+
+            self.index = get_index()
+
+    def _time(self, stage: str, seconds: float) -> None:
+        self.stage_s[stage] = self.stage_s.get(stage, 0.0) + seconds
+
+    async def _stored_profiles(self, conn: asyncpg.Connection, chunk: list[Source]) -> dict[str, tuple[str, str]]:
+        if self.args.reprofile:
+            return {}
+        gids = [gid for gid in (local_file_id(src.rel) for src in chunk) if gid in self.profiled]
+        if not gids:
+            return {}
+        records = await conn.fetch(_STORED_PROFILES_SQL, self.job_id, gids)
+        return {r[0]: (r[1], r[2] or "heuristic") for r in records}
+
+    async def _extract_all(
+        self,
+        chunk: list[Source],
+        tar: tarfile.TarFile | None,
+        pool: ProcessPoolExecutor,
+        stored: dict[str, tuple[str, str]],
+    ) -> dict[str, tuple]:
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for src in chunk:
+            if src.profile_json is not None and not self.args.reprofile:
+                continue
+            if local_file_id(src.rel) in stored:
+                continue
+            if src.member is not None:
+                # tarfile is not thread/process safe: read here, extract in the pool
+                fh = tar.extractfile(src.member)
+                payload: bytes | str = fh.read() if fh is not None else b""
+            else:
+                payload = str(src.path)
+            futures[src.rel] = loop.run_in_executor(pool, _extract, payload, src.mime_type)
+        results = await asyncio.gather(*futures.values())
+        return dict(zip(futures, results))
+
+    def _build_rows(
+        self, chunk: list[Source], extracted: dict[str, tuple], stored: dict[str, tuple[str, str]]
+    ) -> tuple[list[dict], dict]:
+        rows: list[dict] = []
+        profiles: dict[str, ResumeProfile] = {}
+        for src in chunk:
+            gid = local_file_id(src.rel)
+            # Deterministic for new rows: vectors are upserted before the rows are committed,
+            # so a crashed import resumed with --job-id must reuse the same ids
+            file_id = self.ids.get(gid) or file_row_id(self.job_id, gid)
+            timings = StageTimings()
+            row = {
+                "id": file_id,
+                "gdrive_file_id": gid,
+                "name": src.rel,
+                "mime_type": src.mime_type,
+                "status": "running",
+                "stage": None,
+                "num_chunks": None,
+                "resume_profile": None,
+                "profile_tier": None,
+                "timings": timings,
+                "error": None,
+                "minhash": None,
+                "lsh_bands": None,
+            }
+            rows.append(row)
+
+            profile = None
+            if gid in stored and src.profile_json is None:
+                raw, tier = stored[gid]
+                profile, _ = _profile_from_json(raw, timings)
+                row["profile_tier"] = tier
+            elif src.rel in extracted:
+                text, timing_values, error, unsupported, fingerprint = extracted[src.rel]
+                timings.values.update(timing_values or {})
+                if error is not None:
+                    row.update(status="skipped" if unsupported else "failed", error=error)
+                    continue
+                row.update(fingerprint)
+                with timings.stage("llm", "heuristic"):
+                    profile = build_resume_profile(text or "")
+                row["profile_tier"] = "heuristic"
+            else:
+                try:
+                    profile, row["profile_tier"] = _profile_from_json(src.profile_json, timings)
+                except Exception:
+                    row.update(status="failed", error=f"Invalid {PROFILE_SUFFIX}:\n" + traceback.format_exc())
+                    continue
+
+            row.update(stage="profiled", resume_profile=_profile_dump(profile))
+            profiles[gid] = profile
+        return rows, profiles
+
+    async def _embed_and_upsert(self, rows: list[dict], profiles: dict[str, ResumeProfile]) -> None:
+        from app.services.processing.embeddings import embed_texts
+        from app.services.vectors.upsert import resume_embedding_vector, upsert_vectors_batched
+
+        todo = [r for r in rows if r["gdrive_file_id"] in profiles]
+        with_summary = [r for r in todo if (profiles[r["gdrive_file_id"]].overall_summary or "").strip()]
+        embeddable = {r["gdrive_file_id"] for r in with_summary}
+        for r in todo:
+            if r["gdrive_file_id"] not in embeddable:
+                r.update(status="failed", error="overall_summary_embedding is empty; cannot upsert to Pinecone")
+        if not with_summary:
+            return
+
+        start = time.perf_counter()
+        summaries = [profiles[r["gdrive_file_id"]].overall_summary.strip() for r in with_summary]
+        vectors = await asyncio.to_thread(embed_texts, summaries)
+        self._time("embed", time.perf_counter() - start)
+        per_file = (time.perf_counter() - start) / len(with_summary)
+        for r in with_summary:
+            r["timings"].add("embed", per_file)
+
+        if self.index is None:
+            # --skip-vectors: rows stay queued at the profiled checkpoint
+            for r in with_summary:
+                r["status"] = "queued"
+            return
+
+        payload = [
+            resume_embedding_vector(str(r["id"]), r["name"], vec, str(self.job_id))
+            for r, vec in zip(with_summary, vectors)
+        ]
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(
+                upsert_vectors_batched,
+                self.index,
+                self.args.namespace,
+                payload,
+                self.args.vector_batch_size,
+            )
+        except Exception:
+            error = "Pinecone upsert failed:\n" + traceback.format_exc()
+            for r in with_summary:
+                r.update(status="failed", error=error)
+            return
+        finally:
+            self._time("upsert", time.perf_counter() - start)
+
+        per_file = (time.perf_counter() - start) / len(with_summary)
+        for r in with_summary:
+            r["timings"].add("upsert", per_file)
+            r.update(status="succeeded", stage="succeeded", num_chunks=0)
+
+    async def _copy_rows(self, conn: asyncpg.Connection, rows: list[dict]) -> tuple | None:
+        records = [
+            (
+                r["id"],
+                r["gdrive_file_id"],
+                r["name"],
+                r["mime_type"],
+                r["status"],
+                r["stage"],
+                r["num_chunks"],
+                r["resume_profile"],
+                r["profile_tier"],
+                json.dumps(r["timings"].as_dict()) if r["timings"].as_dict() else None,
+                r["error"],
+                r["minhash"],
+                r["lsh_bands"],
+            )
+            for r in rows
+        ]
+        start = time.perf_counter()
+        async with conn.transaction():
+            await conn.execute("TRUNCATE bulk_import_stage")
+            await conn.copy_records_to_table("bulk_import_stage", records=records, columns=_STAGE_COLUMNS)
+            await conn.execute(_UPSERT_SQL, self.job_id)
+            counts = await conn.fetchrow(_COUNTERS_SQL, self.job_id)
+        self._time("db", time.perf_counter() - start)
+        return tuple(counts) if counts is not None else None
+
+    async def run_chunk(
+        self,
+        conn: asyncpg.Connection,
+        chunk: list[Source],
+        tar: tarfile.TarFile | None,
+        pool: ProcessPoolExecutor,
+    ) -> None:
+        stored = await self._stored_profiles(conn, chunk)
+        start = time.perf_counter()
+        extracted = await self._extract_all(chunk, tar, pool, stored)
+        self._time("extract", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        rows, profiles = self._build_rows(chunk, extracted, stored)
+        self._time("profile", time.perf_counter() - start)
+
+        await self._embed_and_upsert(rows, profiles)
+        counts = await self._copy_rows(conn, rows)
+
+        for r in rows:
+            self.counts[r["status"]] = self.counts.get(r["status"], 0) + 1
+        if counts is not None:
+            await asyncio.to_thread(publish_job_events, self.job_id, [progress_event(self.job_id, *counts)])
+
+
+async def _start_job(
+    args: argparse.Namespace, total: int
+) -> tuple[uuid.UUID, dict[str, uuid.UUID], set[str], set[str]]:
+    async with AsyncSessionLocal() as session:
+        if args.job_id:
+            job = await session.get(Job, uuid.UUID(args.job_id))
+            if job is None:
+                raise SystemExit(f"Job not found: {args.job_id}")
+        else:
+            job = Job(folder_url=f"local://{args.source}", created_at=datetime.utcnow())
+            session.add(job)
+        job.status = "running"
+        job.started_at = job.started_at or datetime.utcnow()
+        job.finished_at = None
+        job.error = None
+        job.total_files = total
+        await session.commit()
+
+        states = await load_file_states(session, job.id)
+    ids = {gid: state.id for gid, state in states.items()}
+    done = {gid for gid, state in states.items() if state.status in DONE_STATUSES}
+    profiled = {gid for gid, state in states.items() if state.stage == "profiled" and gid not in done}
+    publish_job_events(job.id, [job_event(job.id, "running")])
+    return job.id, ids, done, profiled
+
+
+async def _finish_job(job_id: uuid.UUID, error: str | None = None) -> str:
+    async with AsyncSessionLocal() as session:
+        job = await session.get(Job, job_id)
+        if error is not None:
+            job.status = "failed"
+            job.error = error
+        elif job.failed_files:
+            job.status = "failed"
+        else:
+            # Rows left queued by --skip-vectors are not searchable yet
+            queued = await session.scalar(
+                select(func.count()).select_from(File).where(File.job_id == job_id, File.status == "queued")
+            )
+            job.status = "vectors_pending" if queued else "succeeded"
+        job.finished_at = datetime.utcnow()
+        await session.commit()
+        status = job.status
+    publish_job_events(job_id, [job_event(job_id, status, error)])
+    return status
+
+
+def _asyncpg_dsn() -> str:
+    # The app URL is postgresql+asyncpg://...; asyncpg itself wants postgresql://
+    return make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    source: Path = args.source
+    tar = tarfile.open(source, "r:*") if _is_tar(source) else None
+    try:
+        sources = scan_tar(tar) if tar is not None else scan_folder(source)
+        if not sources:
+            print("No resume files found in:", source)
+            return {}
+
+        job_id, ids, done, profiled = await _start_job(args, len(sources))
+        todo = sources if args.overwrite else [s for s in sources if local_file_id(s.rel) not in done]
+        with_profile = sum(1 for s in todo if s.profile_json is not None)
+        print(
+            f"job {job_id}: {len(sources)} files, {len(sources) - len(todo)} already imported, "
+            f"{len(todo)} to import ({with_profile} with {PROFILE_SUFFIX})",
+            flush=True,
+        )
+
+        importer = Importer(args, job_id, ids, profiled)
+        started = time.monotonic()
+        conn = await asyncpg.connect(_asyncpg_dsn())
+        try:
+            await conn.execute(_STAGE_DDL)
+            with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                for i in range(0, len(todo), args.chunk_size):
+                    chunk = todo[i : i + args.chunk_size]
+                    await importer.run_chunk(conn, chunk, tar, pool)
+                    done_n = i + len(chunk)
+                    rate = done_n / max(1e-9, time.monotonic() - started)
+                    print(f"[{done_n}/{len(todo)} {rate:.1f}/s] {importer.counts}", flush=True)
+        except BaseException:
+            await _finish_job(job_id, error=traceback.format_exc())
+            raise
+        finally:
+            await conn.close()
+
+        status = await _finish_job(job_id)
+        elapsed = time.monotonic() - started
+        return {
+            "job_id": str(job_id),
+            "status": status,
+            "files": len(todo),
+            "elapsed_s": round(elapsed, 2),
+            "files_per_s": round(len(todo) / elapsed, 2) if elapsed else 0.0,
+            "statuses": importer.counts,
+            "stage_seconds": {k: round(v, 2) for k, v in sorted(importer.stage_s.items())},
+        }
+    finally:
+        if tar is not None:
+            tar.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import a local folder or tarball of resumes into Postgres + Pinecone")
+    parser.add_argument("source", help="Folder, or .tar / .tar.gz / .tgz archive")
+    parser.add_argument("--namespace", default=settings.pinecone_namespace)
+    parser.add_argument("--job-id", default=None, help="Import into an existing job (resumes a partial import)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Files per COPY / embed / upsert round")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Extraction processes")
+    parser.add_argument("--vector-batch-size", type=int, default=None, help="Vectors per Pinecone upsert request")
+    parser.add_argument("--reprofile", action="store_true", help=f"Ignore {PROFILE_SUFFIX} files and re-extract")
+    parser.add_argument("--overwrite", action="store_true", help="Re-import files already succeeded in the job")
+    parser.add_argument(
+        "--skip-vectors",
+        action="store_true",
+        help="Postgres only: rows are left queued at the 'profiled' checkpoint and the job vectors_pending",
+    )
+    args = parser.parse_args()
+
+    args.source = Path(args.source).resolve()
+    if not (args.source.is_dir() or _is_tar(args.source)):
+        raise SystemExit(f"Not a folder or tar archive: {args.source}")
+    if not args.skip_vectors and not (settings.pinecone_api_key and settings.pinecone_index_host):
+        raise SystemExit("Pinecone is not configured (PINECONE_API_KEY / PINECONE_INDEX_HOST); use --skip-vectors")
+    args.workers = max(1, args.workers)
+    args.chunk_size = max(1, args.chunk_size)
+
+    result = asyncio.run(main_async(args))
+    if result:
+        result["timestamp"] = datetime.now(timezone.utc).isoformat()
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+# Import-time report for process entry points: runs `python -X importtime` on each module
+# in fresh interpreters (best of --runs), reports total import time, RSS after import and
+# the packages that cost the most. Exits 1 when a module is over --budget-ms, imports a
+# dependency that must stay lazy (torch, Pinecone, Groq, Google API client, ...), or
+# regresses against a saved baseline by more than --max-regression.
+#
+#   python -m scripts.import_time --out bench-results/import_time.json
+#   python -m scripts.import_time --baseline bench-results/import_time.json --max-regression 0.25
+
+import argparse
+import json
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Loaded on first use behind service accessors; importing app.main must not pull these in
+LAZY_MODULES = (
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "onnxruntime",
+    "numpy",
+    "pinecone",
+    "groq",
+    "httpx",
+    "llama_cpp",
+    "googleapiclient",
+    "google.oauth2",
+    "pypdf",
+    "pdfminer",
+    "docx",
+)
+
+_PROBE = (
+    "import resource, sys; import {module}; "
+    "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss; "
+    "print(rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024)"
+)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, int, int, str]]:
+    # (depth, self_us, cumulative_us, module) per "import time:" line
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        self_us, cumulative_us, name = parts
+        # One space, then two per nesting level
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def _measure(module: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+    )
+    rows = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        tail = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")][-5:]
+        raise SystemExit(f"importing {module} failed:\n" + "\n".join(tail))
+
+    # Everything from the target's subtree: rows are printed children-first, the target last
+    end = max(i for i, r in enumerate(rows) if r[0] == 0 and r[3] == module)
+    start = end
+    while start > 0 and rows[start - 1][0] > 0:
+        start -= 1
+    subtree = rows[start : end + 1]
+
+    by_package: dict[str, int] = {}
+    for _, self_us, _, name in subtree:
+        root = name.split(".")[0]
+        by_package[root] = by_package.get(root, 0) + self_us
+    names = [r[3] for r in subtree]
+    return {
+        "total_ms": round(rows[end][2] / 1000, 1),
+        "modules": len(subtree),
+        "rss_mb": round(float(proc.stdout.strip().splitlines()[-1]), 1),
+        "top_packages_ms": {
+            k: round(v / 1000, 1) for k, v in sorted(by_package.items(), key=lambda kv: -kv[1])[:15]
+        },
+        "lazy_violations": sorted(
+            {m for m in LAZY_MODULES for n in names if n == m or n.startswith(m + ".")}
+        ),
+    }
+
+
+def measure(module: str, runs: int) -> dict:
+    # Best of N: the first run also pays for .pyc compilation and a cold page cache
+    results = [_measure(module) for _ in range(max(1, runs))]
+    best = min(results, key=lambda r: r["total_ms"])
+    return {**best, "runs_ms": [r["total_ms"] for r in results]}
+
+
+def _compare(result: dict, baseline_path: str, max_regression: float) -> list[str]:
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    failures = []
+    for module, cur in result["modules"].items():
+        prev = (baseline.get("modules") or {}).get(module)
+        if not prev or not prev.get("total_ms"):
+            continue
+        change = (cur["total_ms"] - prev["total_ms"]) / prev["total_ms"]
+        print(f"{module} vs {baseline.get('commit')}: {prev['total_ms']} -> {cur['total_ms']} ms ({change:+.1%})")
+        if change > max_regression:
+            failures.append(f"{module} import time regressed {change:+.1%}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure and budget the import time of app entry points")
+    parser.add_argument("--module", action="append", default=None, help="Module to import (repeatable; default app.main)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Max import time per module (0: no budget)")
+    parser.add_argument("--allow-heavy", action="store_true", help="Don't fail on imports of LAZY_MODULES")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    modules = args.module or ["app.main"]
+    result = {
+        "benchmark": "import_time",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "config": {"runs": args.runs, "budget_ms": args.budget_ms},
+        "modules": {module: measure(module, args.runs) for module in modules},
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    failures = []
+    for module, r in result["modules"].items():
+        if args.budget_ms and r["total_ms"] > args.budget_ms:
+            failures.append(f"{module} imports in {r['total_ms']} ms (budget {args.budget_ms} ms)")
+        if r["lazy_violations"] and not args.allow_heavy:
+            failures.append(f"{module} imports {', '.join(r['lazy_violations'])} at load time")
+    if args.baseline:
+        failures += _compare(result, args.baseline, args.max_regression)
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()